@@ -0,0 +1,209 @@
+'''
+    This file contains the two tier cache backend and the cache helpers used
+    by the API views
+
+    TieredCache keeps a small in-process LRU in front of a shared backend
+    (file, database or Redis). Reads are served from process memory when
+    they can be, writes and deletes go to both tiers, and other processes
+    see a change once their local copy expires, after LOCAL_TIMEOUT seconds
+    at most. Hit and miss counters are pushed to the shared backend every
+    few hundred operations or seconds, so the cache_stats command can report
+    them for every process together.
+'''
+
+# IMPORTS #
+
+import pickle
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.utils.module_loading import import_string
+
+
+
+
+STATS = ('local_hits', 'shared_hits', 'misses')
+
+_missing = object()
+
+
+
+
+# TIERED CACHE BACKEND #
+
+class TieredCache(BaseCache):
+
+    def __init__(self, location, params):
+        options = dict(params.get('OPTIONS', {}))
+        shared_backend = options.pop('SHARED_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache')
+        self.local_max_entries = options.pop('LOCAL_MAX_ENTRIES', 1000)
+        self.local_timeout = options.pop('LOCAL_TIMEOUT', 5)
+        self.stats_flush_every = options.pop('STATS_FLUSH_EVERY', 500)
+        self.stats_flush_seconds = options.pop('STATS_FLUSH_SECONDS', 10)
+
+        super().__init__({**params, 'OPTIONS': options})
+        self.shared = import_string(shared_backend)(location, {**params, 'OPTIONS': options})
+
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = Counter()
+        self._stats_flushed_at = time.monotonic()
+
+    # LOCAL TIER
+
+    def _local_get(self, key):
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is None:
+                return _missing
+            if entry[0] <= time.monotonic():
+                del self._local[key]
+                return _missing
+            self._local.move_to_end(key)
+        return pickle.loads(entry[1])
+
+    def _local_set(self, key, value, timeout):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        local_timeout = self.local_timeout if timeout is None else min(timeout, self.local_timeout)
+        if local_timeout <= 0:
+            self._local_delete(key)
+            return
+
+        entry = (time.monotonic() + local_timeout, pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+        with self._lock:
+            self._local[key] = entry
+            self._local.move_to_end(key)
+            while len(self._local) > self.local_max_entries:
+                self._local.popitem(last=False)
+
+    def _local_delete(self, key):
+        with self._lock:
+            self._local.pop(key, None)
+
+    # CACHE API
+
+    def get(self, key, default=None, version=None):
+        local_key = self.shared.make_key(key, version)
+        value = self._local_get(local_key)
+        if value is not _missing:
+            self._count('local_hits')
+            return value
+
+        value = self.shared.get(key, _missing, version)
+        if value is _missing:
+            self._count('misses')
+            return default
+
+        self._count('shared_hits')
+        self._local_set(local_key, value, DEFAULT_TIMEOUT)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, timeout, version)
+        self._local_set(self.shared.make_key(key, version), value, timeout)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.shared.add(key, value, timeout, version)
+        if added:
+            self._local_set(self.shared.make_key(key, version), value, timeout)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.touch(key, timeout, version)
+
+    def delete(self, key, version=None):
+        self._local_delete(self.shared.make_key(key, version))
+        return self.shared.delete(key, version)
+
+    def incr(self, key, delta=1, version=None):
+        self._local_delete(self.shared.make_key(key, version))
+        return self.shared.incr(key, delta, version)
+
+    def clear(self):
+        with self._lock:
+            self._local.clear()
+        self.shared.clear()
+
+    def close(self, **kwargs):
+        self.shared.close(**kwargs)
+
+    # HIT/MISS METRICS
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+            flush = (
+                sum(self._stats.values()) >= self.stats_flush_every
+                or time.monotonic() - self._stats_flushed_at >= self.stats_flush_seconds
+            )
+        if flush:
+            self.flush_stats()
+
+    def flush_stats(self):
+        with self._lock:
+            pending, self._stats = self._stats, Counter()
+            self._stats_flushed_at = time.monotonic()
+
+        for name, count in pending.items():
+            key = 'cache-stats:{}'.format(name)
+            try:
+                self.shared.incr(key, count)
+            except ValueError:
+                if not self.shared.add(key, count, None):
+                    self.shared.incr(key, count)
+
+    def stats(self):
+        '''Totals from every process, including this one's unflushed counts'''
+        self.flush_stats()
+        return {name: self.shared.get('cache-stats:{}'.format(name), 0) for name in STATS}
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = Counter()
+        self.shared.delete_many(['cache-stats:{}'.format(name) for name in STATS])
+
+
+
+
+# CACHE HELPERS #
+
+def get_cache(alias='api'):
+    return caches[alias]
+
+
+def make_key(namespace, *parts, alias='api'):
+    '''Key under the namespace's current generation, see invalidate'''
+    cache = get_cache(alias)
+    key = 'generation:{}'.format(namespace)
+    generation = cache.get(key)
+    if generation is None:
+        # Never seen, expired or culled: start a generation no earlier key used
+        cache.add(key, time.time_ns(), None)
+        generation = cache.get(key)
+    return ':'.join(str(part) for part in (namespace, generation) + parts)
+
+
+def invalidate(namespace, alias='api'):
+    '''
+    Retire every key made in the namespace by moving it to a new generation.
+    Generations are timestamps rather than a counter from zero, so a counter
+    the shared backend culls comes back as a new generation instead of
+    falling back to one whose entries are still stored.
+    '''
+    cache = get_cache(alias)
+    key = 'generation:{}'.format(namespace)
+    cache.set(key, max(time.time_ns(), (cache.get(key) or 0) + 1), None)
+
+
+def remember(key, builder, timeout=DEFAULT_TIMEOUT, alias='api'):
+    '''Return the cached value for key, building and storing it on a miss'''
+    cache = get_cache(alias)
+    value = cache.get(key, _missing)
+    if value is _missing:
+        value = builder()
+        cache.set(key, value, timeout)
+    return value
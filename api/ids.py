@@ -0,0 +1,93 @@
+'''
+    This file contains the shared ID generators for orders, tickets, wallets,
+    users and events
+
+    IDs are lowercase Crockford base32 of a 50-bit millisecond timestamp, a
+    20-bit node number and a 20-bit sequence, so they sort by creation time
+    and need no database lookup. The node is random per process (and picked
+    again after a fork) and the sequence is bumped under a lock, which keeps
+    IDs from one process unique; the unique constraints on the ID columns
+    catch anything else.
+
+    Ticket IDs are bearer credentials at the gate, so they come from
+    generate_secret_id instead: 128 random bits that cannot be guessed from
+    a neighbouring ticket's ID or its purchase time.
+'''
+
+# IMPORTS #
+
+import os
+import secrets
+import threading
+import time
+
+
+
+
+ALPHABET = '0123456789abcdefghjkmnpqrstvwxyz'
+
+TIME_CHARS = 10
+NODE_CHARS = 4
+SEQUENCE_CHARS = 4
+
+SEQUENCE_MAX = 32 ** SEQUENCE_CHARS - 1
+
+# Length of an ID without its prefix
+LENGTH = TIME_CHARS + NODE_CHARS + SEQUENCE_CHARS
+
+
+
+
+def encode(number, length):
+    chars = []
+    for _ in range(length):
+        number, rest = divmod(number, 32)
+        chars.append(ALPHABET[rest])
+    return ''.join(reversed(chars))
+
+
+
+
+# ID GENERATOR #
+
+class IdGenerator:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reseed()
+
+    def reseed(self):
+        self.node = encode(secrets.randbits(5 * NODE_CHARS), NODE_CHARS)
+        self.last_ms = 0
+        self.sequence = 0
+
+    def generate(self, prefix=''):
+        with self.lock:
+            now = time.time_ns() // 1000000
+            if now > self.last_ms:
+                self.last_ms = now
+                # Start low in the range so the sequence rarely wraps
+                self.sequence = secrets.randbits(5 * SEQUENCE_CHARS - 1)
+            elif self.sequence < SEQUENCE_MAX:
+                self.sequence += 1
+            else:
+                # Sequence exhausted in this millisecond, borrow the next one
+                self.last_ms += 1
+                self.sequence = 0
+            ms, sequence = self.last_ms, self.sequence
+
+        return prefix + encode(ms, TIME_CHARS) + self.node + encode(sequence, SEQUENCE_CHARS)
+
+
+_generator = IdGenerator()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_generator.__init__)
+
+
+def generate_id(prefix=''):
+    return _generator.generate(prefix)
+
+
+def generate_secret_id(prefix=''):
+    return prefix + secrets.token_urlsafe(16)
@@ -0,0 +1,213 @@
+'''
+    This file contains reusable mixins for the API views
+'''
+
+# IMPORTS #
+
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.throttling import BaseThrottle
+
+from core.order.models import IdempotencyKey
+
+
+
+
+# IDEMPOTENCY MIXIN #
+
+class IdempotentReplay(Exception):
+
+    def __init__(self, response):
+        self.response = response
+
+
+class IdempotencyMixin:
+    '''
+        Replays the stored response when a request repeats its Idempotency-Key
+        header, without running the view again. Keys are scoped to the view
+        and the user, or the client address for anonymous callers, and
+        reusing one for a different request is rejected. Expired keys are
+        removed by the purge_idempotency_keys command.
+    '''
+
+    idempotent_methods = ('POST',)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.idempotency_record = None
+
+        key = request.META.get('HTTP_IDEMPOTENCY_KEY')
+        if not key or request.method not in self.idempotent_methods:
+            return
+
+        key = key[:255]
+        scope = self.get_idempotency_scope(request)
+        fingerprint = hashlib.sha256(
+            request.method.encode() + request.get_full_path().encode() + request.body
+        ).hexdigest()
+        cache_key = 'idempotency:{}'.format(hashlib.sha256((scope + key).encode()).hexdigest())
+
+        stored = cache.get(cache_key)
+        if stored is not None:
+            raise IdempotentReplay(self.replay(fingerprint, *stored))
+
+        now = timezone.now()
+        lease = now + timezone.timedelta(seconds=settings.IDEMPOTENCY_KEY_LEASE)
+        expired = now - timezone.timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+        IdempotencyKey.objects.filter(scope=scope, key=key, date_created__lt=expired).delete()
+        try:
+            with transaction.atomic():
+                self.idempotency_record = IdempotencyKey.objects.create(
+                    scope=scope, key=key, fingerprint=fingerprint, lease_expires_at=lease,
+                )
+        except IntegrityError:
+            record = IdempotencyKey.objects.get(scope=scope, key=key)
+            if record.status_code is None:
+                if record.fingerprint == fingerprint and self.take_over(record, now, lease):
+                    self.idempotency_cache_key = cache_key
+                    return
+                raise IdempotentReplay(Response(
+                    {'error': 'A request with this Idempotency-Key is still in progress'},
+                    status=status.HTTP_409_CONFLICT,
+                ))
+            stored = (record.fingerprint, record.status_code, record.response)
+            cache.set(cache_key, stored, settings.IDEMPOTENCY_KEY_TTL)
+            raise IdempotentReplay(self.replay(fingerprint, *stored))
+
+        self.idempotency_cache_key = cache_key
+
+    def get_idempotency_scope(self, request):
+        '''
+        Anonymous callers would otherwise all share one scope, so one
+        client's key could replay or block another's. They are told apart
+        by the same client address DRF throttling uses.
+        '''
+        if request.user.pk is not None:
+            return '{}:{}'.format(type(self).__name__, request.user.pk)
+        ident = BaseThrottle().get_ident(request) or ''
+        return '{}:anon-{}'.format(type(self).__name__, hashlib.sha256(ident.encode()).hexdigest()[:32])
+
+    def take_over(self, record, now, lease):
+        '''Claim a key whose first request died before it finished'''
+        if record.lease_expires_at is not None and record.lease_expires_at > now:
+            return False
+        taken = IdempotencyKey.objects.filter(
+            pk=record.pk, status_code__isnull=True, lease_expires_at=record.lease_expires_at,
+        ).update(lease_expires_at=lease)
+        if taken:
+            record.lease_expires_at = lease
+            self.idempotency_record = record
+        return bool(taken)
+
+    def replay(self, fingerprint, stored_fingerprint, status_code, data):
+        if fingerprint != stored_fingerprint:
+            return Response(
+                {'error': 'This Idempotency-Key was used for a different request'},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            )
+        response = Response(data, status=status_code)
+        response['Idempotent-Replayed'] = 'true'
+        return response
+
+    def handle_exception(self, exc):
+        if isinstance(exc, IdempotentReplay):
+            return exc.response
+        try:
+            return super().handle_exception(exc)
+        except Exception:
+            if getattr(self, 'idempotency_record', None) is not None:
+                self.idempotency_record.delete()
+                self.idempotency_record = None
+            raise
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        record = getattr(self, 'idempotency_record', None)
+        if record is not None:
+            if response.status_code >= 500:
+                # Let the client retry failures on our side
+                record.delete()
+            else:
+                IdempotencyKey.objects.filter(pk=record.pk).update(
+                    status_code=response.status_code, response=response.data,
+                )
+                cache.set(
+                    self.idempotency_cache_key,
+                    (record.fingerprint, response.status_code, response.data),
+                    settings.IDEMPOTENCY_KEY_TTL,
+                )
+            self.idempotency_record = None
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+
+
+# CONDITIONAL GET MIXIN #
+
+class NotModified(Exception):
+
+    def __init__(self, response):
+        self.response = response
+
+
+class ConditionalGetMixin:
+    '''
+        Sends ETag and Last-Modified on GET responses and answers a request
+        whose validators still match with a 304 before anything is
+        serialized. Validators come from one aggregate over the view's
+        queryset: the latest date_updated and the row count, so deletions
+        change them too. Detail views narrow the queryset with their lookup.
+        A view serializing related rows sets last_modified_field to an
+        expression covering their date_updated as well.
+    '''
+
+    last_modified_field = 'date_updated'
+
+    def get_validator_queryset(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        if lookup_url_kwarg in self.kwargs:
+            queryset = queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        return queryset
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.validators = None
+        if request.method not in ('GET', 'HEAD'):
+            return
+
+        state = self.get_validator_queryset().order_by().aggregate(
+            last_modified=Max(self.last_modified_field), count=Count('pk'),
+        )
+        if state['last_modified'] is None:
+            return
+
+        etag = quote_etag(hashlib.md5('{} {} {} {}'.format(
+            request.get_full_path(), request.user.pk, state['last_modified'].isoformat(), state['count'],
+        ).encode()).hexdigest())
+        last_modified = int(state['last_modified'].timestamp())
+        self.validators = (etag, last_modified)
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is not None:
+            response['ETag'], response['Last-Modified'] = etag, http_date(last_modified)
+            raise NotModified(response)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        validators = getattr(self, 'validators', None)
+        if validators is not None and response.status_code == 200:
+            response['ETag'], response['Last-Modified'] = validators[0], http_date(validators[1])
+        return super().finalize_response(request, response, *args, **kwargs)
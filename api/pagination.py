@@ -0,0 +1,168 @@
+'''
+    This file contains the keyset (cursor) paginations for the API lists
+
+    A page is read with WHERE (ordering columns) past the last row seen and
+    LIMIT page_size + 1, so deep pages cost the same as the first one and no
+    COUNT query runs. The cursor is an opaque token holding the ordering
+    values of the row the page starts after. Every ordering ends with the
+    primary key so the position is always unique, and each one has a
+    matching composite index.
+'''
+
+# IMPORTS #
+
+import base64
+import json
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+
+
+# KEYSET PAGINATION #
+
+class KeysetPagination(BasePagination):
+
+    ordering = ('-date_created', '-id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        position, self.reverse = self.decode_cursor(request, queryset.model)
+
+        ordering = [self.invert(field) for field in self.ordering] if self.reverse else list(self.ordering)
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.seek(ordering, position))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        if self.reverse:
+            self.page.reverse()
+
+        # Walking backwards, the page we came from is always ahead of us
+        self.has_next = True if self.reverse else has_more
+        self.has_previous = has_more if self.reverse else position is not None
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'previous': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+    # PAGE SIZE
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    # CURSORS
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.link(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self.link(self.page[0], reverse=True)
+
+    def link(self, row, reverse):
+        position = [self.value(row, field.lstrip('-')) for field in self.ordering]
+        token = base64.urlsafe_b64encode(
+            json.dumps({'p': position, 'r': reverse}, separators=(',', ':')).encode()
+        ).decode()
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, token)
+
+    def decode_cursor(self, request, model):
+        '''The position and direction in the cursor, each value parsed by its model field'''
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(token.encode()))
+            position, reverse = cursor['p'], bool(cursor['r'])
+            if not isinstance(position, list) or len(position) != len(self.ordering):
+                raise ValueError('Cursor position does not match the ordering')
+            position = [
+                model._meta.get_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, position)
+            ]
+            if None in position:
+                raise ValueError('Cursor position is incomplete')
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    # KEYSET HELPERS
+
+    @staticmethod
+    def value(row, field):
+        value = getattr(row, field)
+        return value.isoformat() if hasattr(value, 'isoformat') else value
+
+    @staticmethod
+    def invert(field):
+        return field[1:] if field.startswith('-') else '-' + field
+
+    @staticmethod
+    def seek(ordering, position):
+        '''Rows strictly after position: (a > x) OR (a = x AND b > y) ...'''
+        condition = Q()
+        equal = {}
+        for field, value in zip(ordering, position):
+            name = field.lstrip('-')
+            lookup = '{}__{}'.format(name, 'lt' if field.startswith('-') else 'gt')
+            condition |= Q(**equal, **{lookup: value})
+            equal[name] = value
+        return condition
+
+
+
+
+# API PAGINATIONS #
+
+class EventPagination(KeysetPagination):
+    ordering = ('start_date', 'id')
+    page_size = settings.API_PAGE_SIZES['EVENTS']
+
+
+class PurchasedTicketPagination(KeysetPagination):
+    ordering = ('-purchased_date', '-id')
+    page_size = settings.API_PAGE_SIZES['PURCHASED_TICKETS']
+
+
+class TransactionPagination(KeysetPagination):
+    ordering = ('-date_created', '-id')
+    page_size = settings.API_PAGE_SIZES['TRANSACTIONS']
@@ -0,0 +1,169 @@
+'''
+    This file contains the shared Paystack API client
+
+    One keep-alive connection pool is reused for every call, each call is
+    bounded by connect/read timeouts and retried with jittered backoff, and a
+    circuit breaker fails fast while the gateway is degraded. PAYSTACK
+    ['BASE_URL'] can point at a local stub server.
+'''
+
+# IMPORTS #
+
+import asyncio
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+
+
+
+
+class PaystackError(Exception):
+    pass
+
+
+class GatewayUnavailable(PaystackError):
+    pass
+
+
+
+
+# CIRCUIT BREAKER #
+
+class CircuitBreaker:
+
+    def __init__(self, threshold, reset_seconds):
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self.lock = threading.Lock()
+
+    def allow(self):
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at >= self.reset_seconds:
+                # Half open, let one trial call through
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+
+
+
+# PAYSTACK CLIENT #
+
+class PaystackClient:
+
+    def __init__(self, secret_key=None, base_url=None, **options):
+        conf = {**settings.PAYSTACK, **options}
+
+        self.base_url = (base_url or conf['BASE_URL']).rstrip('/')
+        self.timeout = (conf['CONNECT_TIMEOUT'], conf['READ_TIMEOUT'])
+        self.retries = conf['RETRIES']
+        self.backoff = conf['BACKOFF_SECONDS']
+        self.breaker = CircuitBreaker(conf['BREAKER_THRESHOLD'], conf['BREAKER_RESET_SECONDS'])
+
+        self.session = requests.Session()
+        self.session.headers['authorization'] = 'Bearer {}'.format(
+            secret_key or settings.PAYSTACK_SECRET_KEY
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=conf['POOL_SIZE'])
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def initialize_transaction(self, data):
+        return self.request('POST', '/transaction/initialize', data=data, idempotent=False)
+
+    def verify_transaction(self, reference):
+        return self.request('GET', '/transaction/verify/{}'.format(reference))
+
+    def request(self, method, path, idempotent=True, **kwargs):
+        if not self.breaker.allow():
+            raise GatewayUnavailable('Paystack is unavailable, try again shortly')
+
+        for attempt in range(self.retries + 1):
+            try:
+                r = self.session.request(method, self.base_url + path, timeout=self.timeout, **kwargs)
+            except requests.ConnectTimeout as e:
+                error = e
+            except (requests.ConnectionError, requests.Timeout) as e:
+                # The request may have reached Paystack, only replay safe calls
+                if not idempotent:
+                    self.breaker.record_failure()
+                    raise GatewayUnavailable(str(e)) from e
+                error = e
+            else:
+                if r.status_code < 500:
+                    self.breaker.record_success()
+                    return self.parse(r)
+                error = PaystackError('Paystack returned {}'.format(r.status_code))
+                if not idempotent:
+                    self.breaker.record_failure()
+                    raise GatewayUnavailable(str(error))
+
+            self.breaker.record_failure()
+            if attempt < self.retries and self.breaker.allow():
+                time.sleep(self.backoff * 2 ** attempt * random.uniform(0.5, 1.5))
+            else:
+                break
+
+        raise GatewayUnavailable(str(error)) from error
+
+    @staticmethod
+    def parse(r):
+        try:
+            response = r.json()
+        except ValueError:
+            raise PaystackError('Invalid response from Paystack')
+
+        if not r.ok or not response.get('status'):
+            raise PaystackError(response.get('message', 'Paystack request failed'))
+        return response
+
+
+
+
+# ASYNC PAYSTACK CLIENT #
+
+class AsyncPaystackClient:
+    '''Awaitable wrapper for ASGI views, calls run on the shared pool in a thread'''
+
+    def __init__(self, client=None):
+        self.client = client or get_client()
+
+    async def initialize_transaction(self, data):
+        return await asyncio.to_thread(self.client.initialize_transaction, data)
+
+    async def verify_transaction(self, reference):
+        return await asyncio.to_thread(self.client.verify_transaction, reference)
+
+
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = PaystackClient()
+    return _client
@@ -0,0 +1,185 @@
+'''
+    This file renders ticket QR codes on demand
+
+    Codes are drawn straight into memory, as 1-bit PNG or SVG paths, and the
+    bytes are kept in an in-process LRU keyed by payload, format and size,
+    so opening a ticket again or resending its email does not redraw it.
+    Nothing is written to disk, so every node can serve any ticket.
+
+    Large issues go through render_batch, which spreads the codes over a
+    process pool. The pool is started once per process and reused, and its
+    workers are spawned rather than forked, because render_batch runs on the
+    job worker threads and forking a threaded process can copy a lock some
+    other thread holds. Each process and thread keeps one configured encoder
+    per setting and reuses it for every payload, and a PNG is painted from
+    the module matrix in one pass rather than one rectangle per dark module.
+'''
+
+# IMPORTS #
+
+import hashlib
+import io
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+
+import qrcode
+from PIL import Image
+from qrcode.exceptions import DataOverflowError
+from qrcode.image.svg import SvgPathImage
+
+from django.conf import settings
+from django.utils.http import quote_etag
+
+
+
+
+FORMATS = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+}
+
+# Strongest first, the order auto tries them in
+ERROR_CORRECTION = OrderedDict([
+    ('H', qrcode.constants.ERROR_CORRECT_H),
+    ('Q', qrcode.constants.ERROR_CORRECT_Q),
+    ('M', qrcode.constants.ERROR_CORRECT_M),
+    ('L', qrcode.constants.ERROR_CORRECT_L),
+])
+
+AUTO = 'auto'
+
+BOX_SIZE = 10
+
+MAX_BOX_SIZE = 20
+
+BORDER = 4
+
+# Smaller batches are drawn in process, a pool costs more than it saves
+POOL_THRESHOLD = 64
+
+encoders = threading.local()
+
+pools = {}
+
+pools_lock = threading.Lock()
+
+if hasattr(os, 'register_at_fork'):
+    # A forked child cannot use its parent's pool, it starts its own
+    os.register_at_fork(after_in_child=pools.clear)
+
+
+
+
+# ENCODING #
+
+def fit_error_correction(payload, max_version=None):
+    '''The strongest error correction whose code stays within max_version'''
+    max_version = max_version or settings.QRCODE_MAX_VERSION
+    for level in ERROR_CORRECTION.values():
+        qr = qrcode.QRCode(error_correction=level)
+        qr.add_data(payload)
+        try:
+            if qr.best_fit() <= max_version:
+                return level
+        except DataOverflowError:
+            break
+    return qrcode.constants.ERROR_CORRECT_L
+
+
+def encoder(error_correction, box_size, format):
+    '''This thread's encoder for the given settings, created once'''
+    cache = encoders.__dict__.setdefault('cache', {})
+    key = (error_correction, box_size, format)
+    if key not in cache:
+        cache[key] = qrcode.QRCode(
+            error_correction=error_correction,
+            box_size=box_size,
+            border=BORDER,
+            image_factory=SvgPathImage if format == 'svg' else None,
+        )
+    return cache[key]
+
+
+def encode(payload, format, box_size, error_correction):
+    if error_correction == AUTO:
+        level = fit_error_correction(payload)
+    else:
+        level = ERROR_CORRECTION[error_correction]
+
+    qr = encoder(level, box_size, format)
+    qr.clear()
+    qr.version = None
+    qr.add_data(payload)
+    qr.make(fit=True)
+    return qr
+
+
+
+
+# DRAWING #
+
+def paint_png(modules, box_size):
+    '''A 1-bit PNG of the module matrix, quiet zone included'''
+    size = len(modules) + 2 * BORDER
+    quiet = b'\xff' * size
+    margin = b'\xff' * BORDER
+    rows = [quiet] * BORDER
+    rows += [margin + bytes(0 if dark else 255 for dark in row) + margin for row in modules]
+    rows += [quiet] * BORDER
+
+    image = Image.frombytes('L', (size, size), b''.join(rows)).convert('1')
+    image = image.resize((size * box_size, size * box_size), Image.NEAREST)
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG', optimize=True)
+    return buffer.getvalue()
+
+
+def draw(payload, format='png', box_size=BOX_SIZE, error_correction=None):
+    '''The QR code of payload as PNG or SVG bytes, uncached'''
+    qr = encode(payload, format, box_size, error_correction or settings.QRCODE_ERROR_CORRECTION)
+    if format == 'png':
+        return paint_png(qr.modules, box_size)
+
+    buffer = io.BytesIO()
+    qr.make_image().save(buffer)
+    return buffer.getvalue()
+
+
+@lru_cache(maxsize=settings.QRCODE_CACHE_ENTRIES)
+def render(payload, format='png', box_size=BOX_SIZE, error_correction=None):
+    '''The QR code of payload as PNG or SVG bytes'''
+    return draw(payload, format, box_size, error_correction)
+
+
+def pool(workers):
+    '''The process pool with this many workers, started on first use'''
+    with pools_lock:
+        if workers not in pools:
+            pools[workers] = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+            )
+        return pools[workers]
+
+
+def render_batch(payloads, format='png', box_size=BOX_SIZE, error_correction=None, workers=None):
+    '''Draw many codes over a process pool, the bytes come back in order'''
+    workers = settings.QRCODE_WORKERS if workers is None else workers
+    job = partial(
+        draw, format=format, box_size=box_size,
+        error_correction=error_correction or settings.QRCODE_ERROR_CORRECTION,
+    )
+    if workers <= 1 or len(payloads) < POOL_THRESHOLD:
+        return [job(payload) for payload in payloads]
+
+    return list(pool(workers).map(job, payloads, chunksize=max(1, len(payloads) // (workers * 4))))
+
+
+def etag(payload, format='png', box_size=BOX_SIZE):
+    '''The image is a pure function of its arguments, so they make the ETag'''
+    return quote_etag(hashlib.md5('{} {} {} {}'.format(
+        payload, format, box_size, settings.QRCODE_ERROR_CORRECTION,
+    ).encode()).hexdigest())
@@ -103,7 +103,7 @@ class EventListSerializer(serializers.ModelSerializer):
         ]
     )
 
-    price = serializers.CharField(source='min_ticket_price')
+    price = serializers.CharField(source='min_price')
 
     #category = EventCategoryPublicSerializer(read_only=True)
     #category = serializers.CharField(source='category.name')
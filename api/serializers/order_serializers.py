@@ -1,6 +1,8 @@
 # IMPORTS #
 import requests
 from django.conf import settings
+from django.db import transaction
+from django.urls import reverse
 from rest_framework import serializers
 
 from core.order.models import(
@@ -11,6 +13,8 @@ from core.order.models import(
 from core.event.models import(
     Ticket
 )
+from core.event.inventory import InsufficientStock
+from core.order import reservations
 from api.utils import Util
 
 
@@ -80,10 +84,12 @@ class OrderSerializer(serializers.ModelSerializer):
         ]
         depth = 1
 
+    @transaction.atomic
     def create(self, validated_data):
         event_obj = self.context['event_obj']
         selected_tickets = validated_data.pop('selected_ticket', [])
         new_order = Order.objects.create(**validated_data)
+        held_items = []
 
         for tix in selected_tickets:
             try:
@@ -97,7 +103,13 @@ class OrderSerializer(serializers.ModelSerializer):
                 tix_order = TicketOrder.objects.create(item = tix_obj, quantity = tix["quantity"])
 
             new_order.selected_ticket.add(tix_order)
-        
+            held_items.append((tix_obj, tix["quantity"]))
+
+        try:
+            reservations.hold(new_order, held_items)
+        except InsufficientStock as e:
+            raise serializers.ValidationError({"error": str(e)})
+
         return new_order
 
 
@@ -121,10 +133,12 @@ class UserOrderSerializer(serializers.ModelSerializer):
         ]
         depth = 1
 
+    @transaction.atomic
     def create(self, validated_data):
         event_obj = self.context['event_obj'].name
         selected_tickets = validated_data.pop('selected_ticket', [])
         new_order = Order.objects.create(**validated_data)
+        held_items = []
 
         for tix in selected_tickets:
             try:
@@ -138,6 +152,12 @@ class UserOrderSerializer(serializers.ModelSerializer):
                 tix_order = TicketOrder.objects.create(item = tix_obj, quantity = tix["quantity"])
 
             new_order.selected_ticket.add(tix_order)
+            held_items.append((tix_obj, tix["quantity"]))
+
+        try:
+            reservations.hold(new_order, held_items)
+        except InsufficientStock as e:
+            raise serializers.ValidationError({"error": str(e)})
 
         return new_order
 
@@ -166,6 +186,28 @@ class OrderSummarySerializer(serializers.ModelSerializer):
 
 
 
+# ORDER FULFILLMENT SERIALIZER #
+class OrderFulfillmentSerializer(serializers.ModelSerializer):
+
+    tickets = serializers.SlugRelatedField(
+        source='sold_ticket',
+        slug_field='qrcode_id',
+        many=True,
+        read_only=True,
+    )
+
+    class Meta:
+        model = Order
+        fields = [
+            'order_id',
+            'order_status',
+            'fulfillment_status',
+            'tickets',
+        ]
+
+
+
+
 # PURCHASED TICKET LIST SERIALIZER #
 class PurchasedTicketListSerializer(serializers.ModelSerializer):
 
@@ -208,6 +250,8 @@ class PurchasedTicketDetailSerializer(serializers.ModelSerializer):
 
     #ticket_id = serializers.CharField(source="qrcode_id")
 
+    qrcode = serializers.SerializerMethodField()
+
     class Meta:
         model = PurchasedTicket
         fields = [
@@ -216,6 +260,14 @@ class PurchasedTicketDetailSerializer(serializers.ModelSerializer):
             'qrcode_id',
             'checkin_status',
             'purchased_date',
+            'qrcode',
         ]
 
+    def get_qrcode(self, obj):
+        request = self.context.get('request')
+        return request.build_absolute_uri(reverse('core.order:purchased-ticket-qrcode', kwargs={
+            'event_slug': obj.ticket.event.slug,
+            'qrcode_id': obj.qrcode_id,
+        }))
+
         
\ No newline at end of file
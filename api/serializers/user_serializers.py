@@ -93,16 +93,13 @@ class UserLoginSerializer(serializers.ModelSerializer):
         ]
 
     def get_tokens(self, obj):
-        user = User.objects.get(email=obj['email'])
-
-        return {
-            'access': user.tokens()['access'],
-            'refresh': user.tokens()['refresh']
-        }
+        return obj['tokens']
 
     def validate(self, attrs):
         email = attrs.get('email', '')
         password = attrs.get('password', '')
+        # The backend loads the profile and wallet with the user, the
+        # status check and the token claims need no query of their own
         user = auth.authenticate(email=email, password=password)
 
         if not user:
@@ -115,7 +112,7 @@ class UserLoginSerializer(serializers.ModelSerializer):
         return {
             'email':user.email,
             'username':user.username,
-            'tokens': user.tokens
+            'tokens': user.tokens()
         }
 
 
@@ -168,15 +165,16 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         return attrs
 
     def create(self, validated_data):
-        user = User.objects.create(
+        # Hash before the first save so the user goes in with one INSERT,
+        # the post_save receivers then add the profile and wallet
+        user = User(
             email=validated_data['email'],
             username=validated_data['username'].lower(),
             first_name=validated_data['first_name'].capitalize(),
             last_name=validated_data['last_name'].capitalize(),
         )
-        
         user.set_password(validated_data['password'])
-        user.save()
+        user.save(force_insert=True)
 
         return user
 
@@ -1,13 +1,11 @@
 # IMPORTS #
 
-import requests
-
-from django.conf import settings
 from django.db.models import Sum
 
 from rest_framework import serializers
 from rest_framework.authtoken.models import Token
 
+from api.paystack import PaystackError, get_client
 from api.validators import is_amount
 from core.user.models import User
 from core.wallet.models import(
@@ -58,6 +56,23 @@ class WalletSerializer(serializers.ModelSerializer):
 
 
 
+# WALLET TRANSACTION SERIALIZER #
+
+class WalletTransactionSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = WalletTransaction
+        fields = [
+            'transaction_type',
+            'amount',
+            'transaction_status',
+            'paystack_payment_reference',
+            'date_created',
+        ]
+
+
+
+
 # WALLET DEPOSIT SERIALIZER #
 
 class DepositSerializer(serializers.Serializer):
@@ -67,15 +82,14 @@ class DepositSerializer(serializers.Serializer):
 
     def save(self, **kwargs):
         user = self.context['request'].user
-        wallet = Wallet.objects.get(user=user)
+        wallet = user.wallet
 
         self.validated_data['email'] = user.email
         data = self.validated_data
-        url = 'https://api.paystack.co/transaction/initialize'
-        headers = {"authorization": f"Bearer {settings.PAYSTACK_SECRET_KEY}"}
-
-        r = requests.post(url, headers=headers, data=data)
-        response = r.json()
+        try:
+            response = get_client().initialize_transaction(data)
+        except PaystackError as e:
+            raise serializers.ValidationError({'error': str(e)})
         self.context['response'] = response
 
         WalletTransaction.objects.create(
@@ -3,12 +3,12 @@
 '''
 
 
-import qrcode
 import random, string
 
-from django.core.mail import EmailMessage, EmailMultiAlternatives
 from django.conf import settings
-from config.settings.base import TICKET_URL
+
+from api import qrcodes
+from core.notification import outbox
 
 
 from pathlib import Path
@@ -37,49 +37,35 @@ class Util:
 
     @staticmethod
     def send_email(data):
-        email = EmailMessage(
+        outbox.queue(
+            recipient=data['to_email'],
             subject=data['email_subject'],
             body=data['email_body'],
-            to=[data['to_email']]
         )
-        email.send()
 
 
+    @staticmethod
     def send_email_attach(msg):
-        body_html = "<html><p>This is your ticket</p></html>"
-
-
-        message = EmailMultiAlternatives(
+        # msg['tickets'] holds (qrcode_id, QR payload, ticket name) triples,
+        # the email is composed from the ticket template when the outbox
+        # sends it
+        outbox.queue(
+            recipient=msg['recipient'],
             subject=msg['subject'],
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            to=[msg['recipient']],
+            template='ticket',
+            context=msg['context'],
+            tickets=msg['tickets'],
+            coalesce_key=msg.get('coalesce_key', ''),
         )
-        message.mixed_subtype = 'related'
-        message.attach_alternative(body_html, "text/html")
-        url = TICKET_URL/"{}.png".format(msg['ticket'])
-        message.attach_file('{}'.format(url))
-
-        message.send(fail_silently=False)
 
 
     # GENERATE QRCODE #
 
     @staticmethod
-    def generate_qrcode(data):
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_H,
-            box_size=10,
-            border=4,
-        )
-
-        qr.add_data(data['url'])
-        qr.make(fit=True)
-        
-        img = qr.make_image(fill_color='black', back_color='white').convert('RGB')
-        img.save(TICKET_URL/"{}.png".format(data['ticket']))
-
-
-
+    def generate_qrcode(payload):
+        return qrcodes.render(payload)
 
 
+    @staticmethod
+    def generate_qrcodes(payloads, workers=None):
+        return qrcodes.render_batch(payloads, workers=workers)
@@ -2,6 +2,7 @@
     Base Django Configuration Settings.
 """
 
+import tempfile
 from pathlib import Path
 from decouple import Csv, config
 from django.utils.timezone import timedelta
@@ -45,6 +46,9 @@ INSTALLED_APPS = [
     'core.event',
     'core.order',
     'core.wallet',
+    'core.job',
+    'core.payment',
+    'core.notification',
 ]
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
@@ -113,7 +117,7 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 3,
 
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'core.user.authentication.CachedJWTAuthentication',
     ],
 
     'DEFAULT_PERMISSION_CLASSES': [
@@ -121,6 +125,61 @@ REST_FRAMEWORK = {
     ],
 } 
 
+# Default page size of each cursor paginated list, see api/pagination.py
+API_PAGE_SIZES = {
+    'EVENTS': config("EVENTS_PAGE_SIZE", default=20, cast=int),
+    'PURCHASED_TICKETS': config("PURCHASED_TICKETS_PAGE_SIZE", default=100, cast=int),
+    'TRANSACTIONS': config("TRANSACTIONS_PAGE_SIZE", default=50, cast=int),
+}
+
+
+
+
+# ==============================================================================
+# CACHE SETTINGS
+# ==============================================================================
+
+# Every cache keeps a small in-process LRU in front of the shared backend.
+# Point CACHE_BACKEND at django.core.cache.backends.redis.RedisCache (with a
+# redis:// CACHE_LOCATION) or the database cache to share it across hosts.
+CACHE_BACKEND = config("CACHE_BACKEND", default="django.core.cache.backends.filebased.FileBasedCache")
+CACHE_LOCATION = config("CACHE_LOCATION", default=str(Path(tempfile.gettempdir()) / "tikwey-cache"))
+CACHE_LOCAL_TIMEOUT = config("CACHE_LOCAL_TIMEOUT", default=5, cast=int)
+
+
+def tiered_cache(name, timeout, local_max_entries=1000):
+    location = CACHE_LOCATION
+    if CACHE_BACKEND.endswith('FileBasedCache'):
+        # clear() empties the whole directory, so each cache gets its own
+        location = str(Path(CACHE_LOCATION) / name)
+    return {
+        'BACKEND': 'api.cache.TieredCache',
+        'LOCATION': location,
+        'KEY_PREFIX': name,
+        'TIMEOUT': timeout,
+        'OPTIONS': {
+            'SHARED_BACKEND': CACHE_BACKEND,
+            'LOCAL_TIMEOUT': CACHE_LOCAL_TIMEOUT,
+            'LOCAL_MAX_ENTRIES': local_max_entries,
+        },
+    }
+
+
+CACHES = {
+    'default': tiered_cache('default', 300),
+    # Rendered API responses
+    'api': tiered_cache('api', 300, local_max_entries=5000),
+    # References to resized images, see VERSATILEIMAGEFIELD_SETTINGS
+    'versatileimagefield_cache': tiered_cache('images', 2592000, local_max_entries=10000),
+}
+
+# Seconds each kind of API response stays cached
+API_CACHE_TIMEOUTS = {
+    'EVENT_CATEGORIES': config("CACHE_EVENT_CATEGORIES_TIMEOUT", default=3600, cast=int),
+    'EVENT_LIST': config("CACHE_EVENT_LIST_TIMEOUT", default=60, cast=int),
+    'EVENT_DETAIL': config("CACHE_EVENT_DETAIL_TIMEOUT", default=300, cast=int),
+}
+
 
 
 
@@ -130,7 +189,24 @@ REST_FRAMEWORK = {
 
 AUTH_USER_MODEL = 'user.User'
 
-AUTHENTICATION_BACKENDS = ['django.contrib.auth.backends.AllowAllUsersModelBackend']
+AUTHENTICATION_BACKENDS = ['core.user.backends.ProfileModelBackend']
+
+# The first hasher makes new hashes, the others only verify old ones.
+# Lowering PASSWORD_HASH_ITERATIONS trades brute force resistance for login
+# latency, measure it with the benchmark_login command before changing it
+PASSWORD_HASHERS = [
+    'core.user.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+PASSWORD_HASH_ITERATIONS = config("PASSWORD_HASH_ITERATIONS", default=320000, cast=int)
+
+# Seconds a token's user, profile and wallet stay cached between saves,
+# see core/user/authentication.py
+AUTH_USER_CACHE_TIMEOUT = config("AUTH_USER_CACHE_TIMEOUT", default=60, cast=int)
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -207,8 +283,6 @@ MEDIA_URL = "/media/"
 
 MEDIA_ROOT = BASE_DIR.parent / "media"
 
-TICKET_URL = BASE_DIR.parent / 'media/tickets/'
-
 
 
 
@@ -218,6 +292,22 @@ TICKET_URL = BASE_DIR.parent / 'media/tickets/'
 
 PAYSTACK_SECRET_KEY = config("PAYSTACK_SECRET_KEY", default="local")
 
+PAYSTACK = {
+    'BASE_URL': config("PAYSTACK_BASE_URL", default="https://api.paystack.co"),
+    'CONNECT_TIMEOUT': 3.05,
+    'READ_TIMEOUT': config("PAYSTACK_READ_TIMEOUT", default=10, cast=float),
+    # Extra attempts for calls that are safe to replay
+    'RETRIES': 2,
+    'BACKOFF_SECONDS': 0.2,
+    # Keep-alive connections kept per process
+    'POOL_SIZE': 10,
+    # Consecutive failures that open the circuit, and how long it stays open
+    'BREAKER_THRESHOLD': 5,
+    'BREAKER_RESET_SECONDS': 30,
+    # Charges in another currency are parked for review, never applied
+    'CURRENCY': config("PAYSTACK_CURRENCY", default="NGN"),
+}
+
 
 
 
@@ -379,4 +469,93 @@ DJANGO_ADMIN_HEADER = config("DJANGO_ADMIN_HEADER", default="Django Administrati
 DJANGO_ADMIN_TITLE = config("DJANGO_ADMIN_TITLE", default="Django Administration")
 
 ORGANIZATION_NAME = config("ORGANIZATION_NAME", default="Tikwey")
-COMPANY_NAME = config("COMPANY_NAME", default="Tikwey")
\ No newline at end of file
+COMPANY_NAME = config("COMPANY_NAME", default="Tikwey")
+
+# TICKET RESERVATIONS #
+TICKET_RESERVATION_MINUTES = config("TICKET_RESERVATION_MINUTES", default=15, cast=int)
+
+
+# EVENT SUMMARIES #
+# Seconds stock moves are gathered before the event summary is recomputed
+EVENT_SUMMARY_DELAY = config("EVENT_SUMMARY_DELAY", default=5, cast=int)
+
+
+# TICKET FULFILLMENT #
+# Processes drawing a large batch of QR codes, see api/qrcodes.py
+QRCODE_WORKERS = config("QRCODE_WORKERS", default=4, cast=int)
+# H, Q, M or L, or auto for the strongest level within QRCODE_MAX_VERSION
+QRCODE_ERROR_CORRECTION = config("QRCODE_ERROR_CORRECTION", default="H")
+QRCODE_MAX_VERSION = config("QRCODE_MAX_VERSION", default=5, cast=int)
+# Rendered QR codes kept in memory by each process, see api/qrcodes.py
+QRCODE_CACHE_ENTRIES = config("QRCODE_CACHE_ENTRIES", default=1024, cast=int)
+# How long clients may reuse a QR code image without revalidating
+QRCODE_MAX_AGE = config("QRCODE_MAX_AGE", default=86400, cast=int)
+
+
+# BACKGROUND JOBS #
+JOB_QUEUE = {
+    # Jobs processed in parallel by one run_jobs worker
+    'CONCURRENCY': config("JOB_CONCURRENCY", default=4, cast=int),
+    # Attempts before a job is parked as dead
+    'MAX_ATTEMPTS': config("JOB_MAX_ATTEMPTS", default=5, cast=int),
+    # First retry delay, doubled on every further attempt
+    'BACKOFF_SECONDS': 10,
+    # Idle worker sleep between polls
+    'POLL_SECONDS': 1,
+    # A claimed job belongs to its worker this long, the worker heartbeat
+    # renews it every HEARTBEAT_SECONDS. Jobs whose lease ran out are
+    # assumed lost and requeued
+    'LEASE_SECONDS': config("JOB_LEASE_SECONDS", default=60, cast=int),
+    'HEARTBEAT_SECONDS': config("JOB_HEARTBEAT_SECONDS", default=15, cast=int),
+    # Run jobs in-process right after commit, handy without a worker
+    'EAGER': config("JOB_EAGER", default=False, cast=bool),
+}
+
+
+# TICKET SIGNING #
+# kid:secret pairs, the first signs new tickets and every one verifies. Left
+# empty, tickets are signed with a key derived from SECRET_KEY for this
+# purpose alone, see core/order/tokens.py
+TICKET_SIGNING_KEYS = config("TICKET_SIGNING_KEYS", default="", cast=Csv())
+# Tokens are valid this long before the event starts and after it ends
+TICKET_TOKEN_GRACE_HOURS = config("TICKET_TOKEN_GRACE_HOURS", default=12, cast=int)
+# Migration switch: also admit the bare IDs and URLs printed on tickets issued
+# before tokens. Anyone who has seen such a ticket can copy it, so turn this on
+# only while those tickets are still in circulation
+CHECKIN_ACCEPT_UNSIGNED = config("CHECKIN_ACCEPT_UNSIGNED", default=False, cast=bool)
+
+
+# OFFLINE CHECK-IN #
+# Gate devices verify the bundle signature with this key, so it is provisioned
+# onto every device. Required for offline check-in and never derived from
+# SECRET_KEY, bundles are refused while it is unset
+CHECKIN_BUNDLE_KEY = config("CHECKIN_BUNDLE_KEY", default="")
+CHECKIN_SYNC_MAX_SCANS = config("CHECKIN_SYNC_MAX_SCANS", default=5000, cast=int)
+
+
+# EMAIL OUTBOX #
+EMAIL_OUTBOX = {
+    # Emails claimed by one delivery, all sent over one SMTP connection
+    'BATCH_SIZE': config("EMAIL_OUTBOX_BATCH_SIZE", default=100, cast=int),
+    # Provider quota, emails sent in any one minute
+    'RATE_PER_MINUTE': config("EMAIL_OUTBOX_RATE_PER_MINUTE", default=60, cast=int),
+    # Attempts before an email is parked as dead
+    'MAX_ATTEMPTS': config("EMAIL_OUTBOX_MAX_ATTEMPTS", default=5, cast=int),
+    # First retry delay, doubled on every further attempt
+    'BACKOFF_SECONDS': 30,
+    # How long emails with a coalesce key wait for others to join them
+    'COALESCE_SECONDS': 5,
+    # Claims a delivery stopped renewing for this long are assumed lost and
+    # requeued, it renews them every third of this while it sends
+    'TIMEOUT_SECONDS': 300,
+    # Seconds an SMTP connect or reply may take before the send fails
+    'CONNECTION_TIMEOUT': config("EMAIL_OUTBOX_CONNECTION_TIMEOUT", default=30, cast=int),
+    # Idle sender sleep between polls
+    'POLL_SECONDS': 5,
+}
+
+
+# IDEMPOTENCY KEYS #
+IDEMPOTENCY_KEY_TTL = config("IDEMPOTENCY_KEY_TTL", default=86400, cast=int)
+# Longest a request may run before a retry with its key takes it over
+IDEMPOTENCY_KEY_LEASE = config("IDEMPOTENCY_KEY_LEASE", default=60, cast=int)
@@ -28,4 +28,16 @@ DEBUG_TOOLBAR_PANELS = [
     'debug_toolbar.panels.logging.LoggingPanel',
     'debug_toolbar.panels.redirects.RedirectsPanel',
     'debug_toolbar.panels.profiling.ProfilingPanel',
-]
\ No newline at end of file
+]
+
+
+
+# ==============================================================================
+# CACHE SETTINGS
+# ==============================================================================
+
+# Keep each test run's caches in its own process memory instead of sharing
+# CACHE_LOCATION with the development server and other runs
+for alias, cache in CACHES.items():
+    cache['LOCATION'] = 'tests-{}'.format(alias)
+    cache['OPTIONS']['SHARED_BACKEND'] = 'django.core.cache.backends.locmem.LocMemCache'
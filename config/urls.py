@@ -48,6 +48,7 @@ urlpatterns = [
             path('event/', include('core.event.urls', namespace='event')),
             path('user/wallet/', include('core.wallet.urls', namespace='wallet')),
             path('order/', include('core.order.urls', namespace='order')),
+            path('payment/', include('core.payment.urls', namespace='payment')),
 
             path('token/', jwt_views.TokenObtainPairView.as_view(), name='token_obtain_pair'),
             path('token/refresh/', jwt_views.TokenRefreshView.as_view(), name='token_refresh'),
@@ -12,7 +12,7 @@ from core.event.models import (
 class EventTicketInline(admin.StackedInline):
     model = Ticket
 
-    readonly_fields = ("date_updated",)
+    readonly_fields = ("sold", "reserved", "date_updated",)
     classes = ['collapse']
 
 
@@ -37,12 +37,16 @@ class EventAdmin(admin.ModelAdmin):
         ('Socials', {'fields': (
         'website', 'instagram', 'facebook', 'twitter',
         )}),
+
+        ('Tickets', {'fields': (
+        'min_price', 'max_price', 'tickets_available', 'is_sold_out',
+        )}),
     )
 
     list_display = ('name', 'user', 'event_id', 'event_status', 'publish_status')
     list_filter = ('publish_status', 'is_active')
     search_fields = ['name', 'user']
-    readonly_fields = ['event_id']
+    readonly_fields = ['event_id', 'min_price', 'max_price', 'tickets_available', 'is_sold_out']
     prepopulated_fields = {"slug": ("name",)}
 
     inlines = [EventTicketInline]
@@ -53,7 +57,7 @@ class EventAdmin(admin.ModelAdmin):
 class EventTicketAdmin(admin.ModelAdmin):
     prepopulated_fields = {"slug": ("name",)}
 
-    readonly_fields = ("date_updated",)
+    readonly_fields = ("sold", "reserved", "date_updated",)
 
 
 
@@ -5,3 +5,6 @@ class EventConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core.event'
     verbose_name = "Event Database"
+
+    def ready(self):
+        import core.event.signals
@@ -0,0 +1,65 @@
+'''
+    This file contains the stock engine for event tickets
+
+    Every stock change is a single conditional UPDATE, so concurrent buyers
+    never oversell a limited ticket and no row or table lock is held. The
+    event summary catches up shortly after, see core/event/summaries.py.
+'''
+
+# IMPORTS #
+
+from django.db.models import F, Q
+
+from core.event import summaries
+from core.event.models import Ticket
+
+
+
+
+class InsufficientStock(Exception):
+    pass
+
+
+
+
+# STOCK HELPERS #
+
+def in_stock(quantity):
+    return Q(stock_type='unlimited') | Q(
+        quantity__gte=F('sold') + F('reserved') + quantity
+    )
+
+
+def reserve(ticket, quantity):
+    '''Hold quantity units of the ticket for a pending order'''
+    updated = Ticket.objects.filter(
+        in_stock(quantity), pk=ticket.pk, is_active=True,
+    ).update(reserved=F('reserved') + quantity)
+
+    if not updated:
+        raise InsufficientStock('Not enough {} tickets left'.format(ticket.name))
+    summaries.debounce(ticket.event_id)
+
+
+def release(ticket, quantity):
+    '''Give back units previously held with reserve'''
+    Ticket.objects.filter(
+        pk=ticket.pk, reserved__gte=quantity,
+    ).update(reserved=F('reserved') - quantity)
+    summaries.debounce(ticket.event_id)
+
+
+def sell(ticket, quantity, reserved=False):
+    '''Record a sale, converting held units when reserved is True'''
+    if reserved:
+        updated = Ticket.objects.filter(
+            pk=ticket.pk, reserved__gte=quantity,
+        ).update(reserved=F('reserved') - quantity, sold=F('sold') + quantity)
+    else:
+        updated = Ticket.objects.filter(
+            in_stock(quantity), pk=ticket.pk,
+        ).update(sold=F('sold') + quantity)
+
+    if not updated:
+        raise InsufficientStock('Not enough {} tickets left'.format(ticket.name))
+    summaries.debounce(ticket.event_id)
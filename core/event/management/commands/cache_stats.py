@@ -0,0 +1,37 @@
+'''
+    Reports hit and miss counts of the tiered caches across all processes
+'''
+
+# IMPORTS #
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+
+from api.cache import TieredCache
+
+
+
+
+class Command(BaseCommand):
+    help = 'Show hit/miss metrics for every tiered cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Zero the counters after reporting')
+
+    def handle(self, *args, **options):
+        for alias in settings.CACHES:
+            cache = caches[alias]
+            if not isinstance(cache, TieredCache):
+                continue
+
+            stats = cache.stats()
+            lookups = sum(stats.values())
+            hit_rate = (stats['local_hits'] + stats['shared_hits']) / lookups if lookups else 0
+            self.stdout.write(
+                '{:<28} local hits {:>8}  shared hits {:>8}  misses {:>8}  hit rate {:.1%}'.format(
+                    alias, stats['local_hits'], stats['shared_hits'], stats['misses'], hit_rate,
+                )
+            )
+            if options['reset']:
+                cache.reset_stats()
@@ -0,0 +1,26 @@
+'''
+    Rebuilds the denormalized ticket summary of every event
+'''
+
+# IMPORTS #
+
+from django.core.management.base import BaseCommand
+
+from core.event.models import Event
+from core.event.summaries import refresh
+
+
+
+
+class Command(BaseCommand):
+    help = 'Recompute min/max price and availability for events'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--event', action='append', default=[], help='Slug of an event to refresh, repeatable')
+
+    def handle(self, *args, **options):
+        events = Event.objects.all()
+        if options['event']:
+            events = events.filter(slug__in=options['event'])
+
+        self.stdout.write('Refreshed {} event(s)'.format(refresh(events)))
@@ -0,0 +1,98 @@
+'''
+    Fires parallel purchases against one limited ticket and checks that the
+    stock engine never oversells it
+'''
+
+# IMPORTS #
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, OperationalError
+from django.utils import timezone
+
+from core.event.inventory import InsufficientStock, sell
+from core.event.models import Event, Ticket
+from core.user.models import User
+
+
+
+
+class Command(BaseCommand):
+    help = 'Stress test the ticket stock engine with concurrent purchases'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ticket', type=int, help='Primary key of an existing limited ticket')
+        parser.add_argument('--stock', type=int, default=1000, help='Stock of the throwaway ticket')
+        parser.add_argument('--buyers', type=int, default=5000)
+        parser.add_argument('--workers', type=int, default=32)
+        parser.add_argument('--quantity', type=int, default=1, help='Tickets bought per purchase')
+
+    def handle(self, *args, **options):
+        if options['ticket']:
+            ticket = Ticket.objects.get(pk=options['ticket'], stock_type='limited')
+            owner = None
+        else:
+            ticket, owner = self.create_ticket(options['stock'])
+
+        try:
+            self.run(ticket, options)
+        finally:
+            if owner is not None:
+                owner.delete()
+
+    def create_ticket(self, stock):
+        now = timezone.now()
+        tag = str(int(now.timestamp() * 1000))
+        owner = User.objects.create_user('stress{}@tikwey.local'.format(tag), 'stress' + tag, None)
+        event = Event.objects.create(
+            user=owner, name='Stress ' + tag, description='Inventory stress test',
+            venue='Nowhere', host='Nowhere', start_date=now, end_date=now + timezone.timedelta(days=1),
+        )
+        ticket = Ticket.objects.create(
+            event=event, name='Regular', description='Inventory stress test',
+            stock_type='limited', quantity=stock, sale_end_date=now + timezone.timedelta(days=1),
+        )
+        return ticket, owner
+
+    def run(self, ticket, options):
+        quantity = options['quantity']
+        before = ticket.sold
+
+        def buyer(count):
+            results = []
+            try:
+                for _ in range(count):
+                    try:
+                        sell(ticket, quantity)
+                        results.append('sold')
+                    except InsufficientStock:
+                        results.append('rejected')
+                    except OperationalError:
+                        results.append('error')
+            finally:
+                connection.close()
+            return results
+
+        workers = options['workers']
+        shares = [options['buyers'] // workers + (i < options['buyers'] % workers) for i in range(workers)]
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = [r for share in pool.map(buyer, shares) for r in share]
+        elapsed = time.perf_counter() - start
+
+        ticket.refresh_from_db()
+        sold = results.count('sold')
+
+        self.stdout.write('purchases: {}  sold: {}  rejected: {}  errors: {}'.format(
+            len(results), sold, results.count('rejected'), results.count('error'),
+        ))
+        self.stdout.write('stock: {}  recorded sold: {}  elapsed: {:.2f}s  throughput: {:.0f} purchases/s'.format(
+            ticket.quantity, ticket.sold, elapsed, len(results) / elapsed,
+        ))
+
+        if ticket.sold - before != sold * quantity or ticket.sold + ticket.reserved > ticket.quantity:
+            raise CommandError('Oversell detected')
+        self.stdout.write(self.style.SUCCESS('No oversell'))
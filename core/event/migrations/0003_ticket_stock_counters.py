@@ -0,0 +1,27 @@
+# Generated by Django 4.0.10 on 2026-10-18 19:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('event', '0002_alter_event_event_id_alter_event_event_type'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='reserved',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Quantity held by pending orders', verbose_name='Reserved Quantity'),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='sold',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Sold Quantity'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='ticket',
+            unique_together={('name', 'event')},
+        ),
+    ]
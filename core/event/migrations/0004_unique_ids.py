@@ -0,0 +1,19 @@
+# Generated by Django 4.0.10 on 2026-10-18 20:00
+
+import core.event.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('event', '0003_ticket_stock_counters'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='event',
+            name='event_id',
+            field=models.CharField(default=core.event.models.generate_event_id, editable=False, max_length=25, unique=True, verbose_name='Event UUID'),
+        ),
+    ]
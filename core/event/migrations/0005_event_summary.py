@@ -0,0 +1,42 @@
+# Generated by Django 4.0.10 on 2026-10-18 20:01
+
+from django.db import migrations, models
+
+
+def backfill_summaries(apps, schema_editor):
+    from core.event.summaries import summary_fields
+
+    Event = apps.get_model('event', 'Event')
+    Ticket = apps.get_model('event', 'Ticket')
+    Event.objects.update(**summary_fields(Ticket))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('event', '0004_unique_ids'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='is_sold_out',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Sold Out'),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='max_price',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=10, null=True, verbose_name='Highest Ticket Price'),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='min_price',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=10, null=True, verbose_name='Lowest Ticket Price'),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='tickets_available',
+            field=models.PositiveIntegerField(blank=True, editable=False, help_text='Empty when an unlimited ticket is on sale', null=True, verbose_name='Tickets Available'),
+        ),
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.0.10 on 2026-10-18 20:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('event', '0005_event_summary'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='event',
+            name='date_updated',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AlterField(
+            model_name='ticket',
+            name='date_updated',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
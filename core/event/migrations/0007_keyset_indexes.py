@@ -0,0 +1,17 @@
+# Generated by Django 4.0.10 on 2026-10-18 20:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('event', '0006_date_updated_auto_now'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['start_date', 'id'], name='event_event_start_d_35b2ec_idx'),
+        ),
+    ]
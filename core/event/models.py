@@ -16,6 +16,7 @@ from versatileimagefield.fields import VersatileImageField
 from ckeditor_uploader.fields import RichTextUploadingField
 
 from core.user.models import User
+from api.ids import generate_id
 from api.utils import Util
 
 
@@ -24,16 +25,7 @@ from api.utils import Util
 # MODEL FUNCTIONS #
 
 def generate_event_id():
-    code = str(uuid.uuid4()).split("-")[-1] #generate unique event id
-
-    try:
-        qs_exists = Event.objects.filter(event_id=code).exists()
-        if qs_exists:
-            return generate_event_id()
-        else:
-            return code
-    except:
-        return code
+    return generate_id()
 
 
 
@@ -83,16 +75,41 @@ class EventCategory(models.Model):
 
 # EVENT MODEL #
 
+class EventQuerySet(models.QuerySet):
+
+    # Columns the event list renders, the rich text description stays behind
+    LISTING_FIELDS = (
+        'slug', 'name', 'event_type', 'image', 'venue', 'start_date', 'min_price',
+    )
+
+    def published(self):
+        return self.filter(is_active=True, publish_status=True)
+
+    def upcoming(self):
+        return self.published().exclude(end_date__lt=timezone.now())
+
+    def for_listing(self):
+        return self.only(*self.LISTING_FIELDS)
+
+    def with_price_range(self):
+        '''Live ticket price range, for callers that cannot use the summary columns'''
+        active = models.Q(tickets__is_active=True)
+        return self.annotate(
+            lowest_price=models.Min('tickets__price', filter=active),
+            highest_price=models.Max('tickets__price', filter=active),
+        )
+
+    def for_detail(self):
+        return self.select_related('category').prefetch_related('tickets')
+
+
+
+
 class Event(models.Model):
 
-    class EventManager(models.Manager):
+    class EventManager(models.Manager.from_queryset(EventQuerySet)):
         def get_queryset(self):
             return super().get_queryset().filter(is_active=True)
-        def published(self):
-            return super().get_queryset().filter(is_active=True, publish_status=True)
-        def upcoming(self):
-            return super().get_queryset().filter(
-                is_active=True, publish_status=True).exclude(end_date__lt=timezone.now())
 
     # CHOICES
     event_type_choices = (
@@ -132,8 +149,8 @@ class Event(models.Model):
     )
 
     event_id = models.CharField(
-        db_index=True,
-        max_length=15,
+        unique=True,
+        max_length=25,
         blank=False,
         null=False,
         default=generate_event_id,
@@ -235,15 +252,47 @@ class Event(models.Model):
         help_text='Optional',
     )
 
+    min_price = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name='Lowest Ticket Price',
+    )
+
+    max_price = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name='Highest Ticket Price',
+    )
+
+    tickets_available = models.PositiveIntegerField(
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name='Tickets Available',
+        help_text='Empty when an unlimited ticket is on sale',
+    )
+
+    is_sold_out = models.BooleanField(
+        default=False,
+        editable=False,
+        verbose_name='Sold Out',
+    )
+
     date_created = models.DateTimeField(
         auto_now_add=True,
     )
 
     date_updated = models.DateTimeField(
-        default=timezone.now,
+        auto_now=True,
     )
 
-    objects = models.Manager()
+    objects = EventQuerySet.as_manager()
     events = EventManager()
 
 
@@ -251,6 +300,9 @@ class Event(models.Model):
         verbose_name = "Event"
         verbose_name_plural = "Events"
         ordering = ['-date_created']
+        indexes = [
+            models.Index(fields=['start_date', 'id']),
+        ]
 
     def __str__(self):
         return self.name
@@ -376,6 +428,19 @@ class Ticket(models.Model):
         verbose_name='Stock Quantity',
     )
 
+    sold = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Sold Quantity',
+    )
+
+    reserved = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Reserved Quantity',
+        help_text='Quantity held by pending orders',
+    )
+
     price = models.DecimalField(
         default=0.00,
         blank=False,
@@ -421,7 +486,7 @@ class Ticket(models.Model):
     )
 
     date_updated = models.DateTimeField(
-        default=timezone.now,
+        auto_now=True,
     )
 
     class Meta:
@@ -433,6 +498,12 @@ class Ticket(models.Model):
     def get_ticket_price(self):
         return self.price
 
+    @property
+    def available(self):
+        if self.stock_type == 'unlimited':
+            return None
+        return max((self.quantity or 0) - self.sold - self.reserved, 0)
+
     def clean(self):
         if self.sale_start_date > self.sale_end_date:
             raise ValidationError("The start time for the ticket sale cannot be greater than the end time, Kindly verify")
@@ -0,0 +1,62 @@
+'''
+    This file keeps the event ticket summary and the cached event responses
+    in sync with event, ticket and category changes
+'''
+
+# IMPORTS #
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from api.cache import invalidate
+from core.event import summaries
+from core.event.models import Event, EventCategory, Ticket
+
+
+
+
+def invalidate_events(*slugs):
+    '''Drop the event list pages and the detail of each slug once the transaction commits'''
+    def run():
+        invalidate('events')
+        for slug in slugs:
+            invalidate('event:{}'.format(slug))
+    transaction.on_commit(run)
+
+
+
+
+@receiver(post_save, sender=Ticket)
+@receiver(post_delete, sender=Ticket)
+def refresh_event_summary(sender, instance, **kwargs):
+    # The refresh also drops the event's cached responses
+    summaries.schedule(pk=instance.event_id)
+
+
+@receiver(pre_save, sender=Event)
+def remember_event_slug(sender, instance, **kwargs):
+    if instance.pk:
+        instance._saved_slug = Event.objects.filter(pk=instance.pk).values_list('slug', flat=True).first()
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def invalidate_event(sender, instance, **kwargs):
+    invalidate_events(*{instance.slug, getattr(instance, '_saved_slug', None)} - {None})
+
+
+@receiver(pre_delete, sender=EventCategory)
+def remember_category_events(sender, instance, **kwargs):
+    # The events lose their category before post_delete fires
+    instance._event_slugs = list(instance.event_set.values_list('slug', flat=True))
+
+
+@receiver(post_save, sender=EventCategory)
+@receiver(post_delete, sender=EventCategory)
+def invalidate_category(sender, instance, **kwargs):
+    slugs = getattr(instance, '_event_slugs', None)
+    if slugs is None:
+        slugs = instance.event_set.values_list('slug', flat=True)
+    transaction.on_commit(lambda: invalidate('event-categories'))
+    invalidate_events(*slugs)
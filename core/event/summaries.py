@@ -0,0 +1,92 @@
+'''
+    This file keeps the denormalized ticket summary on each Event
+
+    min_price, max_price, tickets_available and is_sold_out let the event
+    listing read prices and availability straight off the event rows. They
+    are recomputed from the active tickets with one UPDATE whenever tickets
+    are saved, and the refresh_event_summaries management command rebuilds
+    them all.
+
+    Stock moves on every reservation and sale, so recomputing on each one
+    would make the event row the hottest in the database. Those moves only
+    queue a refresh job instead, delayed by EVENT_SUMMARY_DELAY, and any move
+    while that job still waits rides along with it. The job queue's dedupe
+    key makes that one INSERT that is ignored when a refresh already waits.
+    A refresh recomputes everything from the tickets, so an extra one, say
+    after a retry gave its key up, only costs an UPDATE.
+'''
+
+# IMPORTS #
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import (
+    BooleanField, Case, Exists, F, IntegerField, Max, Min, OuterRef, Q, Subquery, Sum, Value, When,
+)
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from api.cache import invalidate
+from core.event.models import Event, Ticket
+from core.job.queue import enqueue
+
+
+REFRESH_TASK = 'core.event.tasks.refresh_event_summary'
+
+
+
+
+def summary_fields(ticket_model=Ticket):
+    '''Expressions computing each summary column from the event's active tickets'''
+    tickets = ticket_model.objects.filter(event=OuterRef('pk'), is_active=True).order_by()
+    per_event = tickets.values('event')
+    unlimited = tickets.filter(stock_type='unlimited')
+    left = Greatest(Coalesce('quantity', 0) - F('sold') - F('reserved'), 0)
+
+    return {
+        'min_price': Subquery(per_event.annotate(value=Min('price')).values('value')),
+        'max_price': Subquery(per_event.annotate(value=Max('price')).values('value')),
+        'tickets_available': Case(
+            When(Exists(unlimited), then=Value(None)),
+            default=Coalesce(
+                Subquery(per_event.annotate(value=Sum(left)).values('value')), 0,
+            ),
+            output_field=IntegerField(),
+        ),
+        'is_sold_out': Case(
+            When(
+                Q(Exists(tickets)) & ~Q(Exists(tickets.filter(
+                    Q(stock_type='unlimited') | Q(quantity__gt=F('sold') + F('reserved'))
+                ))),
+                then=Value(True),
+            ),
+            default=Value(False),
+            output_field=BooleanField(),
+        ),
+    }
+
+
+def refresh(events):
+    '''Recompute the summary of every event in the queryset, returns the rows updated'''
+    slugs = list(events.values_list('slug', flat=True))
+    updated = events.update(**summary_fields(), date_updated=timezone.now())
+
+    def drop_cached():
+        invalidate('events')
+        for slug in slugs:
+            invalidate('event:{}'.format(slug))
+    transaction.on_commit(drop_cached)
+    return updated
+
+
+def schedule(**lookup):
+    '''Refresh the events matching lookup once the current transaction commits'''
+    transaction.on_commit(lambda: refresh(Event.objects.filter(**lookup)))
+
+
+def debounce(event_id):
+    '''Refresh the event's summary soon, unless a refresh is already waiting'''
+    enqueue(
+        REFRESH_TASK, delay=settings.EVENT_SUMMARY_DELAY,
+        dedupe_key='event-summary:{}'.format(event_id), event_id=event_id,
+    )
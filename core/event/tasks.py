@@ -0,0 +1,12 @@
+# IMPORTS #
+
+from core.event import summaries
+from core.event.models import Event
+from core.job.queue import task
+
+
+
+
+@task
+def refresh_event_summary(event_id):
+    summaries.refresh(Event.objects.filter(pk=event_id))
@@ -1,3 +1,323 @@
-from django.test import TestCase
+# IMPORTS #
 
-# Create your tests here.
+import base64
+import json
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+
+from api.cache import TieredCache, get_cache, invalidate, make_key
+from core.event import inventory, summaries
+from core.event.models import Event, EventCategory, Ticket
+from core.job import queue
+from core.job.models import Job
+from core.user.models import User
+
+
+
+
+def create_event(name='Test Show', owner=None):
+    now = timezone.now()
+    slug = name.lower().replace(' ', '_')
+    owner = owner or User.objects.create_user('{}@tikwey.local'.format(slug), slug, None)
+    return Event.objects.create(
+        user=owner, name=name, description='Test event', venue='Main Hall', host='Main Hall',
+        start_date=now + timezone.timedelta(days=1), end_date=now + timezone.timedelta(days=2),
+        is_active=True, publish_status=True,
+    )
+
+
+def create_ticket(event=None, name='Regular', stock=10, price=0):
+    return Ticket.objects.create(
+        event=event or create_event(), name=name, description='Test ticket', stock_type='limited',
+        quantity=stock, price=price, sale_end_date=timezone.now() + timezone.timedelta(days=1),
+    )
+
+
+
+
+# STOCK ENGINE #
+
+class ConcurrentReserveTests(TransactionTestCase):
+
+    def test_concurrent_reserves_never_oversell(self):
+        ticket = create_ticket(stock=10)
+
+        def buyer(_):
+            try:
+                for attempt in range(20):
+                    try:
+                        inventory.reserve(ticket, 1)
+                        return 'held'
+                    except inventory.InsufficientStock:
+                        return 'rejected'
+                    except OperationalError:
+                        # SQLite refuses concurrent writers instead of queueing them
+                        continue
+                return 'error'
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(buyer, range(30)))
+
+        ticket.refresh_from_db()
+        self.assertEqual(results.count('held'), ticket.reserved)
+        self.assertLessEqual(ticket.reserved, ticket.quantity)
+        self.assertEqual(results.count('held'), 10)
+
+    def test_sell_rejects_past_stock(self):
+        ticket = create_ticket(stock=2)
+        inventory.reserve(ticket, 1)
+        inventory.sell(ticket, 1)
+
+        with self.assertRaises(inventory.InsufficientStock):
+            inventory.sell(ticket, 1)
+
+        ticket.refresh_from_db()
+        self.assertEqual((ticket.sold, ticket.reserved), (1, 1))
+
+
+
+
+# EVENT SUMMARIES #
+
+class SummaryTests(TestCase):
+
+    def test_stock_moves_share_one_refresh(self):
+        ticket = create_ticket(stock=10)
+        for _ in range(3):
+            inventory.reserve(ticket, 2)
+        inventory.sell(ticket, 1, reserved=True)
+
+        job = Job.objects.get(name=summaries.REFRESH_TASK)
+        self.assertEqual(job.payload, {'event_id': ticket.event_id})
+        queue.run(job.pk)
+
+        ticket.event.refresh_from_db()
+        self.assertEqual(ticket.event.tickets_available, 4)
+
+    def test_refresh_drops_cached_event_responses(self):
+        event = create_event()
+        before = make_key('events'), make_key('event:{}'.format(event.slug))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            summaries.refresh(Event.objects.filter(pk=event.pk))
+
+        after = make_key('events'), make_key('event:{}'.format(event.slug))
+        self.assertNotEqual(before[0], after[0])
+        self.assertNotEqual(before[1], after[1])
+
+
+
+
+# EVENT LIST #
+
+class MediaTestCase(TestCase):
+    '''
+    Serves media from a temporary MEDIA_ROOT holding the default event cover,
+    so image renditions are built for real instead of relying on references
+    left in a shared cache by an earlier run
+    '''
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.media_root = tempfile.mkdtemp()
+        cls.media_settings = override_settings(MEDIA_ROOT=cls.media_root)
+        cls.media_settings.enable()
+        covers = Path(cls.media_root) / 'events' / 'cover'
+        covers.mkdir(parents=True)
+        Image.new('RGB', (16, 9)).save(covers / 'default.jpg')
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.media_settings.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+        super().tearDownClass()
+
+
+class EventListQueryTests(MediaTestCase):
+
+    def setUp(self):
+        get_cache().clear()
+        for i in range(5):
+            create_ticket(create_event('Show {}'.format(i)), price=1000 + i)
+
+    def test_page_runs_two_queries_whatever_its_size(self):
+        # One for the conditional GET validators, one for the page itself
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/event/', HTTP_HOST='localhost')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 5)
+
+    def test_page_leaves_long_columns_behind(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/event/', HTTP_HOST='localhost')
+
+        page = queries.captured_queries[-1]['sql']
+        self.assertNotIn('"description"', page)
+        self.assertIn('"min_price"', page)
+
+
+class EventListCursorTests(MediaTestCase):
+
+    def setUp(self):
+        get_cache().clear()
+        start = timezone.now() + timezone.timedelta(days=1)
+        self.events = [create_event('Show {}'.format(i)) for i in range(5)]
+        # Two events share a start date so the primary key breaks the tie
+        for i, event in enumerate(self.events):
+            event.start_date = start + timezone.timedelta(hours=min(i, 3))
+            event.save()
+
+    def get(self, url='/api/event/', **params):
+        response = self.client.get(url, params, HTTP_HOST='localhost')
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def cursor(self, position, reverse=False):
+        return base64.urlsafe_b64encode(json.dumps({'p': position, 'r': reverse}).encode()).decode()
+
+    def test_cursors_walk_forwards_and_back(self):
+        pages = [self.get(page_size=2)]
+        while pages[-1]['next']:
+            pages.append(self.get(pages[-1]['next']))
+
+        names = [event['name'] for page in pages for event in page['results']]
+        self.assertEqual(names, [event.name for event in self.events])
+        self.assertIsNone(pages[0]['previous'])
+
+        back = self.get(pages[-1]['previous'])
+        self.assertEqual(back['results'], pages[-2]['results'])
+
+    def test_malformed_cursors_are_not_found(self):
+        for cursor in ('nope', self.cursor(['2026-01-01T00:00:00+00:00']),
+                       self.cursor(['not a date', 1]), self.cursor([{}, 1]), self.cursor([None, 1]),
+                       self.cursor(['2026-01-01T00:00:00+00:00', 'one'])):
+            response = self.client.get('/api/event/', {'cursor': cursor}, HTTP_HOST='localhost')
+            self.assertEqual(response.status_code, 404, cursor)
+
+
+
+class EventDetailETagTests(MediaTestCase):
+
+    def setUp(self):
+        get_cache().clear()
+        self.event = create_event()
+        self.event.category = EventCategory.objects.create(name='Music', slug='music')
+        self.event.save()
+        self.url = '/api/event/{}/'.format(self.event.slug)
+
+    def get(self, **headers):
+        return self.client.get(self.url, HTTP_HOST='localhost', **headers)
+
+    def test_matching_etag_is_not_modified(self):
+        first = self.get()
+        self.assertEqual(first.status_code, 200)
+
+        with self.assertNumQueries(0):
+            response = self.get(HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['ETag'], first['ETag'])
+
+    def test_change_serves_a_new_body(self):
+        first = self.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.event.name = 'Renamed Show'
+            self.event.save()
+
+        response = self.get(HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], first['ETag'])
+        self.assertEqual(json.loads(response.content)['name'], 'Renamed Show')
+
+
+
+
+# CACHE #
+
+def tiered(**options):
+    return TieredCache('tiered-tests', {'OPTIONS': {
+        'SHARED_BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCAL_TIMEOUT': 5, **options,
+    }})
+
+
+class TieredCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        self.cache = tiered(STATS_FLUSH_EVERY=1000)
+        self.cache.clear()
+        self.cache.reset_stats()
+
+    def test_local_copy_expires(self):
+        with mock.patch('api.cache.time.monotonic', return_value=100):
+            self.cache.set('k', 'first')
+        self.cache.shared.set('k', 'second')
+
+        with mock.patch('api.cache.time.monotonic', return_value=104):
+            self.assertEqual(self.cache.get('k'), 'first')
+        with mock.patch('api.cache.time.monotonic', return_value=106):
+            self.assertEqual(self.cache.get('k'), 'second')
+
+    def test_miss_falls_through_to_the_shared_tier(self):
+        other = tiered()
+        other.set('k', 'value')
+
+        self.assertEqual(self.cache.get('k'), 'value')
+        other.shared.delete('k')
+        self.assertEqual(self.cache.get('k'), 'value')
+        self.assertIsNone(self.cache.get('missing'))
+        self.assertEqual(self.cache.stats(), {'local_hits': 1, 'shared_hits': 1, 'misses': 1})
+
+    @override_settings(CACHES={'tiered': {
+        'BACKEND': 'api.cache.TieredCache', 'LOCATION': 'tiered-tests',
+        'OPTIONS': {'SHARED_BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    }})
+    def test_cache_stats_reports_every_tier(self):
+        cache = caches['tiered']
+        cache.set('k', 'value')
+        cache.get('k')
+        cache.get('missing')
+        stdout = StringIO()
+
+        call_command('cache_stats', '--reset', stdout=stdout)
+
+        self.assertIn('local hits        1', stdout.getvalue())
+        self.assertIn('hit rate 50.0%', stdout.getvalue())
+        self.assertEqual(cache.stats(), {'local_hits': 0, 'shared_hits': 0, 'misses': 0})
+
+
+class GenerationTests(SimpleTestCase):
+
+    def setUp(self):
+        get_cache().clear()
+
+    def test_invalidate_moves_to_a_new_generation(self):
+        before = make_key('events', 'page')
+        self.assertEqual(make_key('events', 'page'), before)
+
+        invalidate('events')
+        self.assertNotEqual(make_key('events', 'page'), before)
+
+    def test_lost_generation_never_comes_back(self):
+        seen = {make_key('events', 'page')}
+        invalidate('events')
+        seen.add(make_key('events', 'page'))
+
+        # As if the shared backend culled the counter
+        get_cache().delete('generation:events')
+        self.assertNotIn(make_key('events', 'page'), seen)
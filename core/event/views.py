@@ -1,5 +1,10 @@
 # IMPORTS #
 
+import hashlib
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags, quote_etag
 from rest_framework import status
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -8,6 +13,7 @@ from rest_framework.generics import (
     RetrieveUpdateDestroyAPIView, GenericAPIView,
 )
 from rest_framework.permissions import (
+    SAFE_METHODS,
     IsAuthenticatedOrReadOnly,
     AllowAny
 )
@@ -15,7 +21,11 @@ from rest_framework.parsers import (
     MultiPartParser, FormParser,
     FileUploadParser, JSONParser,
 )
+from rest_framework.renderers import JSONRenderer
 
+from api.cache import make_key, remember
+from api.mixins import ConditionalGetMixin
+from api.pagination import EventPagination
 from api.serializers.event_serializers import (
     EventCategorySerializer, 
     EventCreateSerializer, 
@@ -41,7 +51,12 @@ class EventCategoryListAPIView(ListAPIView):
 
     # GET
     def get(self, request, *args, **kwargs):
-        return self.list(request, *args, **kwargs)
+        data = remember(
+            make_key('event-categories', request.get_host()),
+            lambda: self.list(request, *args, **kwargs).data,
+            settings.API_CACHE_TIMEOUTS['EVENT_CATEGORIES'],
+        )
+        return Response(data)
 
 
 event_category_list_view = EventCategoryListAPIView.as_view()
@@ -51,11 +66,15 @@ event_category_list_view = EventCategoryListAPIView.as_view()
 
 # EVENT LIST OR CREATE VIEW #
 
-class EventMainAPIView(ListCreateAPIView):
+class EventMainAPIView(ConditionalGetMixin, ListCreateAPIView):
     queryset = Event.events.upcoming()
     serializer_class = EventCreateSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
     parser_classes = [MultiPartParser, FormParser, JSONParser]
+    pagination_class = EventPagination
+
+    def get_queryset(self):
+        return Event.events.upcoming().for_listing()
 
     def get_serializer_class(self):
         if self.request.method == 'GET':
@@ -64,7 +83,12 @@ class EventMainAPIView(ListCreateAPIView):
 
     # GET
     def get(self, request, *args, **kwargs):
-        return self.list(request, *args, **kwargs)
+        data = remember(
+            make_key('events', 'list', request.get_host(), request.GET.urlencode()),
+            lambda: self.list(request, *args, **kwargs).data,
+            settings.API_CACHE_TIMEOUTS['EVENT_LIST'],
+        )
+        return Response(data)
 
     # POST
     def post(self, request, *args, **kwargs):
@@ -95,8 +119,34 @@ class EventDetailAPIView(RetrieveUpdateDestroyAPIView):
     lookup_field = 'slug'
 
     def get_queryset(self):
-        return self.queryset.filter(publish_status=True)
-    
+        return Event.events.upcoming().for_detail()
+
+    def perform_authentication(self, request):
+        # Reads are public, so a cached hit never needs the user row
+        if request.method not in SAFE_METHODS:
+            super().perform_authentication(request)
+
+    # GET
+    def get(self, request, *args, **kwargs):
+        etag, body = remember(
+            make_key('event:{}'.format(kwargs['slug']), 'detail', request.get_host()),
+            lambda: self.render_detail(request, *args, **kwargs),
+            settings.API_CACHE_TIMEOUTS['EVENT_DETAIL'],
+        )
+
+        if_none_match = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+        if etag in if_none_match or '*' in if_none_match:
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(body, content_type='application/json')
+        response['ETag'] = etag
+        return response
+
+    def render_detail(self, request, *args, **kwargs):
+        '''Serialize the event once into the JSON body served from the cache'''
+        body = JSONRenderer().render(self.retrieve(request, *args, **kwargs).data)
+        return quote_etag(hashlib.md5(body).hexdigest()), body
+
 
 
 event_detail_view = EventDetailAPIView.as_view()
\ No newline at end of file
@@ -0,0 +1,24 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from core.job.models import Job
+
+
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('name', 'status', 'attempts', 'run_at', 'lease_expires_at', 'date_updated')
+    list_filter = ('status', 'name')
+    readonly_fields = ('attempts', 'last_error', 'worker', 'lease_expires_at', 'date_created', 'date_updated')
+    actions = ['requeue']
+
+    @admin.action(description='Requeue selected jobs')
+    def requeue(self, request, queryset):
+        queryset.exclude(status='running').update(
+            status='queued', attempts=0, run_at=timezone.now(), date_updated=timezone.now(),
+        )
+
+
+
+
+admin.site.register(Job, JobAdmin)
@@ -0,0 +1,63 @@
+'''
+    Runs the background job worker
+'''
+
+# IMPORTS #
+
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from core.job.queue import claim, heartbeat, requeue_stale, run
+
+
+
+
+class Command(BaseCommand):
+    help = 'Process queued background jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=settings.JOB_QUEUE['CONCURRENCY'])
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is drained')
+
+    def handle(self, *args, **options):
+        concurrency = options['concurrency']
+        worker = uuid.uuid4().hex
+        requeue_stale()
+
+        stop = threading.Event()
+        beat = threading.Thread(target=self.beat, args=(worker, stop), daemon=True)
+        beat.start()
+        try:
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                while True:
+                    claimed = claim(concurrency, worker)
+                    if claimed:
+                        list(pool.map(self.process, claimed))
+                        continue
+
+                    if options['once']:
+                        break
+                    time.sleep(settings.JOB_QUEUE['POLL_SECONDS'])
+                    requeue_stale()
+        finally:
+            stop.set()
+
+    def beat(self, worker, stop):
+        '''Keep the leases of this worker's running jobs from running out'''
+        try:
+            while not stop.wait(settings.JOB_QUEUE['HEARTBEAT_SECONDS']):
+                heartbeat(worker)
+        finally:
+            connection.close()
+
+    def process(self, pk):
+        try:
+            run(pk)
+        finally:
+            connection.close()
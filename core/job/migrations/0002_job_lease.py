@@ -0,0 +1,23 @@
+# Generated by Django 4.0.10 on 2026-10-18 20:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='lease_expires_at',
+            field=models.DateTimeField(blank=True, help_text='The worker heartbeat extends this while the job runs', null=True, verbose_name='Lease expires at'),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='worker',
+            field=models.CharField(blank=True, max_length=32, verbose_name='Claimed by'),
+        ),
+    ]
@@ -0,0 +1,101 @@
+'''
+    This model contains the Job Model backing the background job queue
+'''
+
+# IMPORTS #
+
+from django.db import models
+from django.utils import timezone
+
+
+
+
+# JOB MODEL #
+
+class Job(models.Model):
+
+    status_choices = (
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('dead', 'Dead'),
+    )
+
+    name = models.CharField(
+        max_length=100,
+        verbose_name='Task name',
+    )
+
+    payload = models.JSONField(
+        default=dict,
+        blank=True,
+    )
+
+    status = models.CharField(
+        max_length=10,
+        choices=status_choices,
+        default='queued',
+        verbose_name='Job Status',
+    )
+
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+    )
+
+    max_attempts = models.PositiveSmallIntegerField(
+        default=5,
+    )
+
+    run_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Run after',
+    )
+
+    last_error = models.TextField(
+        blank=True,
+    )
+
+    worker = models.CharField(
+        max_length=32,
+        blank=True,
+        verbose_name='Claimed by',
+    )
+
+    dedupe_key = models.CharField(
+        max_length=100,
+        blank=True,
+        help_text='At most one queued job holds a given key',
+    )
+
+    lease_expires_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Lease expires at',
+        help_text='The worker heartbeat extends this while the job runs',
+    )
+
+    date_created = models.DateTimeField(
+        auto_now_add=True,
+    )
+
+    date_updated = models.DateTimeField(
+        default=timezone.now,
+    )
+
+    class Meta:
+        verbose_name = "Job"
+        verbose_name_plural = "Jobs"
+        ordering = ['run_at']
+        indexes = [
+            models.Index(fields=['status', 'run_at']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dedupe_key'],
+                condition=models.Q(status='queued') & ~models.Q(dedupe_key=''),
+                name='unique_queued_dedupe_key',
+            ),
+        ]
+
+    def __str__(self):
+        return "{} - {}({})".format(self.pk, self.name, self.status)
@@ -0,0 +1,156 @@
+'''
+    This file contains the background job queue
+
+    Jobs are rows in the Job table, so enqueueing inside a transaction only
+    publishes the job when that transaction commits. Workers started with the
+    run_jobs management command claim rows with conditional updates, retry
+    failures with exponential backoff and park exhausted jobs as dead.
+
+    A claim is a lease: the worker's heartbeat keeps extending it while the
+    job runs, and only a job whose lease ran out, because its worker died,
+    is handed back to the queue. Outcomes are recorded only by the worker
+    that still holds the claim.
+
+    A job enqueued with a dedupe_key is dropped while another queued job
+    holds the same key. A unique index on queued keys settles concurrent
+    enqueues, so it costs one INSERT and no lookup. Retried and requeued
+    jobs give their key up rather than collide with a newer one.
+'''
+
+# IMPORTS #
+
+import logging
+import random
+import traceback
+import uuid
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from core.job.models import Job
+
+
+logger = logging.getLogger(__name__)
+
+registry = {}
+
+
+
+
+# TASK REGISTRATION #
+
+def task(func):
+    '''Register func as a job and give it an enqueue(**kwargs) shortcut'''
+    name = '{}.{}'.format(func.__module__, func.__name__)
+    registry[name] = func
+    func.enqueue = lambda **kwargs: enqueue(name, **kwargs)
+    return func
+
+
+def enqueue(name, delay=0, dedupe_key='', **kwargs):
+    '''Queue a job and return it, or None with a dedupe_key since it may have been dropped'''
+    if name not in registry:
+        raise KeyError('Unknown task {}'.format(name))
+
+    job = Job(
+        name=name,
+        payload=kwargs,
+        max_attempts=settings.JOB_QUEUE['MAX_ATTEMPTS'],
+        run_at=timezone.now() + timezone.timedelta(seconds=delay),
+        dedupe_key=dedupe_key,
+    )
+
+    if not dedupe_key:
+        job.save()
+        if settings.JOB_QUEUE['EAGER']:
+            transaction.on_commit(lambda: run(job.pk))
+        return job
+
+    Job.objects.bulk_create([job], ignore_conflicts=True)
+    if settings.JOB_QUEUE['EAGER']:
+        def run_queued():
+            for pk in Job.objects.filter(dedupe_key=dedupe_key, status='queued').values_list('pk', flat=True):
+                run(pk)
+        transaction.on_commit(run_queued)
+    return None
+
+
+
+
+# WORKER HELPERS #
+
+def lease(now=None):
+    return (now or timezone.now()) + timezone.timedelta(seconds=settings.JOB_QUEUE['LEASE_SECONDS'])
+
+
+def claim(limit, worker):
+    '''Mark up to limit due jobs as running for worker and return their primary keys'''
+    now = timezone.now()
+    due = Job.objects.filter(
+        status='queued', run_at__lte=now,
+    ).values_list('pk', flat=True)[:limit]
+
+    return [
+        pk for pk in due
+        if Job.objects.filter(pk=pk, status='queued').update(
+            status='running', worker=worker, lease_expires_at=lease(now),
+            attempts=F('attempts') + 1, date_updated=now)
+    ]
+
+
+def heartbeat(worker):
+    '''Extend the lease of every job the worker is running'''
+    return Job.objects.filter(status='running', worker=worker).update(lease_expires_at=lease())
+
+
+def run(pk):
+    '''Execute a claimed job, scheduling a retry or parking it on failure'''
+    job = Job.objects.get(pk=pk)
+    if job.status == 'queued':
+        # Eager jobs skip the worker claim
+        if not Job.objects.filter(pk=pk, status='queued').update(
+                status='running', worker=uuid.uuid4().hex, lease_expires_at=lease(),
+                attempts=F('attempts') + 1):
+            return
+        job.refresh_from_db()
+
+    try:
+        registry[job.name](**job.payload)
+    except Exception:
+        logger.exception('Job %s (%s) failed', job.pk, job.name)
+        fail(job, traceback.format_exc())
+    else:
+        owned(job).update(status='done', lease_expires_at=None, date_updated=timezone.now())
+
+
+def owned(job):
+    '''The job row, as long as the worker that ran it still holds the claim'''
+    return Job.objects.filter(pk=job.pk, status='running', worker=job.worker)
+
+
+def fail(job, error):
+    now = timezone.now()
+    if job.attempts >= job.max_attempts:
+        owned(job).update(status='dead', last_error=error, lease_expires_at=None, date_updated=now)
+        return
+
+    backoff = settings.JOB_QUEUE['BACKOFF_SECONDS'] * 2 ** (job.attempts - 1)
+    owned(job).update(
+        status='queued',
+        worker='',
+        dedupe_key='',
+        lease_expires_at=None,
+        last_error=error,
+        run_at=now + timezone.timedelta(seconds=backoff * random.uniform(0.5, 1.5)),
+        date_updated=now,
+    )
+
+
+def requeue_stale():
+    '''Hand jobs whose worker stopped renewing the lease back to the queue'''
+    now = timezone.now()
+    return Job.objects.filter(
+        Q(lease_expires_at__lt=now) | Q(lease_expires_at__isnull=True), status='running',
+    ).update(status='queued', worker='', dedupe_key='', lease_expires_at=None, date_updated=now)
@@ -0,0 +1,11 @@
+# IMPORTS #
+
+from api.utils import Util
+from core.job.queue import task
+
+
+
+
+@task
+def send_email(data):
+    Util.send_email(data)
@@ -0,0 +1,105 @@
+# IMPORTS #
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.job import queue
+from core.job.models import Job
+
+
+
+
+calls = []
+
+
+@queue.task
+def record(value):
+    calls.append(value)
+
+
+
+
+# LEASES #
+
+@override_settings(JOB_QUEUE={
+    'CONCURRENCY': 1, 'MAX_ATTEMPTS': 3, 'BACKOFF_SECONDS': 10, 'POLL_SECONDS': 1,
+    'LEASE_SECONDS': 60, 'HEARTBEAT_SECONDS': 15, 'EAGER': False,
+})
+class LeaseTests(TestCase):
+
+    def setUp(self):
+        calls.clear()
+        self.job = queue.enqueue('core.job.tests.record', value=1)
+
+    def test_running_job_with_a_live_lease_is_not_requeued(self):
+        self.assertEqual(queue.claim(1, 'worker-a'), [self.job.pk])
+        Job.objects.filter(pk=self.job.pk).update(date_updated=timezone.now() - timezone.timedelta(hours=1))
+
+        self.assertEqual(queue.requeue_stale(), 0)
+        self.assertEqual(Job.objects.get(pk=self.job.pk).status, 'running')
+
+    def test_heartbeat_extends_the_lease(self):
+        queue.claim(1, 'worker-a')
+        Job.objects.filter(pk=self.job.pk).update(lease_expires_at=timezone.now())
+
+        self.assertEqual(queue.heartbeat('worker-a'), 1)
+        self.assertEqual(queue.heartbeat('worker-b'), 0)
+        self.assertGreater(Job.objects.get(pk=self.job.pk).lease_expires_at, timezone.now())
+
+    def test_expired_lease_is_requeued_and_the_old_worker_loses_the_job(self):
+        queue.claim(1, 'worker-a')
+        Job.objects.filter(pk=self.job.pk).update(lease_expires_at=timezone.now() - timezone.timedelta(seconds=1))
+        stale = Job.objects.get(pk=self.job.pk)
+
+        self.assertEqual(queue.requeue_stale(), 1)
+        self.assertEqual(queue.claim(1, 'worker-b'), [self.job.pk])
+
+        # The first worker finishing late must not overwrite the new claim
+        self.assertEqual(queue.owned(stale).update(status='done'), 0)
+        job = Job.objects.get(pk=self.job.pk)
+        self.assertEqual((job.status, job.worker), ('running', 'worker-b'))
+
+    def test_run_records_the_outcome(self):
+        queue.claim(1, 'worker-a')
+        queue.run(self.job.pk)
+
+        job = Job.objects.get(pk=self.job.pk)
+        self.assertEqual(calls, [1])
+        self.assertEqual((job.status, job.lease_expires_at), ('done', None))
+
+
+
+
+# DEDUPLICATION #
+
+@override_settings(JOB_QUEUE={
+    'CONCURRENCY': 1, 'MAX_ATTEMPTS': 3, 'BACKOFF_SECONDS': 10, 'POLL_SECONDS': 1,
+    'LEASE_SECONDS': 60, 'HEARTBEAT_SECONDS': 15, 'EAGER': False,
+})
+class DedupeTests(TestCase):
+
+    def test_one_queued_job_per_key(self):
+        with self.assertNumQueries(1):
+            queue.enqueue('core.job.tests.record', dedupe_key='k', value=1)
+        with self.assertNumQueries(1):
+            queue.enqueue('core.job.tests.record', dedupe_key='k', value=2)
+
+        self.assertEqual(list(Job.objects.values_list('payload', flat=True)), [{'value': 1}])
+
+    def test_running_job_does_not_hold_its_key(self):
+        queue.enqueue('core.job.tests.record', dedupe_key='k', value=1)
+        queue.claim(1, 'worker-a')
+        queue.enqueue('core.job.tests.record', dedupe_key='k', value=2)
+
+        self.assertEqual(Job.objects.filter(status='queued').count(), 1)
+
+    def test_requeued_job_gives_its_key_up(self):
+        queue.enqueue('core.job.tests.record', dedupe_key='k', value=1)
+        queue.claim(1, 'worker-a')
+        queue.enqueue('core.job.tests.record', dedupe_key='k', value=2)
+        Job.objects.filter(status='running').update(lease_expires_at=timezone.now() - timezone.timedelta(seconds=1))
+
+        self.assertEqual(queue.requeue_stale(), 1)
+        self.assertEqual(
+            sorted(Job.objects.values_list('dedupe_key', flat=True)), ['', 'k'],
+        )
@@ -0,0 +1,25 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from core.notification.models import EmailOutbox
+
+
+
+
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ('recipient', 'subject', 'status', 'attempts', 'send_after', 'date_sent')
+    list_filter = ('status',)
+    search_fields = ['recipient', 'coalesce_key']
+    readonly_fields = ('attempts', 'last_error', 'date_created', 'date_updated', 'date_sent')
+    actions = ['requeue']
+
+    @admin.action(description='Requeue selected emails')
+    def requeue(self, request, queryset):
+        queryset.exclude(status__in=['sending', 'sent']).update(
+            status='queued', attempts=0, send_after=timezone.now(), date_updated=timezone.now(),
+        )
+
+
+
+
+admin.site.register(EmailOutbox, EmailOutboxAdmin)
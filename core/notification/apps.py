@@ -0,0 +1,7 @@
+from django.apps import AppConfig
+
+
+class NotificationConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'core.notification'
+    verbose_name = "Email Outbox"
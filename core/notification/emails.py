@@ -0,0 +1,105 @@
+'''
+    This file composes the templated emails sent by the outbox
+
+    Templates are compiled once per process and every email after the
+    first only renders them. Images go inline as related MIME parts the
+    HTML points at with cid: links. QR codes arrive already rendered by the
+    outbox's batch, and an event's header image is resized and encoded
+    once and then shared by every email about that event.
+'''
+
+# IMPORTS #
+
+import io
+from email.mime.image import MIMEImage
+from functools import lru_cache
+
+from PIL import Image
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.mail import EmailMultiAlternatives
+from django.template.loader import get_template
+
+
+
+
+TEMPLATES = {
+    'ticket': ('notification/ticket_email.txt', 'notification/ticket_email.html'),
+}
+
+HEADER_WIDTH = 600
+
+HEADER_CID = 'header'
+
+
+
+
+# ASSETS #
+
+@lru_cache(maxsize=None)
+def compiled(name):
+    return get_template(name)
+
+
+@lru_cache(maxsize=256)
+def header_image(image_name):
+    '''The event cover as an inline JPEG part, None when the file is missing'''
+    try:
+        with default_storage.open(image_name) as file:
+            image = Image.open(file)
+            image.thumbnail((HEADER_WIDTH, HEADER_WIDTH), Image.LANCZOS)
+            buffer = io.BytesIO()
+            image.convert('RGB').save(buffer, format='JPEG', quality=80, optimize=True)
+    except (OSError, ValueError):
+        return None
+    return inline_image(buffer.getvalue(), 'jpeg', HEADER_CID)
+
+
+def inline_image(data, subtype, cid):
+    part = MIMEImage(data, subtype)
+    part.add_header('Content-ID', '<{}>'.format(cid))
+    part.add_header('Content-Disposition', 'inline', filename='{}.{}'.format(cid, subtype))
+    return part
+
+
+
+
+# COMPOSING #
+
+def compose(template, group, images):
+    '''
+        One email for a coalesced group of outbox rows, its tickets' QR codes
+        inline. images maps each QR payload to its PNG bytes.
+    '''
+    first = group[0]
+    tickets, seen = [], set()
+    for email in group:
+        for qrcode_id, payload, name in email.tickets:
+            if qrcode_id not in seen:
+                seen.add(qrcode_id)
+                tickets.append({'id': qrcode_id, 'name': name, 'cid': 'qr-' + qrcode_id, 'payload': payload})
+
+    header = header_image(first.context['image']) if first.context.get('image') else None
+    context = dict(
+        first.context,
+        tickets=tickets,
+        header=HEADER_CID if header else '',
+        organization=settings.ORGANIZATION_NAME,
+    )
+
+    text, html = TEMPLATES[template]
+    message = EmailMultiAlternatives(
+        subject=first.subject,
+        body=compiled(text).render(context),
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[first.recipient],
+    )
+    message.attach_alternative(compiled(html).render(context), 'text/html')
+    message.mixed_subtype = 'related'
+
+    if header:
+        message.attach(header)
+    for ticket in tickets:
+        message.attach(inline_image(images[ticket['payload']], 'png', ticket['cid']))
+    return message
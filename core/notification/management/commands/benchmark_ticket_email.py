@@ -0,0 +1,98 @@
+'''
+    Composes ticket emails for a sold-out show and compares the cached
+    composer with one that parses templates and encodes the event header
+    again for every email
+'''
+
+# IMPORTS #
+
+import io
+import time
+from unittest import mock
+
+from PIL import Image
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.template import engines
+from django.utils import timezone
+
+from api import qrcodes
+from core.notification import emails
+from core.notification.models import EmailOutbox
+from core.order.tokens import make_token
+
+
+
+
+def parse_every_time(name):
+    '''What compiled() saves: finding, reading and compiling the template'''
+    with open(find_template_path(name)) as file:
+        return engines['django'].from_string(file.read())
+
+
+def find_template_path(name):
+    return engines['django'].engine.find_template(name)[0].origin.name
+
+
+
+
+class Command(BaseCommand):
+    help = 'Benchmark composing ticket emails with and without cached templates and header'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--emails', type=int, default=2000)
+        parser.add_argument('--tickets', type=int, default=2, help='Tickets in each email')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        header = default_storage.save('events/cover/benchmark.jpg', ContentFile(self.cover()))
+        try:
+            outbox = self.outbox(options['emails'], options['tickets'], header, now)
+            payloads = list({ticket[1] for email in outbox for ticket in email.tickets})
+            images = dict(zip(payloads, qrcodes.render_batch(payloads)))
+
+            emails.compiled.cache_clear()
+            emails.header_image.cache_clear()
+            with mock.patch.object(emails, 'compiled', parse_every_time), \
+                    mock.patch.object(emails, 'header_image', emails.header_image.__wrapped__):
+                uncached = self.timed(outbox, images)
+            cached = self.timed(outbox, images)
+        finally:
+            default_storage.delete(header)
+
+        for label, (elapsed, size) in (('parse and encode per email', uncached), ('compiled and cached', cached)):
+            self.stdout.write('{:<28} {:>8.0f} emails/s  {:>7.3f} ms each  {:>7.0f} bytes each'.format(
+                label, len(outbox) / elapsed, elapsed * 1000 / len(outbox), size / len(outbox),
+            ))
+        self.stdout.write(self.style.SUCCESS('{:.1f}x faster'.format(uncached[0] / cached[0])))
+
+    def cover(self):
+        image = Image.linear_gradient('L').resize((1600, 900)).convert('RGB')
+        buffer = io.BytesIO()
+        image.save(buffer, format='JPEG')
+        return buffer.getvalue()
+
+    def outbox(self, count, per_email, header, now):
+        context = {'event': 'Sold Out Show', 'venue': 'Main Hall', 'date': 'Oct. 18, 2026, 8 p.m.', 'image': header}
+        return [
+            EmailOutbox(
+                recipient='fan{}@tikwey.local'.format(i),
+                subject='Ticket for Sold Out Show',
+                template='ticket',
+                context=context,
+                tickets=[
+                    [qrcode_id, make_token(qrcode_id, 1, 1, now, now + timezone.timedelta(days=1)), 'Regular']
+                    for qrcode_id in ('t{:018d}'.format(i * per_email + n) for n in range(per_email))
+                ],
+            )
+            for i in range(count)
+        ]
+
+    def timed(self, outbox, images):
+        size = 0
+        start = time.perf_counter()
+        for email in outbox:
+            size += len(emails.compose('ticket', [email], images).message().as_bytes())
+        return time.perf_counter() - start, size
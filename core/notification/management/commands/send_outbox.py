@@ -0,0 +1,38 @@
+'''
+    Runs the email outbox sender
+'''
+
+# IMPORTS #
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.notification import outbox
+
+
+
+
+class Command(BaseCommand):
+    help = 'Send queued emails in batches over one SMTP connection each'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.EMAIL_OUTBOX['BATCH_SIZE'])
+        parser.add_argument('--once', action='store_true', help='Exit once no email is due')
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            sent = outbox.deliver(options['batch_size'])
+            total += sent
+            if sent:
+                continue
+
+            due = outbox.next_due()
+            if options['once'] and (due is None or due > timezone.now()):
+                break
+            time.sleep(settings.EMAIL_OUTBOX['POLL_SECONDS'])
+
+        self.stdout.write('{} emails sent'.format(total))
@@ -0,0 +1,28 @@
+# Generated by Django 4.0.10 on 2026-10-18 20:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notification', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emailoutbox',
+            name='context',
+            field=models.JSONField(blank=True, default=dict, help_text='Template context'),
+        ),
+        migrations.AddField(
+            model_name='emailoutbox',
+            name='template',
+            field=models.CharField(blank=True, help_text='Composed from this template when sent, see core/notification/emails.py', max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='emailoutbox',
+            name='tickets',
+            field=models.JSONField(blank=True, default=list, help_text='[qrcode_id, QR payload, ticket name] triples, their codes are attached when the email is sent'),
+        ),
+    ]
@@ -0,0 +1,120 @@
+'''
+    This model contains the EmailOutbox Model, the queue of outgoing emails
+'''
+
+# IMPORTS #
+
+from django.db import models
+from django.utils import timezone
+
+
+
+
+# EMAIL OUTBOX MODEL #
+
+class EmailOutbox(models.Model):
+
+    status_choices = (
+        ('queued', 'Queued'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('dead', 'Dead'),
+    )
+
+    recipient = models.EmailField(
+        max_length=255,
+        verbose_name='Recipient',
+    )
+
+    subject = models.CharField(
+        max_length=255,
+    )
+
+    body = models.TextField(
+        blank=True,
+    )
+
+    html_body = models.TextField(
+        blank=True,
+        verbose_name='HTML body',
+    )
+
+    template = models.CharField(
+        max_length=50,
+        blank=True,
+        help_text='Composed from this template when sent, see core/notification/emails.py',
+    )
+
+    context = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text='Template context',
+    )
+
+    tickets = models.JSONField(
+        default=list,
+        blank=True,
+        help_text='[qrcode_id, QR payload, ticket name] triples, their codes are attached when the email is sent',
+    )
+
+    coalesce_key = models.CharField(
+        max_length=100,
+        blank=True,
+        help_text='Queued emails to one recipient sharing this key go out as a single email',
+    )
+
+    status = models.CharField(
+        max_length=10,
+        choices=status_choices,
+        default='queued',
+        verbose_name='Email Status',
+    )
+
+    claim = models.CharField(
+        max_length=32,
+        blank=True,
+        editable=False,
+    )
+
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+    )
+
+    max_attempts = models.PositiveSmallIntegerField(
+        default=5,
+    )
+
+    send_after = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Send after',
+    )
+
+    last_error = models.TextField(
+        blank=True,
+    )
+
+    date_created = models.DateTimeField(
+        auto_now_add=True,
+    )
+
+    date_updated = models.DateTimeField(
+        default=timezone.now,
+    )
+
+    date_sent = models.DateTimeField(
+        blank=True,
+        null=True,
+    )
+
+    class Meta:
+        verbose_name = "Outgoing Email"
+        verbose_name_plural = "Email Outbox"
+        ordering = ['send_after']
+        indexes = [
+            models.Index(fields=['status', 'send_after']),
+            models.Index(fields=['status', 'date_sent']),
+            models.Index(fields=['claim']),
+        ]
+
+    def __str__(self):
+        return "{} - {}({})".format(self.recipient, self.subject, self.status)
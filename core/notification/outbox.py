@@ -0,0 +1,255 @@
+'''
+    This file queues outgoing emails and delivers them in batches
+
+    Emails are rows in the EmailOutbox table, so one queued inside a
+    transaction is only sent once that transaction commits. A delivery
+    claims a batch of due rows, merges the ones to the same recipient that
+    share a coalesce key into a single email, renders every attached QR code
+    in one batch and sends everything over one SMTP connection. Sending is
+    capped at RATE_PER_MINUTE, transient failures are retried with
+    exponential backoff and permanent ones are parked as dead.
+
+    A claim is a lease, like a job's: the delivery renews it while it sends,
+    and only a batch whose lease ran out, because its delivery died, goes
+    back to the queue. Outcomes are recorded only by the delivery that still
+    holds the claim, so a late one can never undo a newer claim's work.
+'''
+
+# IMPORTS #
+
+import logging
+import random
+import smtplib
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import F, Min
+from django.utils import timezone
+
+from api import qrcodes
+from core.job.models import Job
+from core.job.queue import enqueue
+from core.notification.emails import compose
+from core.notification.models import EmailOutbox
+
+
+logger = logging.getLogger(__name__)
+
+DELIVER_TASK = 'core.notification.tasks.deliver_outbox'
+
+# The SMTP session is gone, the rest of the batch waits for the next run
+CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+
+
+
+
+# QUEUEING #
+
+def queue(recipient, subject, body='', html_body='', tickets=(), coalesce_key='', template='', context=None):
+    '''Add an email to the outbox and make sure a delivery is scheduled for it'''
+    options = settings.EMAIL_OUTBOX
+    delay = options['COALESCE_SECONDS'] if coalesce_key else 0
+    email = EmailOutbox.objects.create(
+        recipient=recipient,
+        subject=subject,
+        body=body,
+        html_body=html_body,
+        template=template,
+        context=context or {},
+        tickets=[list(ticket) for ticket in tickets],
+        coalesce_key=coalesce_key,
+        max_attempts=options['MAX_ATTEMPTS'],
+        send_after=timezone.now() + timezone.timedelta(seconds=delay),
+    )
+
+    # A delivery already running may have looked for due emails before this
+    # one committed, so only a delivery still waiting to run counts
+    transaction.on_commit(lambda: schedule(email.send_after, delay))
+    return email
+
+
+def schedule(send_after, delay):
+    '''Enqueue a delivery unless one that runs by send_after is still waiting'''
+    scheduled = Job.objects.filter(name=DELIVER_TASK, status='queued', run_at__lte=send_after)
+    if not scheduled.exists():
+        enqueue(DELIVER_TASK, delay=delay)
+
+
+def next_due():
+    '''When the earliest queued email may go out, None when there is none'''
+    return EmailOutbox.objects.filter(status='queued').aggregate(next_due=Min('send_after'))['next_due']
+
+
+
+
+# DELIVERY #
+
+def budget(now):
+    '''Emails that can still go out without breaking the provider's quota'''
+    sent = EmailOutbox.objects.filter(
+        status='sent', date_sent__gt=now - timezone.timedelta(minutes=1),
+    ).count()
+    return settings.EMAIL_OUTBOX['RATE_PER_MINUTE'] - sent
+
+
+def claim(limit):
+    '''Mark up to limit due emails as sending and return them'''
+    now = timezone.now()
+    due = list(EmailOutbox.objects.filter(
+        status='queued', send_after__lte=now,
+    ).values_list('pk', flat=True)[:limit])
+    if not due:
+        return []
+
+    token = uuid.uuid4().hex
+    EmailOutbox.objects.filter(pk__in=due, status='queued').update(
+        status='sending', claim=token, attempts=F('attempts') + 1, date_updated=now,
+    )
+    return list(EmailOutbox.objects.filter(claim=token).order_by('pk'))
+
+
+def coalesce(emails):
+    '''Group emails that go out as one: same recipient and same coalesce key'''
+    groups = OrderedDict()
+    for email in emails:
+        groups.setdefault((email.recipient, email.coalesce_key or email.pk), []).append(email)
+    return list(groups.values())
+
+
+def build(group, images):
+    first = group[0]
+    if first.template:
+        return compose(first.template, group, images)
+
+    message = EmailMultiAlternatives(
+        subject=first.subject,
+        body=first.body,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[first.recipient],
+    )
+    if first.html_body:
+        message.attach_alternative(first.html_body, 'text/html')
+
+    attached = set()
+    for email in group:
+        for qrcode_id, payload, *_ in email.tickets:
+            if qrcode_id not in attached:
+                attached.add(qrcode_id)
+                message.attach('{}.png'.format(qrcode_id), images[payload], 'image/png')
+    return message
+
+
+def deliver(limit=None):
+    '''Send one batch of due emails over a single connection, returns emails sent'''
+    requeue_stale()
+    limit = min(limit or settings.EMAIL_OUTBOX['BATCH_SIZE'], budget(timezone.now()))
+    if limit <= 0:
+        return 0
+
+    emails = claim(limit)
+    if not emails:
+        return 0
+
+    groups = coalesce(emails)
+    payloads = list(OrderedDict.fromkeys(ticket[1] for email in emails for ticket in email.tickets))
+    images = dict(zip(payloads, qrcodes.render_batch(payloads)))
+
+    token = emails[0].claim
+    renewed = time.monotonic()
+    connection = get_connection(timeout=settings.EMAIL_OUTBOX['CONNECTION_TIMEOUT'])
+    try:
+        connection.open()
+    except Exception as e:
+        for group in groups:
+            fail(group, e)
+        return 0
+
+    sent = 0
+    try:
+        for position, group in enumerate(groups):
+            if time.monotonic() - renewed >= settings.EMAIL_OUTBOX['TIMEOUT_SECONDS'] / 3:
+                renew(token)
+                renewed = time.monotonic()
+            try:
+                connection.send_messages([build(group, images)])
+            except Exception as e:
+                logger.exception('Email to %s failed', group[0].recipient)
+                fail(group, e)
+                if isinstance(e, CONNECTION_ERRORS):
+                    release(groups[position + 1:])
+                    break
+            else:
+                mark_sent(group)
+                sent += 1
+    finally:
+        connection.close()
+    return sent
+
+
+
+
+# OUTCOMES #
+
+def claimed(emails):
+    '''The emails' rows, as long as the delivery that claimed them still holds the claim'''
+    return EmailOutbox.objects.filter(
+        pk__in=[email.pk for email in emails], status='sending', claim=emails[0].claim,
+    )
+
+
+def renew(token):
+    '''Extend the claim of every email the delivery is still sending'''
+    return EmailOutbox.objects.filter(status='sending', claim=token).update(date_updated=timezone.now())
+
+
+def mark_sent(group):
+    now = timezone.now()
+    claimed(group).update(status='sent', date_sent=now, date_updated=now)
+
+
+def permanent(error):
+    '''5xx SMTP replies will not change on a retry'''
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(500 <= code < 600 for code, _ in error.recipients.values())
+    code = getattr(error, 'smtp_code', None)
+    return code is not None and 500 <= code < 600
+
+
+def fail(group, error):
+    now = timezone.now()
+    for email in group:
+        if permanent(error) or email.attempts >= email.max_attempts:
+            claimed([email]).update(
+                status='dead', claim='', last_error=repr(error), date_updated=now,
+            )
+            continue
+
+        backoff = settings.EMAIL_OUTBOX['BACKOFF_SECONDS'] * 2 ** (email.attempts - 1)
+        claimed([email]).update(
+            status='queued',
+            claim='',
+            last_error=repr(error),
+            send_after=now + timezone.timedelta(seconds=backoff * random.uniform(0.5, 1.5)),
+            date_updated=now,
+        )
+
+
+def release(groups):
+    '''Hand claimed emails that were never tried back to the queue'''
+    emails = [email for group in groups for email in group]
+    if emails:
+        claimed(emails).update(
+            status='queued', claim='', attempts=F('attempts') - 1, date_updated=timezone.now(),
+        )
+
+
+def requeue_stale():
+    '''Hand emails whose delivery stopped renewing the claim back to the queue'''
+    cutoff = timezone.now() - timezone.timedelta(seconds=settings.EMAIL_OUTBOX['TIMEOUT_SECONDS'])
+    return EmailOutbox.objects.filter(
+        status='sending', date_updated__lt=cutoff,
+    ).update(status='queued', claim='', date_updated=timezone.now())
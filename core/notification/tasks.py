@@ -0,0 +1,20 @@
+# IMPORTS #
+
+from django.conf import settings
+from django.utils import timezone
+
+from core.job.queue import task
+from core.notification import outbox
+
+
+
+
+@task
+def deliver_outbox():
+    outbox.deliver()
+
+    # Whatever is left, rate limited or waiting on a retry, gets the next run
+    due = outbox.next_due()
+    if due is not None:
+        wait = max((due - timezone.now()).total_seconds(), settings.EMAIL_OUTBOX['POLL_SECONDS'])
+        outbox.schedule(timezone.now() + timezone.timedelta(seconds=wait), wait)
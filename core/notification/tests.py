@@ -0,0 +1,261 @@
+# IMPORTS #
+
+import re
+import shutil
+import smtplib
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+
+from api import qrcodes
+from core.job.models import Job
+from core.job.queue import enqueue
+from core.notification import emails, outbox, tasks
+from core.notification.models import EmailOutbox
+
+
+
+
+# QUEUEING #
+
+class QueueTests(TestCase):
+
+    def queue(self, recipient='fan@tikwey.local'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return outbox.queue(recipient, 'Your tickets', body='See you there')
+
+    def deliveries(self, status='queued'):
+        return Job.objects.filter(name=outbox.DELIVER_TASK, status=status).count()
+
+    def test_email_queued_during_a_delivery_gets_its_own(self):
+        # The running delivery may already be past its check for due emails
+        Job.objects.filter(pk=enqueue(outbox.DELIVER_TASK).pk).update(status='running')
+
+        self.queue()
+
+        self.assertEqual((self.deliveries('running'), self.deliveries()), (1, 1))
+
+    def test_waiting_delivery_is_shared(self):
+        self.queue()
+        self.queue('other@tikwey.local')
+
+        self.assertEqual(self.deliveries(), 1)
+
+    def test_delivery_is_scheduled_only_once_committed(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            outbox.queue('fan@tikwey.local', 'Your tickets', body='See you there')
+            self.assertEqual(self.deliveries(), 0)
+
+        self.assertEqual(len(callbacks), 1)
+
+
+
+
+# DELIVERY #
+
+class FakeConnection:
+    '''Stands in for the SMTP connection, failing the sends listed in errors'''
+
+    def __init__(self, errors=()):
+        self.errors = list(errors)
+        self.sent = []
+        self.opened = self.closed = 0
+
+    def open(self):
+        self.opened += 1
+
+    def close(self):
+        self.closed += 1
+
+    def send_messages(self, messages):
+        error = self.errors.pop(0) if self.errors else None
+        if error is not None:
+            raise error
+        self.sent.extend(messages)
+        return len(messages)
+
+
+@override_settings(EMAIL_OUTBOX={
+    'BATCH_SIZE': 100, 'RATE_PER_MINUTE': 60, 'MAX_ATTEMPTS': 3, 'BACKOFF_SECONDS': 30,
+    'COALESCE_SECONDS': 5, 'TIMEOUT_SECONDS': 300, 'CONNECTION_TIMEOUT': 30, 'POLL_SECONDS': 5,
+})
+class DeliveryTests(TestCase):
+
+    def queue(self, recipient='fan@tikwey.local', **options):
+        email = outbox.queue(recipient, 'Your tickets', body='See you there', **options)
+        EmailOutbox.objects.filter(pk=email.pk).update(send_after=timezone.now())
+        return email
+
+    def deliver(self, *errors, **options):
+        connection = FakeConnection(errors)
+        with mock.patch.object(outbox, 'get_connection', return_value=connection) as get_connection:
+            if errors:
+                with self.assertLogs('core.notification.outbox', 'ERROR'):
+                    sent = outbox.deliver(**options)
+            else:
+                sent = outbox.deliver(**options)
+        self.assertEqual(get_connection.call_count, 1)
+        self.assertEqual(get_connection.call_args.kwargs, {'timeout': 30})
+        return sent, connection
+
+    def statuses(self):
+        return list(EmailOutbox.objects.order_by('pk').values_list('status', 'attempts'))
+
+    def test_batch_goes_over_one_connection(self):
+        for i in range(3):
+            self.queue('fan{}@tikwey.local'.format(i))
+
+        sent, connection = self.deliver()
+
+        self.assertEqual(sent, 3)
+        self.assertEqual((connection.opened, connection.closed, len(connection.sent)), (1, 1, 3))
+        self.assertEqual(self.statuses(), [('sent', 1)] * 3)
+
+    @override_settings(EMAIL_OUTBOX={
+        'BATCH_SIZE': 100, 'RATE_PER_MINUTE': 2, 'MAX_ATTEMPTS': 3, 'BACKOFF_SECONDS': 30,
+        'COALESCE_SECONDS': 5, 'TIMEOUT_SECONDS': 300, 'CONNECTION_TIMEOUT': 30, 'POLL_SECONDS': 5,
+    })
+    def test_sending_stays_within_the_rate(self):
+        for i in range(3):
+            self.queue('fan{}@tikwey.local'.format(i))
+
+        self.assertEqual(self.deliver()[0], 2)
+        self.assertEqual(outbox.deliver(), 0)
+        self.assertEqual(self.statuses(), [('sent', 1), ('sent', 1), ('queued', 0)])
+
+    def test_same_recipient_and_key_go_out_as_one(self):
+        self.queue(coalesce_key='order-1', tickets=[('t1', 'payload-1')])
+        self.queue(coalesce_key='order-1', tickets=[('t2', 'payload-2')])
+        self.queue(coalesce_key='order-2', tickets=[('t3', 'payload-3')])
+
+        sent, connection = self.deliver()
+
+        self.assertEqual(sent, 2)
+        self.assertEqual(
+            [[name for name, *_ in message.attachments] for message in connection.sent],
+            [['t1.png', 't2.png'], ['t3.png']],
+        )
+        self.assertEqual(self.statuses(), [('sent', 1)] * 3)
+
+    def test_transient_failure_is_retried_with_backoff(self):
+        email = self.queue()
+        before = timezone.now()
+
+        self.deliver(smtplib.SMTPResponseException(451, b'Try again later'))
+
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts, email.claim), ('queued', 1, ''))
+        self.assertIn('451', email.last_error)
+        # BACKOFF_SECONDS with up to half of it as jitter either way
+        self.assertGreaterEqual(email.send_after, before + timezone.timedelta(seconds=15))
+        self.assertLessEqual(email.send_after, timezone.now() + timezone.timedelta(seconds=45))
+
+    def test_permanent_failure_is_dead(self):
+        email = self.queue()
+
+        self.deliver(smtplib.SMTPResponseException(550, b'No such user'))
+
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ('dead', 1))
+
+    def test_dropped_connection_releases_the_rest(self):
+        for i in range(3):
+            self.queue('fan{}@tikwey.local'.format(i))
+
+        sent, connection = self.deliver(smtplib.SMTPServerDisconnected('gone'))
+
+        self.assertEqual((sent, connection.sent), (0, []))
+        # The email being sent counts an attempt, the ones never tried do not
+        self.assertEqual(self.statuses(), [('queued', 1), ('queued', 0), ('queued', 0)])
+        self.assertFalse(EmailOutbox.objects.exclude(claim='').exists())
+
+    def test_claim_is_renewed_while_sending(self):
+        for i in range(3):
+            self.queue('fan{}@tikwey.local'.format(i))
+
+        # A third of TIMEOUT_SECONDS passes before the second send
+        clock = iter([0, 0, 150, 150, 160])
+        with mock.patch.object(outbox.time, 'monotonic', side_effect=lambda: next(clock)), \
+                mock.patch.object(outbox, 'renew', wraps=outbox.renew) as renew:
+            self.assertEqual(self.deliver()[0], 3)
+
+        self.assertEqual(renew.call_count, 1)
+
+    def test_late_delivery_cannot_overwrite_a_newer_claim(self):
+        email = self.queue()
+        first = outbox.claim(10)
+        EmailOutbox.objects.filter(pk=email.pk).update(
+            date_updated=timezone.now() - timezone.timedelta(seconds=301),
+        )
+        self.assertEqual(outbox.requeue_stale(), 1)
+        second = outbox.claim(10)
+
+        outbox.fail(first, smtplib.SMTPResponseException(550, b'No such user'))
+        outbox.mark_sent(first)
+
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.claim), ('sending', second[0].claim))
+        outbox.mark_sent(second)
+        email.refresh_from_db()
+        self.assertEqual(email.status, 'sent')
+
+    def test_leftovers_get_one_scheduled_delivery(self):
+        outbox.queue('fan@tikwey.local', 'Your tickets', body='See you there', coalesce_key='order-1')
+
+        for _ in range(2):
+            tasks.deliver_outbox()
+
+        self.assertEqual(Job.objects.filter(name=outbox.DELIVER_TASK, status='queued').count(), 1)
+
+
+
+
+# COMPOSING #
+
+class ComposeTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.media_root = tempfile.mkdtemp()
+        cls.media_settings = override_settings(MEDIA_ROOT=cls.media_root)
+        cls.media_settings.enable()
+        Image.new('RGB', (1200, 400), 'navy').save(Path(cls.media_root) / 'cover.jpg')
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.media_settings.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        emails.header_image.cache_clear()
+
+    def test_coalesced_group_is_one_related_message(self):
+        context = {'event': 'Test Show', 'venue': 'Main Hall', 'date': 'Sat 1 Aug, 20:00', 'image': 'cover.jpg'}
+        group = [
+            outbox.queue('fan@tikwey.local', 'Your tickets', template='ticket', context=context,
+                         coalesce_key='order-1', tickets=tickets)
+            for tickets in ([('t1', 'payload-1', 'Regular')],
+                            [('t1', 'payload-1', 'Regular'), ('t2', 'payload-2', 'VIP')])
+        ]
+        images = {payload: qrcodes.render(payload) for payload in ('payload-1', 'payload-2')}
+
+        message = emails.compose('ticket', group, images).message()
+
+        self.assertEqual(message.get_content_type(), 'multipart/related')
+        parts = [part for part in message.walk() if part['Content-ID']]
+        content_ids = [part['Content-ID'] for part in parts]
+        self.assertEqual(content_ids, ['<header>', '<qr-t1>', '<qr-t2>'])
+        self.assertEqual([part.get_content_type() for part in parts], ['image/jpeg', 'image/png', 'image/png'])
+
+        html = next(part for part in message.walk() if part.get_content_type() == 'text/html')
+        html = html.get_payload(decode=True).decode()
+        self.assertEqual(re.findall(r'src="cid:([^"]+)"', html), ['header', 'qr-t1', 'qr-t2'])
+        for text in ('Test Show', 'Main Hall', 'Sat 1 Aug, 20:00'):
+            self.assertIn(text, html)
+
@@ -4,6 +4,8 @@ from core.order.models import (
     TicketOrder,
     Order,
     PurchasedTicket,
+    Reservation,
+    IdempotencyKey,
 )
 
 
@@ -25,7 +27,23 @@ class PurchasedTicketAdmin(admin.ModelAdmin):
 
 
 
+class ReservationAdmin(admin.ModelAdmin):
+    list_display = ('order', 'ticket', 'quantity', 'status', 'expires_at')
+    list_filter = ('status',)
+
+
+
+
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    list_display = ('scope', 'key', 'status_code', 'date_created')
+    search_fields = ['scope', 'key']
+
+
+
+
 admin.site.register(TicketOrder)
 admin.site.register(Order, OrderAdmin)
 admin.site.register(PurchasedTicket, PurchasedTicketAdmin)
+admin.site.register(Reservation, ReservationAdmin)
+admin.site.register(IdempotencyKey, IdempotencyKeyAdmin)
 
@@ -0,0 +1,82 @@
+'''
+    This file streams the attendee list of an event as CSV or NDJSON
+
+    Rows come from a values_list projection read in chunks through a
+    server-side cursor and are encoded one at a time, so memory stays flat
+    however many tickets the event sold.
+'''
+
+# IMPORTS #
+
+import csv
+import json
+
+from core.order.models import PurchasedTicket
+
+
+
+
+COLUMNS = ('ticket_id', 'email', 'ticket', 'purchased_date', 'checkin_status')
+
+FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+CHUNK_SIZE = 2000
+
+BUFFER_SIZE = 64 * 1024
+
+
+
+
+def attendee_rows(event, chunk_size=CHUNK_SIZE):
+    return (
+        PurchasedTicket.objects.filter(ticket__event=event)
+        .order_by('purchased_date', 'id')
+        .values_list('qrcode_id', 'order__email', 'ticket__name', 'purchased_date', 'checkin_status')
+        .iterator(chunk_size=chunk_size)
+    )
+
+
+def encode(row):
+    qrcode_id, email, ticket, purchased_date, checkin_status = row
+    return (qrcode_id, email, ticket, purchased_date.isoformat(), checkin_status)
+
+
+class Echo:
+    '''File-like object whose write hands the line back to the csv writer caller'''
+
+    def write(self, value):
+        return value
+
+
+def write_csv(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(COLUMNS)
+    for row in rows:
+        yield writer.writerow(encode(row))
+
+
+def write_ndjson(rows):
+    for row in rows:
+        yield json.dumps(dict(zip(COLUMNS, encode(row)))) + '\n'
+
+
+def buffered(lines, size=BUFFER_SIZE):
+    '''Join lines into blocks of about size characters to cut per-write overhead'''
+    block, length = [], 0
+    for line in lines:
+        block.append(line)
+        length += len(line)
+        if length >= size:
+            yield ''.join(block)
+            block, length = [], 0
+    if block:
+        yield ''.join(block)
+
+
+def export(event, format='csv', chunk_size=CHUNK_SIZE):
+    '''The event's attendee list in the given format, as blocks of text'''
+    writer = write_csv if format == 'csv' else write_ndjson
+    return buffered(writer(attendee_rows(event, chunk_size)))
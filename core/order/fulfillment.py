@@ -0,0 +1,69 @@
+'''
+    This file issues the purchased tickets of a paid order
+
+    Fulfillment runs as a background job: all tickets of an order are
+    inserted with one bulk_create and a single email carrying every ticket
+    of the order is queued in the outbox, which renders their QR codes when
+    it sends.
+'''
+
+# IMPORTS #
+
+from django.utils import timezone
+from django.utils.formats import date_format
+
+from api.utils import Util
+from core.order.tokens import ticket_token
+from core.order.models import (
+    Order,
+    PurchasedTicket,
+)
+
+
+
+
+def fulfill(order_pk, domain):
+    claimed = Order.objects.filter(
+        pk=order_pk, fulfillment_status__in=['unfulfilled', 'failed'],
+    ).update(fulfillment_status='processing', date_updated=timezone.now())
+    if not claimed:
+        return
+
+    try:
+        order = Order.objects.get(pk=order_pk)
+        tickets = issue_tickets(order)
+        if not tickets:
+            Order.objects.filter(pk=order_pk).update(fulfillment_status='fulfilled', date_updated=timezone.now())
+            return
+
+        event = tickets[0].ticket.event
+        Util.send_email_attach({
+            'subject': 'Ticket for {}'.format(event.name),
+            'recipient': order.email,
+            'context': {
+                'event': event.name,
+                'venue': event.venue,
+                'date': date_format(timezone.localtime(event.start_date), 'DATETIME_FORMAT'),
+                'image': event.image.name if event.image else '',
+            },
+            'tickets': [(p_tix.qrcode_id, ticket_token(p_tix), p_tix.ticket.name) for p_tix in tickets],
+            'coalesce_key': 'order:{}'.format(order.order_id),
+        })
+    except Exception:
+        Order.objects.filter(pk=order_pk).update(fulfillment_status='failed', date_updated=timezone.now())
+        raise
+
+    Order.objects.filter(pk=order_pk).update(fulfillment_status='fulfilled', date_updated=timezone.now())
+
+
+def issue_tickets(order):
+    '''Create every PurchasedTicket of the order, reusing any from an earlier attempt'''
+    tickets = list(order.sold_ticket.select_related('ticket__event'))
+    if tickets:
+        return tickets
+
+    return PurchasedTicket.objects.bulk_create([
+        PurchasedTicket(order=order, ticket=tix.item)
+        for tix in order.selected_ticket.select_related('item__event')
+        for _ in range(tix.quantity)
+    ])
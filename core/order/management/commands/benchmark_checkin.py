@@ -0,0 +1,128 @@
+'''
+    Scans the signed QR token of every ticket of a throwaway event from
+    several gates at once and checks that each ticket is admitted exactly
+    once, and that forged tokens are turned away without a query
+'''
+
+# IMPORTS #
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from core.event.models import Event, Ticket
+from core.order import checkin, tokens
+from core.order.models import Order, PurchasedTicket
+from core.user.models import User
+
+
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the check-in scan and verify no ticket is admitted twice'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tickets', type=int, default=5000)
+        parser.add_argument('--workers', type=int, default=8, help='Gates scanning at the same time')
+        parser.add_argument('--target', type=int, default=2000, help='Scans per second to aim for')
+
+    def handle(self, *args, **options):
+        owner, event, codes = self.create_event(options['tickets'])
+        try:
+            self.benchmark(event, codes, options)
+        finally:
+            owner.delete()
+
+    def create_event(self, count):
+        now = timezone.now()
+        tag = str(int(now.timestamp() * 1000))
+        owner = User.objects.create_user('checkin{}@tikwey.local'.format(tag), 'checkin' + tag, None)
+        event = Event.objects.create(
+            user=owner, name='Check-in {}'.format(tag), description='Benchmark',
+            venue='Nowhere', host='Nowhere', publish_status=True,
+            start_date=now, end_date=now + timezone.timedelta(days=1),
+        )
+        ticket = Ticket.objects.create(
+            event=event, name='Regular', description='Benchmark', price=0,
+            sale_end_date=now + timezone.timedelta(days=1),
+        )
+        order = Order.objects.create(user=owner, email=owner.email, event=event)
+        sold = PurchasedTicket.objects.bulk_create(
+            [PurchasedTicket(order=order, ticket=ticket) for _ in range(count)], batch_size=1000,
+        )
+        return owner, event, [tokens.ticket_token(s) for s in sold]
+
+    def benchmark(self, event, codes, options):
+        workers = options['workers']
+        self.check_tokens(event, codes)
+
+        elapsed, results = self.scan_all(event.pk, codes, workers)
+        rate = len(codes) / elapsed
+        self.stdout.write('{} scans from {} gates: {:.0f} scans/s, {:.2f} ms per scan'.format(
+            len(codes), workers, rate, elapsed * 1000 / len(codes),
+        ))
+        style = self.style.SUCCESS if rate >= options['target'] else self.style.WARNING
+        self.stdout.write(style('Target is {} scans/s'.format(options['target'])))
+
+        admitted = results.count(checkin.ADMITTED)
+        if admitted != len(codes):
+            raise CommandError('{} of {} tickets admitted on the first pass'.format(admitted, len(codes)))
+
+        _, results = self.scan_all(event.pk, codes, workers)
+        if results.count(checkin.DUPLICATE) != len(codes):
+            raise CommandError('Second pass admitted {} tickets again'.format(results.count(checkin.ADMITTED)))
+
+        # Every gate scans the same ticket at the same moment
+        PurchasedTicket.objects.filter(qrcode_id=tokens.read_token(codes[0]).qrcode_id).update(
+            checkin_status='new', checked_in_at=None,
+        )
+        _, results = self.scan_all(event.pk, [codes[0]] * workers * 4, workers)
+        if results.count(checkin.ADMITTED) != 1:
+            raise CommandError('One ticket scanned at {} gates was admitted {} times'.format(
+                workers, results.count(checkin.ADMITTED),
+            ))
+
+        if checkin.scan(event.pk, 't' + '0' * 17)[0] != checkin.INVALID:
+            raise CommandError('An unknown ticket was not rejected')
+        self.stdout.write(self.style.SUCCESS('Every ticket admitted exactly once, rescans reported as duplicates'))
+
+    def check_tokens(self, event, codes):
+        kid, qrcode_id, *claims, signature = codes[0].split('.')
+        forged = '.'.join([kid, qrcode_id[:-1] + ('0' if qrcode_id[-1] != '0' else '1'), *claims, signature])
+        rejected = [
+            ('forged', forged, event.pk),
+            ('wrong event', codes[0], event.pk + 1),
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            for code in codes:
+                checkin.parse_payload(code, event.pk)
+            elapsed = time.perf_counter() - start
+            for reason, code, event_id in rejected:
+                try:
+                    checkin.parse_payload(code, event_id)
+                except checkin.InvalidPayload:
+                    continue
+                raise CommandError('A {} token was accepted'.format(reason))
+        if len(queries):
+            raise CommandError('Token checks ran {} queries'.format(len(queries)))
+        self.stdout.write('{} tokens verified: {:.1f} us per token, no queries'.format(
+            len(codes), elapsed * 1e6 / len(codes),
+        ))
+
+    def scan_all(self, event_id, codes, workers):
+        def gate(batch):
+            try:
+                return [checkin.scan(event_id, checkin.parse_payload(code, event_id))[0] for code in batch]
+            finally:
+                connection.close()
+
+        batches = [codes[i::workers] for i in range(workers)]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(workers) as pool:
+            results = [result for batch in pool.map(gate, batches) for result in batch]
+        return time.perf_counter() - start, results
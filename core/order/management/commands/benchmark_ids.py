@@ -0,0 +1,76 @@
+'''
+    Compares the shared ID generator with the old lookup-per-row generators
+    and checks that IDs stay unique across threads
+'''
+
+# IMPORTS #
+
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from api.ids import generate_id
+from core.order.models import Order
+
+
+
+
+def legacy_order_id():
+    '''The order ID generator before the shared service, one exists() query per ID'''
+    code = str(uuid.uuid4()).split("-")[-2]
+    ucode = code + timezone.now().strftime('%Y%m%d%H%M%S')
+    if Order.objects.filter(order_id=ucode).exists():
+        return legacy_order_id()
+    return ucode
+
+
+
+
+class Command(BaseCommand):
+    help = 'Benchmark ID generation against the old query-per-row generators'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=10000, help='IDs generated per run')
+        parser.add_argument('--workers', type=int, default=8)
+
+    def handle(self, *args, **options):
+        count = options['count']
+
+        legacy = self.timed(lambda: [legacy_order_id() for _ in range(count)])
+        shared = self.timed(lambda: [generate_id() for _ in range(count)])
+        self.report('legacy (exists() per ID)', count, *legacy)
+        self.report('shared generator', count, *shared)
+
+        if len(set(legacy[1])) != count:
+            self.stdout.write(self.style.WARNING(
+                'Legacy generator repeated {} IDs within one run'.format(count - len(set(legacy[1])))
+            ))
+
+        workers = options['workers']
+        with ThreadPoolExecutor(workers) as pool:
+            batches = list(pool.map(lambda _: [generate_id() for _ in range(count)], range(workers)))
+        ids = [i for batch in batches for i in batch]
+        if len(set(ids)) != len(ids):
+            raise CommandError('Shared generator repeated {} IDs'.format(len(ids) - len(set(ids))))
+        if any(batch != sorted(batch) for batch in batches):
+            raise CommandError('Shared generator IDs are not ordered within a thread')
+        self.stdout.write(self.style.SUCCESS(
+            '{} IDs from {} threads, all unique and time ordered'.format(len(ids), workers)
+        ))
+
+    def timed(self, generate):
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            ids = generate()
+            elapsed = time.perf_counter() - start
+        return elapsed, ids, len(queries)
+
+    def report(self, label, count, elapsed, ids, queries):
+        self.stdout.write('{:<26} {:>10.0f} IDs/s  {:>7.2f} ms total  {} queries'.format(
+            label, count / elapsed, elapsed * 1000, queries,
+        ))
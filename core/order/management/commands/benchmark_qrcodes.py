@@ -0,0 +1,78 @@
+'''
+    Compares the old per-ticket QR code rendering with the batch renderer,
+    core/order/tests.py checks that both draw the same codes
+'''
+
+# IMPORTS #
+
+import io
+import time
+
+import qrcode
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api import qrcodes
+from core.order.tokens import make_token
+
+
+
+
+def legacy_qrcode(payload):
+    '''The renderer before the batch API, minus the file it saved to disk'''
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_H,
+        box_size=10,
+        border=4,
+    )
+    qr.add_data(payload)
+    qr.make(fit=True)
+    img = qr.make_image(fill_color='black', back_color='white').convert('RGB')
+    buffer = io.BytesIO()
+    img.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+
+
+class Command(BaseCommand):
+    help = 'Benchmark per-ticket QR code rendering against the batch renderer'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=1000, help='Ticket tokens rendered per run')
+        parser.add_argument('--workers', type=int, default=settings.QRCODE_WORKERS)
+        parser.add_argument('--box-size', type=int, default=qrcodes.BOX_SIZE)
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        payloads = [
+            make_token('t{:018d}'.format(i), 1000 + i % 7, 5000 + i % 3, now, now + timezone.timedelta(days=1))
+            for i in range(options['count'])
+        ]
+        box_size, workers = options['box_size'], options['workers']
+
+        runs = [
+            ('legacy, one QRCode per ticket', lambda: [legacy_qrcode(p) for p in payloads]),
+            ('per ticket, shared encoder', lambda: [qrcodes.draw(p, box_size=box_size) for p in payloads]),
+            ('batch, {} processes'.format(workers), lambda: qrcodes.render_batch(
+                payloads, box_size=box_size, workers=workers)),
+            ('batch, auto error correction', lambda: qrcodes.render_batch(
+                payloads, box_size=box_size, error_correction=qrcodes.AUTO, workers=workers)),
+        ]
+        images = {}
+        for label, run in runs:
+            start = time.perf_counter()
+            images[label] = run()
+            elapsed = time.perf_counter() - start
+            self.stdout.write('{:<32} {:>8.0f} codes/s  {:>7.2f} ms each  {:>6.0f} bytes each'.format(
+                label, len(payloads) / elapsed, elapsed * 1000 / len(payloads),
+                sum(map(len, images[label])) / len(payloads),
+            ))
+
+        level = qrcodes.fit_error_correction(payloads[0])
+        self.stdout.write('Auto picked level {} for a {} character token'.format(
+            next(name for name, value in qrcodes.ERROR_CORRECTION.items() if value == level), len(payloads[0]),
+        ))
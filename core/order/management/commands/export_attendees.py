@@ -0,0 +1,37 @@
+'''
+    Writes the attendee list of an event as CSV or NDJSON
+'''
+
+# IMPORTS #
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.event.models import Event
+from core.order import exports
+
+
+
+
+class Command(BaseCommand):
+    help = 'Stream the attendees of an event to a file or stdout'
+
+    def add_arguments(self, parser):
+        parser.add_argument('event', help='Slug of the event')
+        parser.add_argument('--format', choices=sorted(exports.FORMATS), default='csv')
+        parser.add_argument('--output', help='File to write, defaults to stdout')
+        parser.add_argument('--chunk-size', type=int, default=exports.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            event = Event.objects.get(slug=options['event'])
+        except Event.DoesNotExist:
+            raise CommandError('No event with slug {}'.format(options['event']))
+
+        lines = exports.export(event, options['format'], options['chunk_size'])
+        if not options['output']:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+
+        with open(options['output'], 'w', newline='') as f:
+            f.writelines(lines)
@@ -0,0 +1,53 @@
+'''
+    Deletes idempotency keys older than IDEMPOTENCY_KEY_TTL
+'''
+
+# IMPORTS #
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.order.models import IdempotencyKey
+
+
+
+
+def purge_expired(batch_size):
+    '''Delete up to batch_size expired keys and return how many went'''
+    expired = timezone.now() - timezone.timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+    pks = list(
+        IdempotencyKey.objects.filter(date_created__lt=expired)
+        .order_by('date_created').values_list('pk', flat=True)[:batch_size]
+    )
+    if not pks:
+        return 0
+    deleted, _ = IdempotencyKey.objects.filter(pk__in=pks).delete()
+    return deleted
+
+
+class Command(BaseCommand):
+    help = 'Delete expired idempotency keys in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--loop', action='store_true', help='Keep sweeping until interrupted')
+        parser.add_argument('--interval', type=float, default=3600, help='Seconds between sweeps in loop mode')
+
+    def handle(self, *args, **options):
+        while True:
+            total = 0
+            while True:
+                deleted = purge_expired(options['batch_size'])
+                total += deleted
+                if deleted < options['batch_size']:
+                    break
+
+            if total or options['verbosity'] > 1:
+                self.stdout.write('Deleted {} idempotency key(s)'.format(total))
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,38 @@
+'''
+    Releases ticket holds whose payment window has lapsed
+'''
+
+# IMPORTS #
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.order.reservations import release_expired
+
+
+
+
+class Command(BaseCommand):
+    help = 'Release expired ticket reservations in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--loop', action='store_true', help='Keep sweeping until interrupted')
+        parser.add_argument('--interval', type=float, default=30, help='Seconds between sweeps in loop mode')
+
+    def handle(self, *args, **options):
+        while True:
+            total = 0
+            while True:
+                released = release_expired(options['batch_size'])
+                total += released
+                if released < options['batch_size']:
+                    break
+
+            if total or options['verbosity'] > 1:
+                self.stdout.write('Released {} reservation(s)'.format(total))
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,18 @@
+# Generated by Django 4.0.10 on 2026-10-18 19:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0002_reservation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='fulfillment_status',
+            field=models.CharField(choices=[('unfulfilled', 'Unfulfilled'), ('processing', 'Processing'), ('fulfilled', 'Fulfilled'), ('failed', 'Failed')], default='unfulfilled', max_length=25, verbose_name='Fulfillment Status'),
+        ),
+    ]
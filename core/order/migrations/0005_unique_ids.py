@@ -0,0 +1,24 @@
+# Generated by Django 4.0.10 on 2026-10-18 20:00
+
+import core.order.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0004_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='order',
+            name='order_id',
+            field=models.CharField(default=core.order.models.generate_order_id, max_length=25, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='purchasedticket',
+            name='qrcode_id',
+            field=models.CharField(default=core.order.models.generate_sold_ticket_id, max_length=25, unique=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.0.10 on 2026-10-18 20:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0005_unique_ids'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='order',
+            name='date_updated',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.0.10 on 2026-10-18 20:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0006_date_updated_auto_now'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='purchasedticket',
+            index=models.Index(fields=['purchased_date', 'id'], name='order_purch_purchas_c385cd_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.0.10 on 2026-10-18 20:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0007_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='purchasedticket',
+            name='checked_in_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Check-in Time'),
+        ),
+    ]
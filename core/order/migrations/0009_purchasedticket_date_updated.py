@@ -0,0 +1,22 @@
+# Generated by Django 4.0.10 on 2026-10-18 20:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0008_purchasedticket_checked_in_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='purchasedticket',
+            name='date_updated',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='purchasedticket',
+            index=models.Index(fields=['ticket', 'date_updated'], name='order_purch_ticket__db720c_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.0.10 on 2026-10-18 20:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0009_purchasedticket_date_updated'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='idempotencykey',
+            name='lease_expires_at',
+            field=models.DateTimeField(blank=True, help_text='A retry may take over a key still running after this', null=True),
+        ),
+    ]
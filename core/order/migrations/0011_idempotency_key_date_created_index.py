@@ -0,0 +1,17 @@
+# Generated by Django 4.0.10 on 2026-10-18 21:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0010_idempotency_key_lease'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='idempotencykey',
+            index=models.Index(fields=['date_created'], name='order_idemp_date_cr_825bec_idx'),
+        ),
+    ]
@@ -4,7 +4,6 @@
 
 # IMPORTS #
 
-import uuid
 from django.db import models
 from django.urls import reverse
 from django.utils import timezone
@@ -15,6 +14,7 @@ from core.event.models import (
     Ticket,
 )
 from core.user.models import User
+from api.ids import generate_id, generate_secret_id
 
 
 
@@ -22,29 +22,11 @@ from core.user.models import User
 # MODEL FUNCTIONS #
 
 def generate_order_id():
-    code = str(uuid.uuid4()).split("-")[-2]  #generate unique order id
-    time = timezone.now().strftime('%Y%m%d%H%M%S')
-    ucode = code + time
-    try:
-        qs_exists = Order.objects.filter(order_id=ucode).exists()
-        if qs_exists:
-            return generate_order_id()
-        else:
-            return ucode
-    except:
-        return ucode
+    return generate_id()
 
 
 def generate_sold_ticket_id():
-    code = str(uuid.uuid4()).split("-")[-1]  #generate unique ticket id
-    try:
-        qs_exists = PurchasedTicket.objects.filter(qrcode_id=code).exists()
-        if qs_exists:
-            return generate_sold_ticket_id
-        else:
-            return 't'+code
-    except:
-        return 't'+code
+    return generate_secret_id('t')
 
 
 
@@ -87,6 +69,13 @@ class Order(models.Model):
         ('failed', 'Failed'),
     )
 
+    fulfillment_status_choices = (
+        ('unfulfilled', 'Unfulfilled'),
+        ('processing', 'Processing'),
+        ('fulfilled', 'Fulfilled'),
+        ('failed', 'Failed'),
+    )
+
     user = models.ForeignKey(
         User,
         on_delete=models.SET_NULL,
@@ -110,7 +99,7 @@ class Order(models.Model):
     )
 
     order_id = models.CharField(
-        db_index=True,
+        unique=True,
         max_length=25,
         default=generate_order_id,
         #editable=False,
@@ -129,6 +118,15 @@ class Order(models.Model):
         verbose_name='Order Status',
     )
 
+    fulfillment_status = models.CharField(
+        max_length=25,
+        choices=fulfillment_status_choices,
+        default='unfulfilled',
+        blank=False,
+        null=False,
+        verbose_name='Fulfillment Status',
+    )
+
     paystack_payment_reference = models.CharField(
         max_length=100,
         verbose_name="Paystack Ref No."
@@ -140,7 +138,7 @@ class Order(models.Model):
     )
 
     date_updated = models.DateTimeField(
-        default=timezone.now,
+        auto_now=True,
         editable=False,
     )
 
@@ -156,6 +154,115 @@ class Order(models.Model):
 
 
 
+# RESERVATION MODEL #
+
+class Reservation(models.Model):
+
+    status_choices = (
+        ('held', 'Held'),
+        ('sold', 'Sold'),
+        ('released', 'Released'),
+    )
+
+    order = models.ForeignKey(
+        "Order",
+        on_delete=models.CASCADE,
+        related_name='reservations',
+    )
+
+    ticket = models.ForeignKey(
+        Ticket,
+        on_delete=models.CASCADE,
+        related_name='reservations',
+    )
+
+    quantity = models.PositiveIntegerField(
+        default=1,
+    )
+
+    status = models.CharField(
+        max_length=10,
+        choices=status_choices,
+        default='held',
+        verbose_name='Reservation Status',
+    )
+
+    expires_at = models.DateTimeField(
+        verbose_name='Hold Expiry',
+    )
+
+    date_created = models.DateTimeField(
+        auto_now_add=True,
+    )
+
+    class Meta:
+        verbose_name = "Reservation"
+        verbose_name_plural = "Reservations"
+        indexes = [
+            models.Index(fields=['status', 'expires_at']),
+        ]
+
+    def __str__(self):
+        return "{} - {}({})".format(self.order_id, self.ticket_id, self.quantity)
+
+
+
+
+# IDEMPOTENCY KEY MODEL #
+
+class IdempotencyKey(models.Model):
+
+    scope = models.CharField(
+        max_length=100,
+        help_text='View and user the key was used with',
+    )
+
+    key = models.CharField(
+        max_length=255,
+    )
+
+    fingerprint = models.CharField(
+        max_length=64,
+        help_text='Hash of the method, path and body of the first request',
+    )
+
+    status_code = models.PositiveSmallIntegerField(
+        blank=True,
+        null=True,
+        help_text='Empty while the first request is still running',
+    )
+
+    response = models.JSONField(
+        blank=True,
+        null=True,
+    )
+
+    lease_expires_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        help_text='A retry may take over a key still running after this',
+    )
+
+    date_created = models.DateTimeField(
+        auto_now_add=True,
+    )
+
+    class Meta:
+        verbose_name = "Idempotency Key"
+        verbose_name_plural = "Idempotency Keys"
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'key'], name='unique_idempotency_key'),
+        ]
+        indexes = [
+            models.Index(fields=['date_created']),
+        ]
+
+    def __str__(self):
+        return "{} - {}".format(self.scope, self.key)
+
+
+
+
 # PURCHASED TICKET MODEL #
 
 class PurchasedTicket(models.Model):
@@ -185,7 +292,7 @@ class PurchasedTicket(models.Model):
     )
 
     qrcode_id = models.CharField(
-        db_index=True,
+        unique=True,
         max_length=25,
         default=generate_sold_ticket_id,
         #editable=False,
@@ -211,12 +318,28 @@ class PurchasedTicket(models.Model):
         verbose_name='Check-in Status',
     )
 
+    checked_in_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name='Check-in Time',
+    )
+
+    date_updated = models.DateTimeField(
+        auto_now=True,
+        editable=False,
+    )
+
 #expired as function
 
     class Meta:
         verbose_name = "Purchased Ticket"
         verbose_name_plural = "Purchased Tickets"
         ordering = ['-purchased_date']
+        indexes = [
+            models.Index(fields=['purchased_date', 'id']),
+            models.Index(fields=['ticket', 'date_updated']),
+        ]
 
     def __str__(self):
         return "{} - {}({})".format(self.order.email, self.order.event.name, self.ticket.name)
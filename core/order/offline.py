@@ -0,0 +1,190 @@
+'''
+    This file builds the signed bundle gate devices check tickets against
+    while offline, and merges the check-ins they upload when they sync
+
+    A bundle holds the event's qrcode_ids in sorted order, so a device finds
+    a ticket with a binary search, and a bitmap where bit i is set when
+    ids[i] is already checked in. It is signed with HMAC-SHA256 under
+    CHECKIN_BUNDLE_KEY, which the devices are provisioned with, so that key
+    has to be set on its own rather than borrowed from SECRET_KEY. When gates
+    disagree about a ticket the earliest scan wins, and every sync reply
+    carries the tickets changed since the device's cursor so it can patch
+    its bundle instead of downloading it again.
+'''
+
+# IMPORTS #
+
+import base64
+import hashlib
+import hmac
+import json
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Case, DateTimeField, F, Q, Value, When
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.order.checkin import ADMITTED, DUPLICATE, INVALID, QRCODE_ID, event_tickets
+
+
+
+
+BUNDLE_VERSION = 1
+
+CHUNK_SIZE = 2000
+
+SYNC_BATCH_SIZE = 500
+
+# Rows committed while a cursor was being taken can carry an older date_updated
+CURSOR_OVERLAP = timezone.timedelta(seconds=5)
+
+
+
+
+class InvalidSync(Exception):
+    pass
+
+
+
+
+# SIGNING #
+
+def canonical(data):
+    return json.dumps(data, sort_keys=True, separators=(',', ':')).encode()
+
+
+def sign(data):
+    if not settings.CHECKIN_BUNDLE_KEY:
+        raise ImproperlyConfigured('Set CHECKIN_BUNDLE_KEY to sign offline check-in bundles')
+    return hmac.new(settings.CHECKIN_BUNDLE_KEY.encode(), canonical(data), hashlib.sha256).hexdigest()
+
+
+def verify(bundle):
+    data = dict(bundle)
+    signature = data.pop('signature', '')
+    return hmac.compare_digest(sign(data), signature)
+
+
+
+
+# BUNDLE #
+
+def bitmap(flags):
+    '''Pack booleans into base64, bit i of the result is flags[i] (LSB first)'''
+    bits = bytearray((len(flags) + 7) // 8)
+    for i, flag in enumerate(flags):
+        if flag:
+            bits[i >> 3] |= 1 << (i & 7)
+    return base64.b64encode(bytes(bits)).decode()
+
+
+def build_bundle(event_id, event_slug):
+    cursor = timezone.now()
+    rows = (
+        event_tickets(event_id)
+        .order_by('qrcode_id')
+        .values_list('qrcode_id', 'checkin_status')
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+    ids, flags = [], []
+    for qrcode_id, checkin_status in rows:
+        ids.append(qrcode_id)
+        flags.append(checkin_status != 'new')
+
+    bundle = {
+        'version': BUNDLE_VERSION,
+        'event': event_slug,
+        'cursor': cursor.isoformat(),
+        'count': len(ids),
+        'ids': ids,
+        'checked_in': bitmap(flags),
+    }
+    bundle['signature'] = sign(bundle)
+    return bundle
+
+
+
+
+# SYNC #
+
+def parse_time(value):
+    try:
+        value = parse_datetime(value) if isinstance(value, str) else None
+    except ValueError:
+        return None
+    if value is not None and timezone.is_naive(value):
+        value = timezone.make_aware(value, timezone.utc)
+    return value
+
+
+def parse_cursor(value):
+    cursor = parse_time(value)
+    if cursor is None:
+        raise InvalidSync('Cursor must be the ISO timestamp of the last bundle or sync')
+    return cursor
+
+
+def parse_scans(scans):
+    '''Turn the uploaded scans into (qrcode_id, scanned_at) pairs'''
+    if not isinstance(scans, list):
+        raise InvalidSync('Scans must be a list')
+    if len(scans) > settings.CHECKIN_SYNC_MAX_SCANS:
+        raise InvalidSync('At most {} scans per sync'.format(settings.CHECKIN_SYNC_MAX_SCANS))
+    if not all(isinstance(scan, dict) for scan in scans):
+        raise InvalidSync('Each scan needs a ticket and scanned_at')
+    return [(str(scan.get('ticket') or ''), parse_time(scan.get('scanned_at'))) for scan in scans]
+
+
+def merge(event_id, scans):
+    '''
+        Record offline scans, keeping the earliest check-in time of every
+        ticket, returns {qrcode_id: (result, checked_in_at)}
+    '''
+    now = timezone.now()
+    results, earliest = {}, {}
+    for qrcode_id, scanned_at in scans:
+        if scanned_at is None or not QRCODE_ID.match(qrcode_id):
+            results[qrcode_id] = (INVALID, None)
+            continue
+        # A device clock running ahead must not make its scan lose later on
+        scanned_at = min(scanned_at, now)
+        if qrcode_id not in earliest or scanned_at < earliest[qrcode_id]:
+            earliest[qrcode_id] = scanned_at
+
+    pending = list(earliest.items())
+    for start in range(0, len(pending), SYNC_BATCH_SIZE):
+        results.update(merge_batch(event_id, dict(pending[start:start + SYNC_BATCH_SIZE]), now))
+    return results
+
+
+def merge_batch(event_id, batch, now):
+    tickets = event_tickets(event_id).filter(qrcode_id__in=batch)
+    scanned_at = Case(
+        *[When(qrcode_id=qrcode_id, then=Value(at)) for qrcode_id, at in batch.items()],
+        output_field=DateTimeField(),
+    )
+    # One UPDATE whose WHERE compares against the stored time, so a
+    # concurrent sync can only ever move a check-in earlier
+    tickets.filter(Q(checked_in_at__isnull=True) | Q(checked_in_at__gt=scanned_at)).update(
+        checked_in_at=scanned_at,
+        checkin_status=Case(When(checkin_status='new', then=Value('in')), default=F('checkin_status')),
+        date_updated=now,
+    )
+
+    results = {qrcode_id: (INVALID, None) for qrcode_id in batch}
+    for qrcode_id, checked_in_at in tickets.values_list('qrcode_id', 'checked_in_at'):
+        won = checked_in_at == batch[qrcode_id]
+        results[qrcode_id] = (ADMITTED if won else DUPLICATE, checked_in_at)
+    return results
+
+
+def changes(event_id, since):
+    '''Every ticket added or checked in since the cursor, as [qrcode_id, checked_in]'''
+    return [
+        [qrcode_id, checkin_status != 'new']
+        for qrcode_id, checkin_status in event_tickets(event_id)
+        .filter(date_updated__gt=since - CURSOR_OVERLAP)
+        .order_by('qrcode_id')
+        .values_list('qrcode_id', 'checkin_status')
+    ]
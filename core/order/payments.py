@@ -0,0 +1,65 @@
+'''
+    This file records the outcome of order payments
+
+    Shared by client-driven verification and the Paystack webhook, so an
+    order is confirmed and fulfilled exactly once whichever arrives first.
+'''
+
+# IMPORTS #
+
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from core.event.inventory import InsufficientStock
+from core.order import reservations
+from core.order.models import Order
+from core.order.tasks import fulfill_order
+
+
+
+
+class PaymentMismatch(Exception):
+    pass
+
+
+
+
+def check_charge(order, data):
+    '''Raise PaymentMismatch unless the Paystack charge pays the order's total'''
+    currency = data.get('currency')
+    if currency != settings.PAYSTACK['CURRENCY']:
+        raise PaymentMismatch('Charged in {}, expected {}'.format(currency, settings.PAYSTACK['CURRENCY']))
+
+    # The total is sent to Paystack as the amount, see OrderPublicSerializer
+    try:
+        paid = Decimal(str(data.get('amount')))
+    except InvalidOperation:
+        raise PaymentMismatch('Charge has no amount')
+    total = order.get_total_amount()
+    if paid != total:
+        raise PaymentMismatch('Charged {}, order total is {}'.format(paid, total))
+
+
+def mark_paid(order, domain):
+    '''Confirm a successful payment, returns False if it was already recorded'''
+    try:
+        with transaction.atomic():
+            verified = Order.objects.filter(pk=order.pk).exclude(
+                order_status='success').update(order_status='success', date_updated=timezone.now())
+            if not verified:
+                return False
+
+            reservations.confirm(order)
+            fulfill_order.enqueue(order_pk=order.pk, domain=domain)
+    except InsufficientStock:
+        Order.objects.filter(pk=order.pk).update(order_status='failed', date_updated=timezone.now())
+        raise
+
+    return True
+
+
+def mark_failed(order):
+    reservations.release(order)
@@ -0,0 +1,137 @@
+'''
+    This file holds ticket stock for pending orders until payment is verified
+
+    Holds live on the Ticket.reserved counter, so availability never needs to
+    scan the orders table. Lapsed holds are released in batches by the
+    release_reservations management command. Free orders never get a payment
+    callback, they are confirmed when they are placed.
+'''
+
+# IMPORTS #
+
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from core.event import inventory
+from core.event.inventory import InsufficientStock
+from core.event.models import Ticket
+from core.job.queue import enqueue
+from core.order.models import Order, Reservation
+
+
+FULFILL_TASK = 'core.order.tasks.fulfill_order'
+
+
+
+
+def hold(order, items):
+    '''Reserve (ticket, quantity) pairs for the order, all or nothing'''
+    expires_at = timezone.now() + timezone.timedelta(minutes=settings.TICKET_RESERVATION_MINUTES)
+
+    with transaction.atomic():
+        for ticket, quantity in items:
+            inventory.reserve(ticket, quantity)
+
+        Reservation.objects.bulk_create([
+            Reservation(order=order, ticket=ticket, quantity=quantity, expires_at=expires_at)
+            for ticket, quantity in items
+        ])
+
+
+def confirm(order):
+    '''Turn the order's holds into sales, buying fresh stock for lapsed holds'''
+    reservations = list(order.reservations.exclude(status='sold').select_related('ticket'))
+
+    if not reservations and not order.reservations.exists():
+        # Orders placed before reservations existed
+        for tix in order.selected_ticket.select_related('item'):
+            inventory.sell(tix.item, tix.quantity)
+        return
+
+    for reservation in reservations:
+        held = Reservation.objects.filter(
+            pk=reservation.pk, status='held').update(status='sold')
+        inventory.sell(reservation.ticket, reservation.quantity, reserved=bool(held))
+        if not held:
+            Reservation.objects.filter(pk=reservation.pk).update(status='sold')
+
+
+def confirm_free(order_ids, domain=''):
+    '''
+        Sell the holds of orders that cost nothing and queue their tickets.
+        The sweeper has no request to take a domain from, fulfillment only
+        passes it along.
+    '''
+    for order in Order.objects.filter(pk__in=order_ids, order_status='pending'):
+        try:
+            with transaction.atomic():
+                if not Order.objects.filter(pk=order.pk, order_status='pending').update(
+                        order_status='success', date_updated=timezone.now()):
+                    continue
+                confirm(order)
+                enqueue(FULFILL_TASK, order_pk=order.pk, domain=domain)
+        except InsufficientStock:
+            Order.objects.filter(pk=order.pk).update(order_status='failed', date_updated=timezone.now())
+
+
+def free_orders(order_ids):
+    '''The pending orders among order_ids with no paid ticket held'''
+    paid = Reservation.objects.filter(
+        order_id__in=order_ids, ticket__price__gt=0,
+    ).values('order_id')
+    return set(Order.objects.filter(
+        pk__in=order_ids, order_status='pending',
+    ).exclude(pk__in=paid).values_list('pk', flat=True))
+
+
+def release(order):
+    '''Give back the order's holds and mark the order as failed'''
+    with transaction.atomic():
+        for reservation in order.reservations.filter(status='held').select_related('ticket'):
+            released = Reservation.objects.filter(
+                pk=reservation.pk, status='held').update(status='released')
+            if released:
+                inventory.release(reservation.ticket, reservation.quantity)
+
+        Order.objects.filter(pk=order.pk, order_status='pending').update(
+            order_status='failed', date_updated=timezone.now())
+
+
+def release_expired(batch_size=500):
+    '''Release one batch of lapsed holds, returns the number released or confirmed'''
+    batch = list(
+        Reservation.objects.filter(status='held', expires_at__lte=timezone.now())
+        .order_by('expires_at')
+        .values_list('pk', 'order_id', 'ticket_id', 'quantity')[:batch_size]
+    )
+    if not batch:
+        return 0
+
+    # Free orders placed before they were confirmed on creation
+    free = free_orders({row[1] for row in batch})
+    if free:
+        confirm_free(free)
+    confirmed = sum(1 for row in batch if row[1] in free)
+    batch = [row for row in batch if row[1] not in free]
+
+    with transaction.atomic():
+        batch = [
+            row for row in batch
+            if Reservation.objects.filter(pk=row[0], status='held').update(status='released')
+        ]
+
+        released = Counter()
+        for _, _, ticket_id, quantity in batch:
+            released[ticket_id] += quantity
+
+        for ticket_id, quantity in released.items():
+            inventory.release(Ticket(pk=ticket_id), quantity)
+
+        Order.objects.filter(
+            pk__in={row[1] for row in batch}, order_status='pending',
+        ).update(order_status='failed', date_updated=timezone.now())
+
+    return len(batch) + confirmed
@@ -0,0 +1,30 @@
+# IMPORTS #
+
+from django.utils import timezone
+
+from api.paystack import get_client
+from api.serializers.order_serializers import OrderPublicSerializer
+from core.job.queue import task
+from core.order import fulfillment
+from core.order.models import Order
+
+
+
+
+@task
+def initialize_payment(order_pk):
+    order = Order.objects.get(pk=order_pk)
+    if order.paystack_payment_reference:
+        return
+
+    data = OrderPublicSerializer(order).data
+    response = get_client().initialize_transaction(data)
+    Order.objects.filter(pk=order_pk).update(
+        paystack_payment_reference=response['data']['reference'],
+        date_updated=timezone.now(),
+    )
+
+
+@task
+def fulfill_order(order_pk, domain):
+    fulfillment.fulfill(order_pk, domain)
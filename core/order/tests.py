@@ -1,3 +1,531 @@
-from django.test import TestCase
+# IMPORTS #
 
-# Create your tests here.
+import json
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from api import qrcodes
+from core.event.inventory import InsufficientStock
+from core.event.tests import create_event, create_ticket
+from core.job.models import Job
+from core.notification.models import EmailOutbox
+from core.order import checkin, exports, fulfillment, offline, reservations, tokens
+from core.order.models import IdempotencyKey, Order, PurchasedTicket, Reservation, TicketOrder
+from core.user.models import User
+
+
+
+
+def bearer(user):
+    '''Authorization header for the user, verifying its email first'''
+    if not user.is_active:
+        user.is_active = True
+        user.save(update_fields=['is_active'])
+    return 'Bearer ' + user.tokens()['access']
+
+
+def create_order(event, items, email='fan@tikwey.local'):
+    order = Order.objects.create(event=event, email=email)
+    for ticket, quantity in items:
+        order.selected_ticket.add(TicketOrder.objects.create(item=ticket, quantity=quantity))
+    return order
+
+
+
+
+# RESERVATIONS #
+
+class HoldTests(TestCase):
+
+    def test_partial_hold_rolls_back(self):
+        event = create_event()
+        plenty = create_ticket(event, 'Regular', stock=5)
+        scarce = create_ticket(event, 'VIP', stock=1)
+        order = create_order(event, [(plenty, 2), (scarce, 3)])
+
+        with self.assertRaises(InsufficientStock):
+            reservations.hold(order, [(plenty, 2), (scarce, 3)])
+
+        plenty.refresh_from_db()
+        self.assertEqual(plenty.reserved, 0)
+        self.assertFalse(Reservation.objects.filter(order=order).exists())
+
+    def test_release_expired_fails_paid_orders(self):
+        ticket = create_ticket(price=1000)
+        order = create_order(ticket.event, [(ticket, 2)])
+        reservations.hold(order, [(ticket, 2)])
+        Reservation.objects.update(expires_at=timezone.now())
+
+        self.assertEqual(reservations.release_expired(), 1)
+
+        ticket.refresh_from_db()
+        order.refresh_from_db()
+        self.assertEqual((ticket.reserved, ticket.sold), (0, 0))
+        self.assertEqual(order.order_status, 'failed')
+
+    def test_release_expired_confirms_free_orders(self):
+        ticket = create_ticket(price=0)
+        order = create_order(ticket.event, [(ticket, 2)])
+        reservations.hold(order, [(ticket, 2)])
+        Reservation.objects.update(expires_at=timezone.now())
+
+        self.assertEqual(reservations.release_expired(), 1)
+
+        ticket.refresh_from_db()
+        order.refresh_from_db()
+        self.assertEqual((ticket.reserved, ticket.sold), (0, 2))
+        self.assertEqual(order.order_status, 'success')
+        self.assertTrue(Job.objects.filter(name=reservations.FULFILL_TASK, payload__order_pk=order.pk).exists())
+
+
+class FreeOrderTests(TestCase):
+
+    def test_free_order_is_confirmed_when_placed(self):
+        ticket = create_ticket(price=0)
+        response = self.client.post(
+            '/api/order/{}/buy-ticket/'.format(ticket.event.slug),
+            {'email': 'fan@tikwey.local', 'selected_ticket': [{'item': ticket.name, 'quantity': 1}]},
+            content_type='application/json', HTTP_HOST='localhost',
+        )
+
+        self.assertEqual(response.status_code, 200)
+        order = Order.objects.get(order_id=response.data)
+        ticket.refresh_from_db()
+        self.assertEqual(order.order_status, 'success')
+        self.assertEqual((ticket.reserved, ticket.sold), (0, 1))
+
+
+
+
+# FULFILLMENT #
+
+class FulfillmentTests(TestCase):
+
+    def setUp(self):
+        self.event = create_event()
+        self.regular = create_ticket(self.event, 'Regular')
+        self.vip = create_ticket(self.event, 'VIP')
+        self.order = create_order(self.event, [(self.regular, 2), (self.vip, 1)])
+
+    def status(self):
+        return Order.objects.values_list('fulfillment_status', flat=True).get(pk=self.order.pk)
+
+    def test_tickets_are_issued_with_one_insert_and_reused(self):
+        with CaptureQueriesContext(connection) as queries:
+            issued = fulfillment.issue_tickets(self.order)
+        inserts = [query for query in queries.captured_queries if query['sql'].startswith('INSERT')]
+
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(sorted(p_tix.ticket.name for p_tix in issued), ['Regular', 'Regular', 'VIP'])
+        again = fulfillment.issue_tickets(self.order)
+        self.assertEqual({p_tix.pk for p_tix in again}, {p_tix.pk for p_tix in PurchasedTicket.objects.all()})
+        self.assertEqual(PurchasedTicket.objects.count(), 3)
+
+    def test_fulfilled_once_with_one_email(self):
+        seen = []
+        send = fulfillment.Util.send_email_attach
+
+        def record(msg):
+            seen.append(self.status())
+            send(msg)
+
+        with mock.patch.object(fulfillment.Util, 'send_email_attach', side_effect=record):
+            fulfillment.fulfill(self.order.pk, '')
+            fulfillment.fulfill(self.order.pk, '')
+
+        self.assertEqual(seen, ['processing'])
+        self.assertEqual(self.status(), 'fulfilled')
+        email = EmailOutbox.objects.get()
+        self.assertEqual((email.recipient, email.template, len(email.tickets)), (self.order.email, 'ticket', 3))
+
+    def test_failure_is_retried_with_the_same_tickets(self):
+        with mock.patch.object(fulfillment.Util, 'send_email_attach', side_effect=RuntimeError('boom')):
+            with self.assertRaises(RuntimeError):
+                fulfillment.fulfill(self.order.pk, '')
+        self.assertEqual(self.status(), 'failed')
+        issued = set(PurchasedTicket.objects.values_list('pk', flat=True))
+
+        fulfillment.fulfill(self.order.pk, '')
+
+        self.assertEqual(self.status(), 'fulfilled')
+        self.assertEqual(set(PurchasedTicket.objects.values_list('pk', flat=True)), issued)
+        self.assertEqual(EmailOutbox.objects.count(), 1)
+
+
+class FulfillmentStatusTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        ticket = create_ticket()
+        self.event = ticket.event
+        self.order = create_order(self.event, [(ticket, 1)], email='buyer@tikwey.local')
+        fulfillment.fulfill(self.order.pk, '')
+
+    def get(self, user=None):
+        headers = {'HTTP_AUTHORIZATION': bearer(user)} if user else {}
+        return self.client.get(
+            '/api/order/{}/fulfillment/'.format(self.order.order_id), HTTP_HOST='localhost', **headers,
+        )
+
+    def test_buyer_and_host_see_the_tickets(self):
+        buyer = User.objects.create_user('buyer@tikwey.local', 'buyer', None)
+        for user in (buyer, self.event.user):
+            response = self.get(user)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data['fulfillment_status'], 'fulfilled')
+            self.assertEqual(len(response.data['tickets']), 1)
+
+    def test_anyone_else_does_not(self):
+        self.assertEqual(self.get().status_code, 401)
+        stranger = User.objects.create_user('stranger@tikwey.local', 'stranger', None)
+        response = self.get(stranger)
+        self.assertEqual(response.status_code, 400)
+        self.assertNotIn('tickets', response.data)
+
+
+
+
+# IDEMPOTENCY #
+
+class IdempotencyTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.ticket = create_ticket(price=0)
+
+    def buy(self, key='order-1', quantity=1, address='127.0.0.1'):
+        return self.client.post(
+            '/api/order/{}/buy-ticket/'.format(self.ticket.event.slug),
+            {'email': 'fan@tikwey.local', 'selected_ticket': [{'item': self.ticket.name, 'quantity': quantity}]},
+            content_type='application/json', HTTP_HOST='localhost', HTTP_IDEMPOTENCY_KEY=key,
+            REMOTE_ADDR=address,
+        )
+
+    def crash(self, lease_expires_at):
+        # Leave the key as a process that died mid-request would
+        IdempotencyKey.objects.update(status_code=None, response=None, lease_expires_at=lease_expires_at)
+        cache.clear()
+
+    def test_repeat_replays_the_first_response(self):
+        first = self.buy()
+        second = self.buy()
+
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_different_request_with_same_key_is_rejected(self):
+        self.buy()
+        self.assertEqual(self.buy(quantity=2).status_code, 422)
+
+    def test_running_key_is_still_in_progress(self):
+        self.buy()
+        self.crash(timezone.now() + timezone.timedelta(minutes=1))
+
+        self.assertEqual(self.buy().status_code, 409)
+
+    def test_retry_takes_over_key_after_lease_runs_out(self):
+        self.buy()
+        self.crash(timezone.now() - timezone.timedelta(seconds=1))
+
+        response = self.buy()
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Idempotent-Replayed', response)
+        record = IdempotencyKey.objects.get()
+        self.assertEqual((record.status_code, record.response), (200, response.data))
+        self.assertEqual(self.buy().data, response.data)
+
+    def test_anonymous_clients_do_not_share_keys(self):
+        self.buy()
+        response = self.buy(quantity=2, address='10.0.0.2')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Idempotent-Replayed', response)
+        self.assertEqual(IdempotencyKey.objects.values('scope').distinct().count(), 2)
+
+    def test_purge_deletes_only_expired_keys(self):
+        self.buy('order-1')
+        self.buy('order-2')
+        expired = timezone.now() - timezone.timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL + 1)
+        IdempotencyKey.objects.filter(key='order-1').update(date_created=expired)
+
+        call_command('purge_idempotency_keys', batch_size=1, stdout=StringIO())
+
+        self.assertEqual(list(IdempotencyKey.objects.values_list('key', flat=True)), ['order-2'])
+
+
+
+
+# CHECK-IN #
+
+class ScanTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.ticket = create_ticket()
+        self.event = self.ticket.event
+        # Doors are open, so the ticket's token is valid
+        self.event.start_date = timezone.now()
+        self.event.save()
+        order = create_order(self.event, [(self.ticket, 1)])
+        self.purchased = PurchasedTicket.objects.create(order=order, ticket=self.ticket)
+        self.host = self.event.user
+
+    def scan(self, payload=None, direction=None):
+        data = {'payload': tokens.ticket_token(self.purchased) if payload is None else payload}
+        if direction:
+            data['direction'] = direction
+        return self.client.post(
+            '/api/order/checkin/{}/scan/'.format(self.event.slug), data,
+            content_type='application/json', HTTP_HOST='localhost',
+            HTTP_AUTHORIZATION=bearer(self.host),
+        )
+
+    def test_ticket_is_admitted_once(self):
+        first = self.scan()
+        second = self.scan()
+
+        self.assertEqual((first.status_code, first.data['result']), (200, checkin.ADMITTED))
+        self.assertEqual((second.status_code, second.data['result']), (409, checkin.DUPLICATE))
+        self.assertEqual(second.data['checked_in_at'], first.data['checked_in_at'])
+
+    def test_exit_and_reentry(self):
+        self.assertEqual(self.scan(direction='out').status_code, 409)
+        first = self.scan()
+
+        left = self.scan(direction='out')
+        self.assertEqual((left.status_code, left.data['result']), (200, checkin.EXITED))
+        self.assertEqual(self.scan(direction='out').status_code, 409)
+        self.purchased.refresh_from_db()
+        self.assertEqual(self.purchased.checkin_status, 'out')
+
+        back = self.scan()
+        self.assertEqual((back.status_code, back.data['result']), (200, checkin.ADMITTED))
+        self.assertEqual(back.data['checked_in_at'], first.data['checked_in_at'])
+        self.assertEqual(self.scan().status_code, 409)
+
+    def test_payload_must_be_a_string(self):
+        for payload in (123, ['t' + 'a' * 20], {'id': 1}):
+            response = self.scan(payload)
+            self.assertEqual((response.status_code, response.data['result']), (400, checkin.INVALID))
+        self.assertEqual(self.scan(direction='sideways').status_code, 400)
+
+    def test_forged_tokens_are_refused(self):
+        token = tokens.ticket_token(self.purchased)
+        kid, qrcode_id, event_id, ticket_id, not_before, expires, signature = token.split('.')
+        other = create_ticket(create_event('Other Show'))
+        other_order = create_order(other.event, [(other, 1)])
+        elsewhere = PurchasedTicket.objects.create(order=other_order, ticket=other)
+        forged = {
+            'signature': '.'.join([kid, qrcode_id, event_id, ticket_id, not_before, expires, 'A' * len(signature)]),
+            'ticket': '.'.join([kid, elsewhere.qrcode_id, event_id, ticket_id, not_before, expires, signature]),
+            'expiry': '.'.join([kid, qrcode_id, event_id, ticket_id, not_before, tokens.base36(2 ** 40), signature]),
+            'kid': '.'.join(['k9', qrcode_id, event_id, ticket_id, not_before, expires, signature]),
+            'other event': tokens.ticket_token(elsewhere),
+        }
+        # Knowing SECRET_KEY is not enough to sign tickets
+        with self.settings(TICKET_SIGNING_KEYS=[tokens.DERIVED_KID + ':' + settings.SECRET_KEY]):
+            forged['secret key'] = tokens.ticket_token(self.purchased)
+
+        for name, payload in forged.items():
+            response = self.scan(payload)
+            self.assertEqual((response.status_code, response.data['result']), (400, checkin.INVALID), name)
+        self.purchased.refresh_from_db()
+        self.assertEqual(self.purchased.checkin_status, 'new')
+
+    def test_unsigned_codes_need_the_migration_switch(self):
+        self.assertEqual(self.scan(self.purchased.qrcode_id).status_code, 400)
+        with self.settings(CHECKIN_ACCEPT_UNSIGNED=True):
+            self.assertEqual(self.scan(self.purchased.qrcode_id).status_code, 200)
+
+    def test_only_the_host_can_scan(self):
+        self.host = create_event('Other Show').user
+        self.assertEqual(self.scan().status_code, 403)
+
+
+@override_settings(CHECKIN_BUNDLE_KEY='gate-devices-key')
+class OfflineCheckInTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.ticket = create_ticket()
+        self.event = self.ticket.event
+        order = create_order(self.event, [(self.ticket, 3)])
+        self.tickets = sorted(
+            (PurchasedTicket.objects.create(order=order, ticket=self.ticket) for _ in range(3)),
+            key=lambda purchased: purchased.qrcode_id,
+        )
+        self.url = '/api/order/checkin/{}/{{}}/'.format(self.event.slug)
+        self.auth = bearer(self.event.user)
+
+    def bundle(self):
+        return self.client.get(self.url.format('bundle'), HTTP_HOST='localhost', HTTP_AUTHORIZATION=self.auth)
+
+    def sync(self, cursor, scans):
+        return self.client.post(
+            self.url.format('sync'), {'cursor': cursor, 'scans': scans},
+            content_type='application/json', HTTP_HOST='localhost', HTTP_AUTHORIZATION=self.auth,
+        )
+
+    def test_bundle_is_signed(self):
+        checkin.scan(self.event.pk, self.tickets[1].qrcode_id)
+        bundle = self.bundle().data
+
+        self.assertEqual(bundle['ids'], [purchased.qrcode_id for purchased in self.tickets])
+        self.assertEqual(offline.bitmap([False, True, False]), bundle['checked_in'])
+        self.assertTrue(offline.verify(bundle))
+        self.assertFalse(offline.verify(dict(bundle, checked_in=offline.bitmap([True, True, False]))))
+        self.assertFalse(offline.verify(dict(bundle, ids=bundle['ids'] + ['tforgedticket0000'])))
+        with self.settings(CHECKIN_BUNDLE_KEY='another-key'):
+            self.assertFalse(offline.verify(bundle))
+
+    def test_bundle_needs_its_own_key(self):
+        with self.settings(CHECKIN_BUNDLE_KEY=''):
+            with self.assertRaises(ImproperlyConfigured):
+                offline.build_bundle(self.event.pk, self.event.slug)
+
+    def test_sync_returns_only_changes_since_the_cursor(self):
+        cursor = self.bundle().data['cursor']
+        # Tickets untouched since well before the bundle stay out of the delta
+        PurchasedTicket.objects.update(date_updated=timezone.now() - timezone.timedelta(minutes=5))
+        online, offline_scan, untouched = self.tickets[0], self.tickets[1], self.tickets[2]
+        checkin.scan(self.event.pk, online.qrcode_id)
+
+        scanned_at = timezone.now() - timezone.timedelta(minutes=1)
+        response = self.sync(cursor, [
+            {'ticket': offline_scan.qrcode_id, 'scanned_at': scanned_at.isoformat()},
+            {'ticket': online.qrcode_id, 'scanned_at': timezone.now().isoformat()},
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        results = {result['ticket']: result['result'] for result in response.data['results']}
+        self.assertEqual(results, {offline_scan.qrcode_id: checkin.ADMITTED, online.qrcode_id: checkin.DUPLICATE})
+        self.assertEqual(
+            response.data['changes'],
+            sorted([[online.qrcode_id, True], [offline_scan.qrcode_id, True]]),
+        )
+        self.assertNotIn(untouched.qrcode_id, str(response.data['changes']))
+
+
+class QRCodeTests(TestCase):
+
+    def setUp(self):
+        self.ticket = create_ticket()
+        self.event = self.ticket.event
+        self.buyer = User.objects.create_user('buyer@tikwey.local', 'buyer', None)
+        order = create_order(self.event, [(self.ticket, 1)], email=self.buyer.email)
+        order.user = self.buyer
+        order.save()
+        self.purchased = PurchasedTicket.objects.create(order=order, ticket=self.ticket)
+
+    def get(self, user=None):
+        headers = {'HTTP_AUTHORIZATION': bearer(user)} if user else {}
+        return self.client.get(
+            '/api/order/purchased-tickets/{}/{}/qrcode/'.format(self.event.slug, self.purchased.qrcode_id),
+            {'type': 'svg'}, HTTP_HOST='localhost', **headers,
+        )
+
+    def test_buyer_and_host_get_the_code(self):
+        for user in (self.buyer, self.event.user):
+            response = self.get(user)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['Content-Type'], 'image/svg+xml')
+
+    def test_anyone_else_does_not(self):
+        self.assertEqual(self.get().status_code, 401)
+        stranger = User.objects.create_user('stranger@tikwey.local', 'stranger', None)
+        self.assertEqual(self.get(stranger).status_code, 404)
+
+    def test_batch_matches_single_renders(self):
+        payloads = [tokens.ticket_token(self.purchased) + str(i) for i in range(8)]
+        self.addCleanup(lambda: qrcodes.pools.pop(2).shutdown())
+
+        # A low threshold sends even this small batch through the process pool
+        with mock.patch.object(qrcodes, 'POOL_THRESHOLD', 4):
+            for format in qrcodes.FORMATS:
+                self.assertEqual(
+                    qrcodes.render_batch(payloads, format, workers=2),
+                    [qrcodes.draw(payload, format) for payload in payloads],
+                )
+        self.assertIn(2, qrcodes.pools)
+
+    def test_auto_stays_within_the_max_version(self):
+        payload = tokens.ticket_token(self.purchased)
+        strongest = qrcodes.encode(payload, 'png', qrcodes.BOX_SIZE, 'H').version
+
+        with override_settings(QRCODE_MAX_VERSION=strongest - 1):
+            qr = qrcodes.encode(payload, 'png', qrcodes.BOX_SIZE, qrcodes.AUTO)
+
+        self.assertLessEqual(qr.version, strongest - 1)
+        self.assertNotEqual(qr.error_correction, qrcodes.ERROR_CORRECTION['H'])
+
+
+
+
+# ATTENDEE EXPORT #
+
+class AttendeeExportTests(TestCase):
+
+    def setUp(self):
+        self.ticket = create_ticket()
+        self.event = self.ticket.event
+        self.purchased = [
+            PurchasedTicket.objects.create(
+                order=create_order(self.event, [(self.ticket, 1)], email=email), ticket=self.ticket,
+            )
+            for email in ('ada@tikwey.local', 'grace@tikwey.local')
+        ]
+
+    def export(self, type=None, user=None):
+        params = {'type': type} if type else {}
+        return self.client.get(
+            '/api/order/purchased-tickets/{}/export/'.format(self.event.slug), params,
+            HTTP_HOST='localhost', HTTP_AUTHORIZATION=bearer(user or self.event.user),
+        )
+
+    def body(self, response):
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv(self):
+        response = self.export('csv')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('-attendees.csv"', response['Content-Disposition'])
+        lines = self.body(response).splitlines()
+        self.assertEqual(lines[0], ','.join(exports.COLUMNS))
+        self.assertEqual(
+            [line.split(',')[:3] for line in lines[1:]],
+            [[ticket.qrcode_id, ticket.order.email, 'Regular'] for ticket in self.purchased],
+        )
+
+    def test_ndjson(self):
+        response = self.export('ndjson')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in self.body(response).splitlines()]
+        self.assertEqual(
+            [(row['ticket_id'], row['email'], row['checkin_status']) for row in rows],
+            [(ticket.qrcode_id, ticket.order.email, ticket.checkin_status) for ticket in self.purchased],
+        )
+
+    def test_csv_is_the_default(self):
+        self.assertEqual(self.export()['Content-Type'], 'text/csv')
+
+    def test_unknown_type_is_rejected(self):
+        self.assertEqual(self.export('xlsx').status_code, 400)
+
+    def test_only_the_host_exports(self):
+        stranger = User.objects.create_user('stranger@tikwey.local', 'stranger', None)
+        self.assertEqual(self.export('csv', stranger).status_code, 403)
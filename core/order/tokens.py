@@ -0,0 +1,139 @@
+'''
+    This file signs the tokens printed in ticket QR codes
+
+    A token reads kid.qrcode_id.event.ticket.not_before.expires.signature,
+    the numbers in base 36 and the signature the first 16 bytes of an
+    HMAC-SHA256 over everything before it, base64url encoded. A scanner
+    holding the keys checks a token without touching the database. New
+    tickets are signed with the first key of TICKET_SIGNING_KEYS and any of
+    them verifies, so a key is rotated in by putting it first and retired
+    by removing it once the tickets it signed have expired. Without
+    configured keys the tokens are signed with a key derived from
+    SECRET_KEY under its own salt, never with SECRET_KEY itself.
+'''
+
+# IMPORTS #
+
+import base64
+import hashlib
+import hmac
+from collections import OrderedDict, namedtuple
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.crypto import salted_hmac
+
+
+
+
+DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+
+SIGNATURE_BYTES = 16
+
+KEY_SALT = 'core.order.tokens.ticket-signing'
+
+# Key id of the key derived from SECRET_KEY
+DERIVED_KID = 'd1'
+
+TicketClaim = namedtuple('TicketClaim', 'qrcode_id event_id ticket_id not_before expires')
+
+
+
+
+class InvalidToken(Exception):
+    pass
+
+
+
+
+# KEYS #
+
+@lru_cache(maxsize=4)
+def parse_keys(keys):
+    parsed = OrderedDict()
+    for pair in keys:
+        kid, _, secret = pair.partition(':')
+        if not kid or not secret or '.' in kid:
+            raise ValueError('TICKET_SIGNING_KEYS entries must look like kid:secret')
+        parsed[kid] = secret.encode()
+    if not parsed:
+        raise ValueError('TICKET_SIGNING_KEYS needs at least one key')
+    return parsed
+
+
+@lru_cache(maxsize=4)
+def derived_keys(secret):
+    return ('{}:{}'.format(DERIVED_KID, salted_hmac(KEY_SALT, 'ticket-tokens', secret=secret).hexdigest()),)
+
+
+def signing_keys():
+    keys = tuple(settings.TICKET_SIGNING_KEYS) or derived_keys(settings.SECRET_KEY)
+    return parse_keys(keys)
+
+
+
+
+# ENCODING #
+
+def base36(number):
+    if number < 0:
+        raise ValueError('Negative numbers are not encoded')
+    digits = ''
+    while True:
+        number, remainder = divmod(number, 36)
+        digits = DIGITS[remainder] + digits
+        if not number:
+            return digits
+
+
+def digest(key, message):
+    mac = hmac.new(key, message.encode(), hashlib.sha256).digest()[:SIGNATURE_BYTES]
+    return base64.urlsafe_b64encode(mac).rstrip(b'=').decode()
+
+
+
+
+# TOKENS #
+
+def make_token(qrcode_id, event_id, ticket_id, not_before, expires):
+    kid, key = next(iter(signing_keys().items()))
+    message = '.'.join([
+        kid, qrcode_id, base36(event_id), base36(ticket_id),
+        base36(int(not_before.timestamp())), base36(int(expires.timestamp())),
+    ])
+    return '{}.{}'.format(message, digest(key, message))
+
+
+def ticket_token(purchased_ticket):
+    '''The token for a purchased ticket, valid around its event's dates'''
+    event = purchased_ticket.ticket.event
+    grace = timezone.timedelta(hours=settings.TICKET_TOKEN_GRACE_HOURS)
+    return make_token(
+        purchased_ticket.qrcode_id, event.pk, purchased_ticket.ticket_id,
+        event.start_date - grace, event.end_date + grace,
+    )
+
+
+def read_token(token, now=None):
+    '''Verify a token and return its TicketClaim, raises InvalidToken'''
+    parts = token.split('.')
+    if len(parts) != 7:
+        raise InvalidToken('Malformed ticket token')
+
+    kid, qrcode_id, event_id, ticket_id, not_before, expires, signature = parts
+    key = signing_keys().get(kid)
+    if key is None:
+        raise InvalidToken('Ticket signed with an unknown key')
+    if not hmac.compare_digest(digest(key, token[:-len(signature) - 1]), signature):
+        raise InvalidToken('Ticket signature does not match')
+
+    try:
+        claim = TicketClaim(qrcode_id, int(event_id, 36), int(ticket_id, 36), int(not_before, 36), int(expires, 36))
+    except ValueError:
+        raise InvalidToken('Malformed ticket token')
+
+    now = (now or timezone.now()).timestamp()
+    if not claim.not_before <= now <= claim.expires:
+        raise InvalidToken('Ticket is not valid at this time')
+    return claim
@@ -9,8 +9,14 @@ from core.order.views import (
     create_order_view,
     order_summary_view,
     order_payment_view,
+    order_fulfillment_view,
     purchased_ticket_list_view,
+    attendee_export_view,
     purchased_ticket_detail_view,
+    purchased_ticket_qrcode_view,
+    checkin_scan_view,
+    checkin_bundle_view,
+    checkin_sync_view,
 )
 
 
@@ -20,6 +26,12 @@ urlpatterns = [
     path('<slug:event>/buy-ticket/', create_order_view, name='create-order'),
     path('<str:order_id>/summary/', order_summary_view, name='order-summary'),
     path('<str:order_id>/verify-payment/<str:reference>/', order_payment_view, name='payment-order'),
+    path('<str:order_id>/fulfillment/', order_fulfillment_view, name='order-fulfillment'),
     path('purchased-tickets/<slug:event_slug>/', purchased_ticket_list_view, name='purchased-ticket-list'),
+    path('purchased-tickets/<slug:event_slug>/export/', attendee_export_view, name='attendee-export'),
     path('purchased-tickets/<slug:event_slug>/<str:qrcode_id>/', purchased_ticket_detail_view, name='purchased-ticket-detail'),
+    path('purchased-tickets/<slug:event_slug>/<str:qrcode_id>/qrcode/', purchased_ticket_qrcode_view, name='purchased-ticket-qrcode'),
+    path('checkin/<slug:event_slug>/scan/', checkin_scan_view, name='checkin-scan'),
+    path('checkin/<slug:event_slug>/bundle/', checkin_bundle_view, name='checkin-bundle'),
+    path('checkin/<slug:event_slug>/sync/', checkin_sync_view, name='checkin-sync'),
 ]
\ No newline at end of file
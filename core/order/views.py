@@ -1,28 +1,36 @@
 # IMPORTS #
 
-import requests
-
 from django.conf import settings
+from django.db.models import Q
+from django.http import HttpResponse, HttpResponseNotModified, StreamingHttpResponse
 from django.shortcuts import redirect
+from django.utils import timezone
+from django.utils.http import parse_etags
 from django.contrib.sites.shortcuts import get_current_site
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.exceptions import NotFound, PermissionDenied
+from rest_framework.permissions import IsAuthenticated
 
 from rest_framework.generics import (
     GenericAPIView,
     ListAPIView,
-    RetrieveUpdateAPIView,
+    RetrieveAPIView,
 )
 from api.serializers.order_serializers import (
     UserOrderSerializer,
     OrderSerializer,
-    OrderPublicSerializer,
     OrderSummarySerializer,
+    OrderFulfillmentSerializer,
     PurchasedTicketListSerializer,
     PurchasedTicketDetailSerializer,
 )
-from api.utils import Util
+from api import qrcodes
+from api.cache import make_key, remember
+from api.mixins import ConditionalGetMixin, IdempotencyMixin
+from api.pagination import PurchasedTicketPagination
+from api.paystack import GatewayUnavailable, PaystackError, get_client
 from core.order.models import (
     Order,
     PurchasedTicket,
@@ -31,13 +39,17 @@ from core.event.models import(
     Ticket,
     Event,
 )
+from core.event.inventory import InsufficientStock
+from core.order import checkin, exports, offline, payments, reservations
+from core.order.tasks import initialize_payment
+from core.order.tokens import ticket_token
 
 
 
 
 # CREATE ORDER VIEW #
 
-class OrderAPIView(GenericAPIView):
+class OrderAPIView(IdempotencyMixin, GenericAPIView):
 
     queryset = Order.objects.all()
     serializer_class = OrderSerializer
@@ -71,23 +83,13 @@ class OrderAPIView(GenericAPIView):
             else:
                 serializer.save(event=event_obj)
 
-            new_order = Order.objects.get(order_id=serializer.data['order_id'])
-            pay_info = OrderPublicSerializer(new_order)
-            data = pay_info.data
-            new_order_id = new_order.order_id
-
-            if float(data['amount']) > 0:
-                url = 'https://api.paystack.co/transaction/initialize'
-                headers = {"authorization": f"Bearer {settings.PAYSTACK_SECRET_KEY}"}
-            
-                r = requests.post(url, headers=headers, data=data)
-                response = r.json()
-                print(response)
-                new_order.paystack_payment_reference = response['data']['reference']
-                new_order.save()
-                return Response(new_order_id, status=status.HTTP_200_OK)
+            new_order = serializer.instance
+            if new_order.get_total_amount() > 0:
+                initialize_payment.enqueue(order_pk=new_order.pk)
             else:
-                return Response(new_order_id, status=status.HTTP_200_OK)
+                reservations.confirm_free([new_order.pk], get_current_site(request).domain)
+
+            return Response(new_order.order_id, status=status.HTTP_200_OK)
                 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -101,10 +103,11 @@ create_order_view = OrderAPIView.as_view()
 # ORDER SUMMARY
 # ==============================================================================
 
-class OrderSummaryAPIView(GenericAPIView):
+class OrderSummaryAPIView(ConditionalGetMixin, GenericAPIView):
     queryset = Order.objects.all()
     serializer_class = OrderSummarySerializer
     pagination_class = None
+    lookup_field = 'order_id'
 
     # GET # 
     def get(self, request, order_id, *args, **kwargs):
@@ -128,7 +131,8 @@ order_summary_view = OrderSummaryAPIView.as_view()
 # ORDER PAYMENT
 # ==============================================================================
 
-class VerifyOrderPaymentAPIView(APIView):
+class VerifyOrderPaymentAPIView(IdempotencyMixin, APIView):
+    idempotent_methods = ('GET',)
 
     # GET #
     def get(self, request, order_id, reference):
@@ -145,53 +149,48 @@ class VerifyOrderPaymentAPIView(APIView):
 
         reference = order_obj.paystack_payment_reference
 
-        url = 'https://api.paystack.co/transaction/verify/{}'.format(reference)
-
-        headers = {"authorization": f"Bearer {settings.PAYSTACK_SECRET_KEY}"}
-
-        r = requests.get(url, headers=headers)
-        response = r.json()
+        try:
+            response = get_client().verify_transaction(reference)
+        except GatewayUnavailable as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        except PaystackError as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
         payment_status = response['data']['status']
 
         if payment_status == 'success':
-            if order_obj.order_status == payment_status.upper():
+            try:
+                payments.check_charge(order_obj, response['data'])
+            except payments.PaymentMismatch as e:
+                return Response(
+                    {'error': '{}, the payment will be reviewed'.format(e)},
+                    status=status.HTTP_409_CONFLICT
+                )
+
+            try:
+                verified = payments.mark_paid(order_obj, get_current_site(self.request).domain)
+            except InsufficientStock as e:
+                return Response(
+                    {'error': '{}, your payment will be refunded'.format(e)},
+                    status=status.HTTP_409_CONFLICT
+                )
+
+            if not verified:
                 return Response(
                     {'success': 'Your transaction has already been verified'},
                     status=status.HTTP_200_OK
                 )
-            order_obj.order_status = payment_status.upper()
-            order_obj.save()
-
-            current_site=get_current_site(self.request).domain
-
-            for ticket in order_obj.selected_ticket.annotate():
-                quantity = 0
-                while quantity < ticket.quantity:
-                    p_tix = PurchasedTicket.objects.create(
-                        order=order_obj,
-                        ticket=ticket.item,
-                    )
-
-                    qrcode_url = 'http://'+current_site+p_tix.get_absolute_url()
-                    data = {
-                        'url': qrcode_url,
-                        'ticket': p_tix.qrcode_id
-                    }
-                    Util.generate_qrcode(data)
-                    p_tix.save()
-
-                    msg = {
-                        'subject': 'Ticket for {}'.format(p_tix.ticket.event.name),
-                        'recipient': p_tix.order.email,
-                        'ticket': p_tix.qrcode_id
-                    }
-                    Util.send_email_attach(msg)
-
-                    quantity += 1
-                    
             return Response(response, status=status.HTTP_200_OK)
 
+        if payment_status == 'failed':
+            payments.mark_failed(order_obj)
+
         return Response(response, status=status.HTTP_400_BAD_REQUEST)
 
 
@@ -200,6 +199,42 @@ order_payment_view = VerifyOrderPaymentAPIView.as_view()
 
 
 
+# ==============================================================================
+# ORDER FULFILLMENT STATUS
+# ==============================================================================
+
+class OrderFulfillmentAPIView(ConditionalGetMixin, GenericAPIView):
+    queryset = Order.objects.all()
+    serializer_class = OrderFulfillmentSerializer
+    pagination_class = None
+    lookup_field = 'order_id'
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        '''Orders the user placed, by account or email, or placed for an event they host'''
+        user = self.request.user
+        if user.is_staff:
+            return self.queryset
+        return self.queryset.filter(Q(user=user) | Q(email=user.email) | Q(event__user=user))
+
+    # GET #
+    def get(self, request, order_id, *args, **kwargs):
+        try:
+            order_obj = self.get_queryset().get(order_id=order_id)
+        except Order.DoesNotExist:
+            return Response(
+                {'error': 'This order is not available'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        serializer = self.serializer_class(order_obj)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+order_fulfillment_view = OrderFulfillmentAPIView.as_view()
+
+
+
+
 # ==============================================================================
 # PURCHASED TICKET LIST
 # ==============================================================================
@@ -207,24 +242,27 @@ order_payment_view = VerifyOrderPaymentAPIView.as_view()
 class PurchasedTicketListAPIView(GenericAPIView):
     queryset = PurchasedTicket.objects.all()
     serializer_class = PurchasedTicketListSerializer
+    pagination_class = PurchasedTicketPagination
 
     # GET # 
     def get(self, request, event_slug, *args, **kwargs):
         try:
             event_obj = Event.events.published().get(slug=event_slug)
-            purchased_tickets = self.queryset.filter(ticket__event=event_obj)
+            purchased_tickets = self.queryset.filter(
+                ticket__event=event_obj).select_related('order', 'ticket')
         except Event.DoesNotExist:
             return Response(
                 {'error': 'This event is not available'},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+        page = self.paginate_queryset(purchased_tickets)
         serializer = self.serializer_class(
-            purchased_tickets,
+            page,
             many=True,
             context={"request": request},
         )
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return self.get_paginated_response(serializer.data)
 
 
 purchased_ticket_list_view = PurchasedTicketListAPIView.as_view()
@@ -232,13 +270,224 @@ purchased_ticket_list_view = PurchasedTicketListAPIView.as_view()
 
 
 
+# ==============================================================================
+# ATTENDEE EXPORT
+# ==============================================================================
+
+class AttendeeExportAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    # GET #
+    def get(self, request, event_slug, *args, **kwargs):
+        # ?format= is taken by DRF's renderer override
+        format = request.query_params.get('type', 'csv')
+        if format not in exports.FORMATS:
+            return Response(
+                {'error': 'Type must be one of {}'.format(', '.join(exports.FORMATS))},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            event_obj = Event.objects.get(slug=event_slug)
+        except Event.DoesNotExist:
+            return Response(
+                {'error': 'This event is not available'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if event_obj.user_id != request.user.pk and not request.user.is_staff:
+            return Response(
+                {'error': 'Only the host can export attendees'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        response = StreamingHttpResponse(
+            exports.export(event_obj, format), content_type=exports.FORMATS[format],
+        )
+        response['Content-Disposition'] = 'attachment; filename="{}-attendees.{}"'.format(event_obj.slug, format)
+        return response
+
+
+attendee_export_view = AttendeeExportAPIView.as_view()
+
+
+
+
 # ==============================================================================
 # PURCHASED TICKET DETAIL
 # ==============================================================================
 
-class PurchasedTicketDetailAPIView(RetrieveUpdateAPIView):
+class PurchasedTicketDetailAPIView(RetrieveAPIView):
     queryset = PurchasedTicket.objects.all()
     serializer_class = PurchasedTicketDetailSerializer
     lookup_field = 'qrcode_id'
 
+    def get_queryset(self):
+        # Check-in goes through the scan endpoint
+        return self.queryset.filter(
+            ticket__event__slug=self.kwargs['event_slug']).select_related('order', 'ticket__event')
+
+
 purchased_ticket_detail_view = PurchasedTicketDetailAPIView.as_view()
+
+
+
+
+# ==============================================================================
+# PURCHASED TICKET QR CODE
+# ==============================================================================
+
+class PurchasedTicketQRCodeAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        '''Tickets the user bought, or any ticket of an event they host'''
+        queryset = PurchasedTicket.objects.select_related('ticket__event')
+        if self.request.user.is_staff:
+            return queryset
+        return queryset.filter(Q(order__user=self.request.user) | Q(ticket__event__user=self.request.user))
+
+    # GET #
+    def get(self, request, event_slug, qrcode_id, *args, **kwargs):
+        # ?format= is taken by DRF's renderer override
+        format = request.query_params.get('type', 'png')
+        if format not in qrcodes.FORMATS:
+            return Response(
+                {'error': 'Type must be one of {}'.format(', '.join(qrcodes.FORMATS))},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            box_size = min(max(int(request.query_params.get('size', qrcodes.BOX_SIZE)), 1), qrcodes.MAX_BOX_SIZE)
+        except ValueError:
+            box_size = qrcodes.BOX_SIZE
+
+        try:
+            p_tix = self.get_queryset().get(qrcode_id=qrcode_id, ticket__event__slug=event_slug)
+        except PurchasedTicket.DoesNotExist:
+            return Response(
+                {'error': 'This ticket is not available'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        payload = ticket_token(p_tix)
+        etag = qrcodes.etag(payload, format, box_size)
+        if_none_match = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+        if etag in if_none_match or '*' in if_none_match:
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(
+                qrcodes.render(payload, format, box_size), content_type=qrcodes.FORMATS[format],
+            )
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, max-age={}'.format(settings.QRCODE_MAX_AGE)
+        return response
+
+
+purchased_ticket_qrcode_view = PurchasedTicketQRCodeAPIView.as_view()
+
+
+
+
+# ==============================================================================
+# CHECK-IN
+# ==============================================================================
+
+class CheckInAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get_event(self, event_slug):
+        '''The event's pk and slug, once the user is known to be its host'''
+        event = remember(
+            make_key('event:{}'.format(event_slug), 'checkin'),
+            lambda: Event.objects.filter(slug=event_slug).values('pk', 'slug', 'user_id').first(),
+            settings.API_CACHE_TIMEOUTS['EVENT_DETAIL'],
+        )
+        if event is None:
+            raise NotFound('This event is not available')
+        if event['user_id'] != self.request.user.pk and not self.request.user.is_staff:
+            raise PermissionDenied('Only the host can check tickets in')
+        return event
+
+
+
+
+# CHECK-IN SCAN #
+
+class CheckInScanAPIView(CheckInAPIView):
+
+    scan_status = {
+        checkin.ADMITTED: status.HTTP_200_OK,
+        checkin.EXITED: status.HTTP_200_OK,
+        checkin.DUPLICATE: status.HTTP_409_CONFLICT,
+        checkin.INVALID: status.HTTP_404_NOT_FOUND,
+    }
+
+    # POST #
+    def post(self, request, event_slug, *args, **kwargs):
+        event = self.get_event(event_slug)
+        direction = request.data.get('direction', 'in')
+        if direction not in checkin.DIRECTIONS:
+            return Response(
+                {'result': checkin.INVALID, 'error': 'Direction must be in or out'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            qrcode_id = checkin.parse_payload(request.data.get('payload'), event['pk'])
+        except checkin.InvalidPayload as e:
+            return Response(
+                {'result': checkin.INVALID, 'error': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        result, checked_in_at = checkin.scan(event['pk'], qrcode_id, direction)
+        return Response(
+            {'result': result, 'ticket': qrcode_id, 'checked_in_at': checked_in_at},
+            status=self.scan_status[result]
+        )
+
+
+checkin_scan_view = CheckInScanAPIView.as_view()
+
+
+
+
+# OFFLINE CHECK-IN BUNDLE #
+
+class CheckInBundleAPIView(CheckInAPIView):
+
+    # GET #
+    def get(self, request, event_slug, *args, **kwargs):
+        event = self.get_event(event_slug)
+        return Response(offline.build_bundle(event['pk'], event['slug']), status=status.HTTP_200_OK)
+
+
+checkin_bundle_view = CheckInBundleAPIView.as_view()
+
+
+
+
+# OFFLINE CHECK-IN SYNC #
+
+class CheckInSyncAPIView(CheckInAPIView):
+
+    # POST #
+    def post(self, request, event_slug, *args, **kwargs):
+        event = self.get_event(event_slug)
+        try:
+            since = offline.parse_cursor(request.data.get('cursor'))
+            scans = offline.parse_scans(request.data.get('scans', []))
+        except offline.InvalidSync as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        results = offline.merge(event['pk'], scans)
+        cursor = timezone.now()
+        return Response({
+            'results': [
+                {'ticket': qrcode_id, 'result': result, 'checked_in_at': checked_in_at}
+                for qrcode_id, (result, checked_in_at) in results.items()
+            ],
+            'cursor': cursor.isoformat(),
+            'changes': offline.changes(event['pk'], since),
+        }, status=status.HTTP_200_OK)
+
+
+checkin_sync_view = CheckInSyncAPIView.as_view()
@@ -0,0 +1,25 @@
+from django.contrib import admin
+from django.contrib.sites.shortcuts import get_current_site
+
+from core.payment.models import PaymentEvent
+from core.payment.tasks import process_payment_events
+
+
+
+
+class PaymentEventAdmin(admin.ModelAdmin):
+    list_display = ('event', 'reference', 'processed', 'needs_review', 'date_created')
+    list_filter = ('event', 'processed', 'needs_review')
+    search_fields = ['reference']
+    readonly_fields = ('error',)
+    actions = ['reprocess']
+
+    @admin.action(description='Process selected events again')
+    def reprocess(self, request, queryset):
+        queryset.update(processed=False, needs_review=False, error='')
+        process_payment_events.enqueue(domain=get_current_site(request).domain)
+
+
+
+
+admin.site.register(PaymentEvent, PaymentEventAdmin)
@@ -0,0 +1,7 @@
+from django.apps import AppConfig
+
+
+class PaymentConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'core.payment'
+    verbose_name = "Payment Gateway Events"
@@ -0,0 +1,38 @@
+# Generated by Django 4.0.10 on 2026-10-18 19:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaymentEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event', models.CharField(max_length=50, verbose_name='Event type')),
+                ('reference', models.CharField(max_length=100, verbose_name='Paystack Ref No.')),
+                ('payload', models.JSONField(default=dict)),
+                ('processed', models.BooleanField(default=False)),
+                ('date_created', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Payment Event',
+                'verbose_name_plural': 'Payment Events',
+                'ordering': ['date_created'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='paymentevent',
+            index=models.Index(fields=['processed', 'date_created'], name='payment_pay_process_1ee43d_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='paymentevent',
+            constraint=models.UniqueConstraint(fields=('event', 'reference'), name='unique_payment_event'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.0.10 on 2026-10-18 20:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payment', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='paymentevent',
+            name='error',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='paymentevent',
+            name='needs_review',
+            field=models.BooleanField(default=False, help_text='The charge could not be applied, see the error'),
+        ),
+    ]
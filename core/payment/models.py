@@ -0,0 +1,59 @@
+'''
+    This model contains the Paystack webhook event Model
+'''
+
+# IMPORTS #
+
+from django.db import models
+
+
+
+
+# PAYMENT EVENT MODEL #
+
+class PaymentEvent(models.Model):
+
+    event = models.CharField(
+        max_length=50,
+        verbose_name='Event type',
+    )
+
+    reference = models.CharField(
+        max_length=100,
+        verbose_name="Paystack Ref No.",
+    )
+
+    payload = models.JSONField(
+        default=dict,
+    )
+
+    processed = models.BooleanField(
+        default=False,
+    )
+
+    needs_review = models.BooleanField(
+        default=False,
+        help_text='The charge could not be applied, see the error',
+    )
+
+    error = models.TextField(
+        blank=True,
+    )
+
+    date_created = models.DateTimeField(
+        auto_now_add=True,
+    )
+
+    class Meta:
+        verbose_name = "Payment Event"
+        verbose_name_plural = "Payment Events"
+        ordering = ['date_created']
+        constraints = [
+            models.UniqueConstraint(fields=['event', 'reference'], name='unique_payment_event'),
+        ]
+        indexes = [
+            models.Index(fields=['processed', 'date_created']),
+        ]
+
+    def __str__(self):
+        return "{} - {}".format(self.event, self.reference)
@@ -0,0 +1,69 @@
+# IMPORTS #
+
+import logging
+
+from django.conf import settings
+from django.db import transaction
+
+from core.event.inventory import InsufficientStock
+from core.job.queue import task
+from core.order import payments
+from core.order.models import Order
+from core.payment.models import PaymentEvent
+from core.wallet import deposits
+
+
+logger = logging.getLogger(__name__)
+
+
+
+
+@task
+def process_payment_events(domain, batch_size=500):
+    '''Apply unprocessed charge.success events to orders and wallet deposits'''
+    events = list(
+        PaymentEvent.objects.filter(processed=False, event='charge.success')
+        .values_list('pk', 'reference', 'payload')[:batch_size]
+    )
+    orders = {
+        order.paystack_payment_reference: order
+        for order in Order.objects.filter(
+            paystack_payment_reference__in=[reference for _, reference, _ in events])
+    }
+
+    for pk, reference, payload in events:
+        # Each event in its own savepoint, one that fails is parked for
+        # review and the rest of the batch goes on
+        try:
+            with transaction.atomic():
+                apply_event(pk, reference, payload, orders.get(reference), domain)
+        except payments.PaymentMismatch as e:
+            logger.warning('Charge %s was not applied: %s', reference, e)
+            park(pk, str(e))
+        except Exception as e:
+            logger.exception('Charge %s could not be applied', reference)
+            park(pk, repr(e))
+
+    if len(events) == batch_size:
+        process_payment_events.enqueue(domain=domain, batch_size=batch_size)
+
+
+def apply_event(pk, reference, payload, order, domain):
+    if not PaymentEvent.objects.filter(pk=pk, processed=False).update(processed=True):
+        return
+
+    if order is None:
+        if payload.get('currency') != settings.PAYSTACK['CURRENCY']:
+            raise payments.PaymentMismatch('Deposit charged in {}'.format(payload.get('currency')))
+        deposits.credit(reference, payload['amount'])
+        return
+
+    payments.check_charge(order, payload)
+    try:
+        payments.mark_paid(order, domain)
+    except InsufficientStock:
+        logger.warning('Order %s was paid after selling out, refund required', order.order_id)
+
+
+def park(pk, error):
+    PaymentEvent.objects.filter(pk=pk).update(processed=True, needs_review=True, error=error)
@@ -0,0 +1,264 @@
+# IMPORTS #
+
+import hashlib
+import hmac
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase
+
+from api.paystack import CircuitBreaker, GatewayUnavailable, PaystackClient, PaystackError
+from core.event.tests import create_ticket
+from core.order import reservations
+from core.order.models import Order
+from core.order.tests import create_order
+from core.payment.models import PaymentEvent
+from core.payment.tasks import process_payment_events
+
+
+
+
+def charge(reference, amount, currency='NGN'):
+    return {'event': 'charge.success', 'data': {'reference': reference, 'amount': amount, 'currency': currency}}
+
+
+
+
+# PAYSTACK WEBHOOK #
+
+class WebhookTests(TestCase):
+    url = '/api/payment/paystack/webhook/'
+
+    def setUp(self):
+        self.ticket = create_ticket(price=1000)
+        self.order = create_order(self.ticket.event, [(self.ticket, 2)])
+        reservations.hold(self.order, [(self.ticket, 2)])
+        Order.objects.filter(pk=self.order.pk).update(paystack_payment_reference='ref-1')
+
+    def post(self, events, signature=None):
+        body = json.dumps(events).encode()
+        if signature is None:
+            signature = hmac.new(settings.PAYSTACK_SECRET_KEY.encode(), body, hashlib.sha512).hexdigest()
+        return self.client.post(
+            self.url, body, content_type='application/json',
+            HTTP_X_PAYSTACK_SIGNATURE=signature, HTTP_HOST='localhost',
+        )
+
+    def test_rejects_a_bad_signature(self):
+        response = self.post(charge('ref-1', 2000), signature='0' * 128)
+
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(PaymentEvent.objects.exists())
+
+    def test_signed_charge_marks_the_order_paid_once(self):
+        for _ in range(2):
+            self.assertEqual(self.post(charge('ref-1', 2000)).status_code, 200)
+            process_payment_events(domain='localhost')
+
+        self.assertEqual(PaymentEvent.objects.count(), 1)
+        self.order.refresh_from_db()
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.order.order_status, 'success')
+        self.assertEqual((self.ticket.sold, self.ticket.reserved), (2, 0))
+
+    def test_underpaid_charge_is_parked_for_review(self):
+        self.post(charge('ref-1', 100))
+        process_payment_events(domain='localhost')
+
+        event = PaymentEvent.objects.get()
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.order_status, 'pending')
+        self.assertTrue(event.needs_review)
+        self.assertIn('order total', event.error)
+
+    def test_wrong_currency_is_parked_for_review(self):
+        self.post(charge('ref-1', 2000, currency='USD'))
+        process_payment_events(domain='localhost')
+
+        self.assertTrue(PaymentEvent.objects.get().needs_review)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.order_status, 'pending')
+
+    def test_one_failing_event_does_not_stop_the_others(self):
+        other = create_order(self.ticket.event, [(self.ticket, 1)], email='other@tikwey.local')
+        reservations.hold(other, [(self.ticket, 1)])
+        Order.objects.filter(pk=other.pk).update(paystack_payment_reference='ref-2')
+        self.post([charge('ref-1', 2000), charge('ref-2', 1000)])
+
+        mark_paid = mock.Mock(side_effect=[RuntimeError('boom'), True])
+        with mock.patch('core.order.payments.mark_paid', mark_paid):
+            process_payment_events(domain='localhost')
+
+        self.assertEqual(mark_paid.call_count, 2)
+        self.assertEqual(
+            set(PaymentEvent.objects.values_list('reference', 'processed', 'needs_review')),
+            {('ref-1', True, True), ('ref-2', True, False)},
+        )
+
+    def test_malformed_events_are_skipped(self):
+        response = self.post([
+            'charge.success',
+            None,
+            {'event': 'charge.success', 'data': 'ref-1'},
+            {'event': 'charge.success', 'data': {'reference': ['ref-1']}},
+            {'event': 'charge.success'},
+            charge('ref-1', 2000),
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(PaymentEvent.objects.values_list('reference', flat=True)), ['ref-1'])
+
+    def test_non_object_payload_is_rejected(self):
+        for payload in ('charge.success', 42):
+            self.assertEqual(self.post(payload).status_code, 400)
+        self.assertFalse(PaymentEvent.objects.exists())
+
+
+
+
+# PAYSTACK CLIENT #
+
+class StubPaystack(BaseHTTPRequestHandler):
+    '''Answers with the next scripted (status, delay) reply and records each request'''
+
+    def do_GET(self):
+        self.reply()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        self.reply()
+
+    def reply(self):
+        server = self.server
+        server.requests.append((self.command, self.path))
+        status_code, delay = server.replies.pop(0) if server.replies else (200, 0)
+        time.sleep(delay)
+        body = json.dumps({'status': status_code < 400, 'data': {'status': 'success'}}).encode()
+        try:
+            self.send_response(status_code)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up waiting
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+class PaystackClientTests(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StubPaystack)
+        cls.server.daemon_threads = True
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.server.requests, self.server.replies = [], []
+
+    def paystack(self, **options):
+        options = {
+            'RETRIES': 2, 'BACKOFF_SECONDS': 0, 'READ_TIMEOUT': 0.3,
+            'BREAKER_THRESHOLD': 10, 'BREAKER_RESET_SECONDS': 30, **options,
+        }
+        return PaystackClient('sk_test', 'http://127.0.0.1:{}'.format(self.server.server_port), **options)
+
+    def script(self, *replies):
+        self.server.replies = list(replies)
+
+    def test_verify_is_retried_after_server_errors(self):
+        self.script((502, 0), (503, 0))
+        response = self.paystack().verify_transaction('ref-1')
+
+        self.assertEqual(response['data']['status'], 'success')
+        self.assertEqual(self.server.requests, [('GET', '/transaction/verify/ref-1')] * 3)
+
+    def test_initialize_is_never_replayed(self):
+        self.script((502, 0))
+        with self.assertRaises(GatewayUnavailable):
+            self.paystack().initialize_transaction({'email': 'fan@tikwey.local', 'amount': 1000})
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_read_timeouts(self):
+        self.script((200, 0.6))
+        self.assertEqual(self.paystack().verify_transaction('ref-1')['status'], True)
+        self.assertEqual(len(self.server.requests), 2)
+
+        self.setUp()
+        self.script((200, 0.6))
+        with self.assertRaises(GatewayUnavailable):
+            self.paystack().initialize_transaction({'email': 'fan@tikwey.local', 'amount': 1000})
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_client_errors_are_not_retried(self):
+        self.script((400, 0))
+        with self.assertRaises(PaystackError) as caught:
+            self.paystack().verify_transaction('ref-1')
+        self.assertNotIsInstance(caught.exception, GatewayUnavailable)
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_breaker_opens_and_fails_fast(self):
+        client = self.paystack(RETRIES=0, BREAKER_THRESHOLD=2)
+        self.script((500, 0), (500, 0))
+        for _ in range(2):
+            with self.assertRaises(GatewayUnavailable):
+                client.verify_transaction('ref-1')
+
+        with self.assertRaises(GatewayUnavailable):
+            client.verify_transaction('ref-1')
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_half_open_breaker_lets_one_call_through(self):
+        client = self.paystack(RETRIES=0, BREAKER_THRESHOLD=1, BREAKER_RESET_SECONDS=0.2, READ_TIMEOUT=2)
+        self.script((500, 0))
+        with self.assertRaises(GatewayUnavailable):
+            client.verify_transaction('ref-1')
+        time.sleep(0.25)
+
+        # The trial call is in flight, so a second caller is still refused
+        self.script((200, 0.3))
+        trial = threading.Thread(target=client.verify_transaction, args=('ref-2',))
+        trial.start()
+        time.sleep(0.1)
+        with self.assertRaises(GatewayUnavailable):
+            client.verify_transaction('ref-3')
+        trial.join()
+
+        # The trial succeeded and closed the circuit
+        client.verify_transaction('ref-4')
+        self.assertEqual([path for _, path in self.server.requests], [
+            '/transaction/verify/ref-1', '/transaction/verify/ref-2', '/transaction/verify/ref-4',
+        ])
+
+
+class CircuitBreakerTests(SimpleTestCase):
+
+    def test_failed_trial_opens_the_circuit_again(self):
+        breaker = CircuitBreaker(threshold=2, reset_seconds=30)
+        with mock.patch('api.paystack.time.monotonic', return_value=100):
+            breaker.record_failure()
+            self.assertTrue(breaker.allow())
+            breaker.record_failure()
+            self.assertFalse(breaker.allow())
+
+        with mock.patch('api.paystack.time.monotonic', return_value=131):
+            self.assertTrue(breaker.allow())
+            self.assertFalse(breaker.allow())
+            breaker.record_failure()
+
+        with mock.patch('api.paystack.time.monotonic', return_value=150):
+            self.assertFalse(breaker.allow())
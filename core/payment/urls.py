@@ -0,0 +1,18 @@
+'''
+    This file contains urls for the Payment Gateway Views
+'''
+
+# IMPORTS #
+
+from django.urls import path
+
+from core.payment.views import (
+    paystack_webhook_view,
+)
+
+
+
+app_name = 'core.payment'
+urlpatterns = [
+    path('paystack/webhook/', paystack_webhook_view, name='paystack-webhook'),
+]
@@ -0,0 +1,72 @@
+# IMPORTS #
+
+import hashlib
+import hmac
+import json
+
+from django.conf import settings
+from django.contrib.sites.shortcuts import get_current_site
+from rest_framework import status
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core.payment.models import PaymentEvent
+from core.payment.tasks import process_payment_events
+
+
+
+
+# PAYSTACK WEBHOOK VIEW #
+
+def is_charge(event):
+    '''
+    True for a well-formed `charge.success` event. The body is signed, but
+    it is still parsed JSON, so anything that is not an object with an
+    object `data` carrying a string reference is skipped.
+    '''
+    if not isinstance(event, dict) or event.get('event') != 'charge.success':
+        return False
+    data = event.get('data')
+    return isinstance(data, dict) and isinstance(data.get('reference'), str) and bool(data['reference'])
+
+
+
+class PaystackWebhookAPIView(APIView):
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    # POST
+    def post(self, request, *args, **kwargs):
+        body = request.body
+        signature = request.META.get('HTTP_X_PAYSTACK_SIGNATURE', '')
+        expected = hmac.new(
+            settings.PAYSTACK_SECRET_KEY.encode(), body, hashlib.sha512,
+        ).hexdigest()
+
+        if not hmac.compare_digest(signature, expected):
+            return Response({'error': 'Invalid signature'}, status=status.HTTP_401_UNAUTHORIZED)
+
+        try:
+            events = json.loads(body)
+        except ValueError:
+            return Response({'error': 'Invalid payload'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if isinstance(events, dict):
+            events = [events]
+        if not isinstance(events, list):
+            return Response({'error': 'Invalid payload'}, status=status.HTTP_400_BAD_REQUEST)
+
+        new_events = [
+            PaymentEvent(event=e['event'], reference=e['data']['reference'], payload=e['data'])
+            for e in events
+            if is_charge(e)
+        ]
+        if new_events:
+            PaymentEvent.objects.bulk_create(new_events, ignore_conflicts=True)
+            process_payment_events.enqueue(domain=get_current_site(request).domain)
+
+        return Response(status=status.HTTP_200_OK)
+
+
+paystack_webhook_view = PaystackWebhookAPIView.as_view()
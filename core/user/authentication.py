@@ -0,0 +1,85 @@
+'''
+    This file contains the JWT authentication used by the API
+
+    JWTAuthentication looks the user up on every request. This class reads
+    the user, with the profile and wallet joined in, from the api cache under
+    a key made of the user ID and the token version, so an authenticated
+    request usually runs no auth query at all. The password hash is deferred
+    and never reaches the shared cache; code that needs it, such as a
+    password check, loads it with one query on first use. Saving a user,
+    profile or wallet moves the user's cache namespace to a new generation
+    once the transaction commits, see core/user/signals.py.
+
+    A queryset .update() sends no signal, so it leaves the cached user in
+    place for up to AUTH_USER_CACHE_TIMEOUT. Anything that blocks or
+    deactivates users in bulk that way must call invalidate_user for each
+    of them.
+
+    A password change bumps User.token_version. Tokens carrying an older
+    version stop working even though they have not expired. The other
+    claims in the token (wallet_id, is_active, profile_status) are only
+    hints for clients; they can be days old, so the checks here use the
+    cached row.
+'''
+
+# IMPORTS #
+
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from api.cache import invalidate, make_key, remember
+from core.user.models import TOKEN_VERSION_CLAIM, User
+
+
+
+
+def user_namespace(user_id):
+    return 'user:{}'.format(user_id)
+
+
+def cached_user(user_id, version):
+    '''The user with its profile and wallet, None when there is no such user'''
+    return remember(
+        make_key(user_namespace(user_id), 'auth', version),
+        lambda: User.objects.select_related('profile', 'wallet').defer('password').filter(
+            **{api_settings.USER_ID_FIELD: user_id}
+        ).first(),
+        settings.AUTH_USER_CACHE_TIMEOUT,
+    )
+
+
+def invalidate_user(user_id):
+    '''Drop the cached user, the signals call this on save and delete but not on .update()'''
+    invalidate(user_namespace(user_id))
+
+
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        # Tokens issued before the version claim existed count as version 0
+        version = validated_token.get(TOKEN_VERSION_CLAIM, 0)
+        user = cached_user(user_id, version)
+
+        if user is None:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+        if user.token_version != version:
+            raise AuthenticationFailed(_('Token has been revoked'), code='token_revoked')
+        if not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        profile = getattr(user, 'profile', None)
+        if profile is not None and profile.status != 'enabled':
+            raise AuthenticationFailed(_('Account has been blocked'), code='user_blocked')
+
+        return user
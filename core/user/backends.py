@@ -0,0 +1,41 @@
+'''
+    This file contains the authentication backend used for logins
+
+    It is Django's AllowAllUsersModelBackend with the profile and wallet
+    joined into the user lookup. Login checks the profile status and puts
+    the wallet ID in the tokens, this saves the queries that would load
+    them.
+'''
+
+# IMPORTS #
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import AllowAllUsersModelBackend
+
+
+UserModel = get_user_model()
+
+
+
+
+class ProfileModelBackend(AllowAllUsersModelBackend):
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+
+        try:
+            user = UserModel._default_manager.select_related('profile', 'wallet').get(
+                **{UserModel.USERNAME_FIELD: username}
+            )
+        except UserModel.DoesNotExist:
+            # Hash anyway so an unknown email takes as long as a wrong
+            # password, as ModelBackend does
+            UserModel().set_password(password)
+            return None
+
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
@@ -0,0 +1,23 @@
+'''
+    This file contains the password hasher with a tunable work factor
+
+    Every login pays for one password hash, so the PBKDF2 iteration count
+    is the biggest part of login latency. The hasher keeps Django's
+    pbkdf2_sha256 format and reads the count from PASSWORD_HASH_ITERATIONS;
+    a stored hash made with another count still verifies and is rehashed
+    with the new one on the user's next login.
+'''
+
+# IMPORTS #
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_HASH_ITERATIONS
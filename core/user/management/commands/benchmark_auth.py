@@ -0,0 +1,72 @@
+'''
+    Times authenticated wallet requests with simplejwt's JWTAuthentication
+    and with the cached authentication, and counts the queries of each
+'''
+
+# IMPORTS #
+
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+from core.user.authentication import CachedJWTAuthentication
+from core.user.management.commands.benchmark_registration import letters
+from core.user.models import User
+from core.wallet.views import WalletInformation, WalletTransactionList
+
+
+
+
+class Command(BaseCommand):
+    help = 'Benchmark authenticated requests with and without the cached JWT user'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Requests timed per view and class')
+        parser.add_argument('--host', default='localhost', help='Must be in ALLOWED_HOSTS')
+
+    def handle(self, *args, **options):
+        name = letters(int(timezone.now().timestamp() * 1000))
+        user = User(
+            email='auth{}@tikwey.local'.format(name.lower()), username='bench' + name,
+            first_name='Bench' + name, last_name='Mark' + name, is_active=True,
+        )
+        user.set_unusable_password()
+        user.save()
+
+        try:
+            token = user.tokens()['access']
+            factory = RequestFactory(HTTP_HOST=options['host'], HTTP_AUTHORIZATION='Bearer ' + token)
+            for path, view in (
+                ('/api/user/wallet/', WalletInformation),
+                ('/api/user/wallet/transactions/', WalletTransactionList),
+            ):
+                for authentication in (JWTAuthentication, CachedJWTAuthentication):
+                    self.run(factory, path, view.as_view(authentication_classes=[authentication]),
+                             authentication.__name__, options['requests'])
+        finally:
+            OutstandingToken.objects.filter(user=user).delete()
+            user.delete()
+
+    def run(self, factory, path, view, label, count):
+        durations = []
+        for _ in range(count):
+            with CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                response = view(factory.get(path))
+                durations.append((time.perf_counter() - start) * 1000)
+            if response.status_code != 200:
+                raise CommandError('{} returned {}: {}'.format(path, response.status_code, response.data))
+
+        durations.sort()
+        self.stdout.write('{:<32} {:<24} mean {:>6.2f} ms  p95 {:>6.2f} ms  {} queries'.format(
+            path, label, statistics.mean(durations),
+            durations[max(int(len(durations) * 0.95) - 1, 0)], len(captured.captured_queries),
+        ))
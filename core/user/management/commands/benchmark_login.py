@@ -0,0 +1,92 @@
+'''
+    Times logins through the login endpoint at one or more PBKDF2 iteration
+    counts, separating the password hash from the rest of the request
+'''
+
+# IMPORTS #
+
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+from core.user.management.commands.benchmark_registration import letters
+from core.user.models import User
+from core.user.views import user_login
+
+
+PASSWORD = 'Benchmark1!'
+
+
+
+
+class Command(BaseCommand):
+    help = 'Benchmark login throughput and password hashing cost'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--logins', type=int, default=30, help='Logins timed per iteration count')
+        parser.add_argument(
+            '--iterations', type=int, nargs='+', default=[settings.PASSWORD_HASH_ITERATIONS],
+            help='PBKDF2 iteration counts to compare',
+        )
+        parser.add_argument('--host', default='localhost', help='Must be in ALLOWED_HOSTS')
+
+    def handle(self, *args, **options):
+        tag = int(timezone.now().timestamp() * 1000)
+        users = []
+        try:
+            for i in range(options['users']):
+                name = letters(tag * 1000 + i)
+                user = User(
+                    email='login{}x{}@tikwey.local'.format(tag, i), username='bench' + name,
+                    first_name='Bench' + name, last_name='Mark' + name, is_active=True,
+                )
+                user.set_unusable_password()
+                user.save()
+                users.append(user)
+
+            self.stdout.write('{:>10}  {:>9}  {:>8}  {:>8}  {:>8}  {}'.format(
+                'iterations', 'logins/s', 'mean ms', 'p95 ms', 'hash ms', 'queries per login',
+            ))
+            for iterations in options['iterations']:
+                with override_settings(PASSWORD_HASH_ITERATIONS=iterations):
+                    self.run(users, iterations, options['logins'], options['host'])
+        finally:
+            OutstandingToken.objects.filter(user__in=users).delete()
+            User.objects.filter(pk__in=[user.pk for user in users]).delete()
+
+    def run(self, users, iterations, logins, host):
+        encoded = make_password(PASSWORD)
+        User.objects.filter(pk__in=[user.pk for user in users]).update(password=encoded)
+
+        start = time.perf_counter()
+        check_password(PASSWORD, encoded)
+        hashing = (time.perf_counter() - start) * 1000
+
+        factory = RequestFactory(HTTP_HOST=host)
+        durations = []
+        for i in range(logins):
+            request = factory.post('/api/user/login/', {
+                'email': users[i % len(users)].email, 'password': PASSWORD,
+            }, content_type='application/json')
+            with CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                response = user_login(request)
+                durations.append((time.perf_counter() - start) * 1000)
+            if response.status_code != 200:
+                raise CommandError('Login returned {}: {}'.format(response.status_code, response.data))
+
+        durations.sort()
+        self.stdout.write('{:>10}  {:>9.1f}  {:>8.1f}  {:>8.1f}  {:>8.1f}  {}'.format(
+            iterations, len(durations) * 1000 / sum(durations), statistics.mean(durations),
+            durations[max(int(len(durations) * 0.95) - 1, 0)], hashing, len(captured.captured_queries),
+        ))
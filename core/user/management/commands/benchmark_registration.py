@@ -0,0 +1,90 @@
+'''
+    Times sign-ups through the registration endpoint and counts the
+    queries each one runs
+'''
+
+# IMPORTS #
+
+import statistics
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from core.job.models import Job
+from core.notification.models import EmailOutbox
+from core.user.models import User
+from core.user.views import user_registration
+
+
+
+
+def letters(number):
+    '''Names only take letters and first and last names are unique'''
+    word = ''
+    while True:
+        number, digit = divmod(number, 26)
+        word = chr(ord('a') + digit) + word
+        if not number:
+            return word.capitalize()
+
+
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the registration endpoint latency and query count'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=20, help='Sign-ups to time')
+        parser.add_argument('--host', default='localhost', help='Must be in ALLOWED_HOSTS')
+        parser.add_argument(
+            '--fast-hashing', action='store_true',
+            help='Hash with MD5 to time everything but the password hasher',
+        )
+
+    def handle(self, *args, **options):
+        started = timezone.now()
+        tag = str(int(started.timestamp() * 1000))
+        emails = ['reg{}x{}@tikwey.local'.format(tag, i) for i in range(options['count'])]
+        hashers = ['django.contrib.auth.hashers.MD5PasswordHasher'] if options['fast_hashing'] else settings.PASSWORD_HASHERS
+
+        durations, queries = [], []
+        try:
+            with override_settings(PASSWORD_HASHERS=hashers):
+                for i, email in enumerate(emails):
+                    elapsed, captured = self.register(options['host'], email, letters(int(tag) * 1000 + i))
+                    durations.append(elapsed)
+                    queries.append(captured)
+        finally:
+            User.objects.filter(email__in=emails).delete()
+            EmailOutbox.objects.filter(recipient__in=emails).delete()
+            Job.objects.filter(date_created__gte=started, name='core.notification.tasks.deliver_outbox').delete()
+
+        durations.sort()
+        kinds = Counter(query['sql'].split(None, 1)[0].upper() for query in queries[-1])
+        self.stdout.write('{} sign-ups: mean {:.1f} ms, median {:.1f} ms, p95 {:.1f} ms'.format(
+            len(durations), statistics.mean(durations), statistics.median(durations),
+            durations[int(len(durations) * 0.95) - 1] if len(durations) > 1 else durations[0],
+        ))
+        self.stdout.write('{} queries per sign-up: {}'.format(
+            len(queries[-1]), ', '.join('{} {}'.format(count, kind) for kind, count in sorted(kinds.items())),
+        ))
+
+    def register(self, host, email, name):
+        request = RequestFactory(HTTP_HOST=host).post('/api/user/register/', {
+            'first_name': 'Bench' + name, 'last_name': 'Mark' + name, 'username': 'bench' + name,
+            'email': email, 'password': 'Benchmark1!', 'password2': 'Benchmark1!',
+        }, content_type='application/json')
+
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            response = user_registration(request)
+            elapsed = (time.perf_counter() - start) * 1000
+        if response.status_code != 201:
+            raise CommandError('Registration returned {}: {}'.format(response.status_code, response.data))
+        return elapsed, captured.captured_queries
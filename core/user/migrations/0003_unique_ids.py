@@ -0,0 +1,19 @@
+# Generated by Django 4.0.10 on 2026-10-18 20:00
+
+import core.user.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0002_alter_user_user_id'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='user_id',
+            field=models.CharField(default=core.user.models.generate_user_uuid, editable=False, max_length=25, unique=True, verbose_name='User ID'),
+        ),
+    ]
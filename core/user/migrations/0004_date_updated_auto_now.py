@@ -0,0 +1,18 @@
+# Generated by Django 4.0.10 on 2026-10-18 20:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0003_unique_ids'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='userprofile',
+            name='date_updated',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
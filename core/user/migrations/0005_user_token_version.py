@@ -0,0 +1,18 @@
+# Generated by Django 4.0.10 on 2026-10-18 20:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0004_date_updated_auto_now'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='token_version',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Tokens issued before the last password change carry an older version', verbose_name='Token Version'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.0.10 on 2026-10-18 21:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0005_user_token_version'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='date_updated',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -4,8 +4,7 @@
 
 # IMPORTS #
 
-import uuid
-
+from django.core.exceptions import ObjectDoesNotExist
 from django.db import models
 from django.contrib.auth.models import (
     AbstractBaseUser, BaseUserManager, PermissionsMixin
@@ -15,22 +14,21 @@ from django.utils import timezone
 from rest_framework_simplejwt.tokens import RefreshToken
 from django_countries.fields import CountryField
 
+from api.ids import generate_id
+
+
+
+
+# Claim carrying User.token_version, see core/user/authentication.py
+TOKEN_VERSION_CLAIM = 'ver'
+
 
 
 
 # MODEL FUNCTIONS #
 
 def generate_user_uuid():
-    code = str(uuid.uuid4()).split("-")[-1] #generate unique user id
-
-    try:
-        qs_exists = User.objects.filter(user_uuid=code).exists()
-        if qs_exists:
-            return generate_user_uuid()
-        else:
-            return 'u'+code
-    except:
-        return 'u'+code
+    return generate_id('u')
 
 
 
@@ -118,8 +116,8 @@ class User(AbstractBaseUser, PermissionsMixin):
     )
 
     user_id = models.CharField(
-        db_index=True,
-        max_length=15,
+        unique=True,
+        max_length=25,
         blank=False,
         null=False,
         default=generate_user_uuid,
@@ -156,7 +154,14 @@ class User(AbstractBaseUser, PermissionsMixin):
     )
 
     date_updated = models.DateTimeField(
-        default=timezone.now,
+        auto_now=True,
+    )
+
+    token_version = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Token Version',
+        help_text='Tokens issued before the last password change carry an older version',
     )
 
 
@@ -173,8 +178,36 @@ class User(AbstractBaseUser, PermissionsMixin):
         verbose_name_plural = "User Data"
         ordering = ['-date_joined']
 
+    def save(self, *args, **kwargs):
+        # A new password revokes every token issued with the old one. A
+        # rehash on login clears _password first, so it does not count
+        if self._password is not None and not self._state.adding:
+            self.token_version += 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'token_version'}
+        super().save(*args, **kwargs)
+
+    def token_claims(self):
+        try:
+            wallet_id = self.wallet.wallet_id
+        except ObjectDoesNotExist:
+            wallet_id = None
+        try:
+            profile_status = self.profile.status
+        except ObjectDoesNotExist:
+            profile_status = None
+
+        return {
+            TOKEN_VERSION_CLAIM: self.token_version,
+            'wallet_id': wallet_id,
+            'is_active': self.is_active,
+            'profile_status': profile_status,
+        }
+
     def tokens(self):
         refresh = RefreshToken.for_user(self)
+        for claim, value in self.token_claims().items():
+            refresh[claim] = value
         return {
             'refresh': str(refresh),
             'access': str(refresh.access_token)
@@ -307,7 +340,7 @@ class UserProfile(models.Model):
     )
 
     date_updated = models.DateTimeField(
-        default=timezone.now,
+        auto_now=True,
     )
 
     objects = models.Manager() 
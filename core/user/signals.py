@@ -1,6 +1,9 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
+from core.user.authentication import invalidate_user
+
 from .models import(
     User,
     UserProfile
@@ -15,6 +18,25 @@ def create_profile(sender, instance, created, **kwargs):
         UserProfile.objects.create(user=instance)
 
 
+
+
+# CACHED AUTH USER SIGNALS #
+
+def invalidate_user_on_commit(user_id):
+    # Nothing is cached for a row that was just created, so the receivers
+    # below skip those
+    transaction.on_commit(lambda: invalidate_user(user_id))
+
+
 @receiver(post_save, sender=User)
-def save_profile(sender, instance, **kwargs):
-    instance.profile.save()
\ No newline at end of file
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    if not kwargs.get('created'):
+        invalidate_user_on_commit(instance.user_id)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_cached_profile_user(sender, instance, **kwargs):
+    if not kwargs.get('created'):
+        invalidate_user_on_commit(instance.user.user_id)
@@ -1,3 +1,74 @@
-from django.test import TestCase
+# IMPORTS #
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+
+from core.user.models import User
+
+
+
+
+FAST_HASHING = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+PASSWORD = 'Benchmark1!'
+
+
+
+
+# REGISTRATION #
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHING)
+class RegistrationTests(TestCase):
+
+    def register(self, name='Ada'):
+        return self.client.post('/api/user/register/', {
+            'first_name': name, 'last_name': name + 'son', 'username': name.lower(),
+            'email': '{}@tikwey.local'.format(name.lower()), 'password': PASSWORD, 'password2': PASSWORD,
+        }, content_type='application/json', HTTP_HOST='localhost')
+
+    def test_sign_up_query_count(self):
+        # Two uniqueness checks, the user, profile, wallet and verification
+        # email inserted in one savepoint, then the outbox delivery scheduled
+        # after commit
+        with self.assertNumQueries(10), self.captureOnCommitCallbacks(execute=True):
+            response = self.register()
+
+        self.assertEqual(response.status_code, 201)
+        user = User.objects.select_related('profile', 'wallet').get(email='ada@tikwey.local')
+        self.assertEqual((user.profile.status, user.is_active), ('enabled', False))
+        self.assertTrue(user.wallet.wallet_id)
+
+    def test_duplicate_email_is_refused(self):
+        self.register()
+        self.assertEqual(self.register().status_code, 400)
+
+
+
+
+# LOGIN #
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHING)
+class LoginTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('ada@tikwey.local', 'ada', PASSWORD)
+        self.user.is_active = True
+        self.user.save()
+
+    def login(self, password=PASSWORD):
+        return self.client.post('/api/user/login/', {
+            'email': self.user.email, 'password': password,
+        }, content_type='application/json', HTTP_HOST='localhost')
+
+    def test_login_query_count(self):
+        # The user with its profile and wallet in one read, then the refresh
+        # token recorded for the blacklist
+        with self.assertNumQueries(2):
+            response = self.login()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['email'], self.user.email)
+
+    def test_wrong_password_stops_after_one_query(self):
+        with self.assertNumQueries(1):
+            response = self.login('Wrong1!')
+        self.assertNotEqual(response.status_code, 200)
@@ -9,6 +9,7 @@ import jwt
 from django.contrib.sites.shortcuts import get_current_site
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
 from django.conf import settings
+from django.db import transaction
 from django.urls import reverse
 from django.utils.encoding import (
     smart_str,
@@ -28,7 +29,7 @@ from rest_framework.generics import (
 )
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema 
 
@@ -94,11 +95,14 @@ class UserRegistrationAPIView(CreateAPIView):
         serializer = self.serializer_class(data=request.data)
 
         if serializer.is_valid(raise_exception=True):
-            new_user = serializer.save()
-
-            if new_user:
-                user = User.objects.get(email=new_user.email)
-                token = RefreshToken.for_user(user).access_token
+            # The user, its profile and wallet and the queued verification
+            # email commit together, the email goes out from the outbox
+            with transaction.atomic():
+                user = serializer.save()
+
+                # A bare access token, a refresh token would also be tracked
+                # in the blacklist's outstanding tokens table
+                token = AccessToken.for_user(user)
                 current_site=get_current_site(self.request).domain
                 related_link = reverse('core.user:verify-email')
                 
@@ -109,9 +113,9 @@ class UserRegistrationAPIView(CreateAPIView):
                     'email_subject': 'Verify your email',
                     'to_email': user.email,
                 }
-                Util.send_email(data)  
+                Util.send_email(data)
 
-                return Response(status=status.HTTP_201_CREATED) 
+            return Response(status=status.HTTP_201_CREATED) 
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -0,0 +1,24 @@
+'''
+    This file credits wallet deposits confirmed by Paystack
+'''
+
+# IMPORTS #
+
+from django.utils import timezone
+
+from core.wallet.models import Wallet, WalletTransaction
+
+
+
+
+def credit(reference, amount):
+    '''Mark a pending deposit as successful, returns False if already credited'''
+    now = timezone.now()
+    credited = WalletTransaction.objects.filter(
+        paystack_payment_reference=reference, transaction_status='pending',
+    ).update(transaction_status='success', amount=amount, date_updated=now)
+
+    if credited:
+        # The balance changed, so the wallet did too
+        Wallet.objects.filter(transactions__paystack_payment_reference=reference).update(date_updated=now)
+    return bool(credited)
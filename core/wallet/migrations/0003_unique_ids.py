@@ -0,0 +1,19 @@
+# Generated by Django 4.0.10 on 2026-10-18 20:00
+
+import core.wallet.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallet', '0002_alter_wallet_wallet_id'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='wallet',
+            name='wallet_id',
+            field=models.CharField(default=core.wallet.models.generate_wallet_id, editable=False, max_length=25, unique=True, verbose_name='Wallet ID'),
+        ),
+    ]
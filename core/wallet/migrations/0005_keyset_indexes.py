@@ -0,0 +1,17 @@
+# Generated by Django 4.0.10 on 2026-10-18 20:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallet', '0004_date_updated_auto_now'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='wallettransaction',
+            index=models.Index(fields=['wallet', 'date_created', 'id'], name='wallet_wall_wallet__e21d31_idx'),
+        ),
+    ]
@@ -1,26 +1,16 @@
 # IMPORTS #
 
-import uuid
-
 from django.db import models
 from django.db.models import Sum
 from core.user.models import User
 from django.utils import timezone
+from api.ids import generate_id
 
 
 
 
 def generate_wallet_id():
-    code = str(uuid.uuid4()).split("-")[-1] #generate unique wallet id
-
-    try:
-        qs_exists = Wallet.objects.filter(wallet_id=code).exists()
-        if qs_exists:
-            return generate_wallet_id()
-        else:
-            return 'w'+code
-    except:
-        return 'w'+code
+    return generate_id('w')
 
 
 
@@ -34,8 +24,8 @@ class Wallet(models.Model):
     )
 
     wallet_id = models.CharField(
-        db_index=True,
-        max_length=15,
+        unique=True,
+        max_length=25,
         blank=False,
         null=False,
         default=generate_wallet_id,
@@ -48,7 +38,7 @@ class Wallet(models.Model):
     )
 
     date_updated = models.DateTimeField(
-        default=timezone.now,
+        auto_now=True,
     )
 
     @property
@@ -118,7 +108,7 @@ class WalletTransaction(models.Model):
     )
 
     date_updated = models.DateTimeField(
-        default=timezone.now,
+        auto_now=True,
     )
 
     paystack_payment_reference = models.CharField(
@@ -126,6 +116,11 @@ class WalletTransaction(models.Model):
         verbose_name="Paystack Ref No."
     )
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['wallet', 'date_created', 'id']),
+        ]
+
     def __str__(self):
         return "{} - {}".format(self.wallet.user.__str__(), self.id)
 
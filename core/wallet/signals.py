@@ -1,7 +1,8 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
 from core.user.models import User
+from core.user.signals import invalidate_user_on_commit
 from core.wallet.models import Wallet
 
 
@@ -13,6 +14,9 @@ def create_wallet(sender, instance, created, **kwargs):
         Wallet.objects.create(user=instance)
 
 
-@receiver(post_save, sender=User)
-def save_profile(sender, instance, **kwargs):
-    instance.wallet.save()
\ No newline at end of file
+@receiver(post_save, sender=Wallet)
+@receiver(post_delete, sender=Wallet)
+def invalidate_cached_wallet_user(sender, instance, **kwargs):
+    if not kwargs.get('created'):
+        # The cached auth user carries its wallet
+        invalidate_user_on_commit(instance.user.user_id)
@@ -1,3 +1,156 @@
+# IMPORTS #
+
+from unittest import mock
+
 from django.test import TestCase
+from django.utils import timezone
+
+from api.cache import get_cache, make_key
+from api.paystack import GatewayUnavailable
+from core.user.authentication import cached_user, user_namespace
+from core.user.models import User
+from core.wallet.models import Wallet, WalletTransaction
+
+
+
+
+class CachedWalletReadTests(TestCase):
+
+    def setUp(self):
+        get_cache().clear()
+        self.user = User.objects.create_user('ada@tikwey.local', 'ada', 'Benchmark1!')
+        self.user.is_active = True
+        self.user.save()
+        self.auth = 'Bearer ' + self.user.tokens()['access']
+
+    def get(self, url='/api/user/wallet/'):
+        return self.client.get(url, HTTP_HOST='localhost', HTTP_AUTHORIZATION=self.auth)
+
+    def test_query_count(self):
+        # The first request reads the user with its profile and wallet
+        with self.assertNumQueries(3):
+            self.get()
+        # Later ones only read the wallet's last change and its balance
+        with self.assertNumQueries(2):
+            response = self.get()
+        with self.assertNumQueries(1):
+            self.get('/api/user/wallet/transactions/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0]['user']['email'], self.user.email)
+
+    def test_password_hash_stays_out_of_the_cache(self):
+        self.get()
+        user = get_cache().get(make_key(user_namespace(self.user.user_id), 'auth', self.user.token_version))
+
+        self.assertIn('password', user.get_deferred_fields())
+        self.assertNotIn('password', user.__dict__)
+        # Loaded on demand for the few places that need it
+        with self.assertNumQueries(1):
+            self.assertTrue(user.check_password('Benchmark1!'))
+
+    def test_blocking_the_profile_locks_the_user_out(self):
+        self.assertEqual(self.get().status_code, 200)
+        profile = cached_user(self.user.user_id, self.user.token_version).profile
+        profile.status = 'blocked'
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.save()
+
+        self.assertEqual(self.get().status_code, 401)
+
+
+
+
+class VerifyDepositTests(TestCase):
+
+    def setUp(self):
+        get_cache().clear()
+        self.user = User.objects.create_user('ada@tikwey.local', 'ada', 'Benchmark1!')
+        self.user.is_active = True
+        self.user.save()
+        self.auth = 'Bearer ' + self.user.tokens()['access']
+        self.deposit = WalletTransaction.objects.create(
+            wallet=self.user.wallet,
+            transaction_type='deposit',
+            amount=500,
+            paystack_payment_reference='ref-1',
+        )
+
+    def verify(self, reference='ref-1'):
+        return self.client.get(
+            f'/api/user/wallet/deposit/verify/{reference}/',
+            HTTP_HOST='localhost', HTTP_AUTHORIZATION=self.auth,
+        )
+
+    @mock.patch('core.wallet.views.get_client')
+    def test_gateway_outage_is_503(self, get_client):
+        get_client.return_value.verify_transaction.side_effect = GatewayUnavailable('down')
+        response = self.verify()
+        self.assertEqual(response.status_code, 503)
+        self.deposit.refresh_from_db()
+        self.assertEqual(self.deposit.transaction_status, 'pending')
+
+    @mock.patch('core.wallet.views.get_client')
+    def test_unsuccessful_payment_is_reported(self, get_client):
+        get_client.return_value.verify_transaction.return_value = {
+            'data': {'status': 'abandoned', 'amount': 50000},
+        }
+        response = self.verify()
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['status'], 'abandoned')
+        self.deposit.refresh_from_db()
+        self.assertEqual(self.deposit.transaction_status, 'pending')
+
+    @mock.patch('core.wallet.views.get_client')
+    def test_unknown_reference(self, get_client):
+        response = self.verify('ref-missing')
+        self.assertEqual(response.status_code, 400)
+        get_client.assert_not_called()
+
+
+
+
+class ConditionalWalletTests(TestCase):
+
+    def setUp(self):
+        get_cache().clear()
+        self.user = User.objects.create_user('ada@tikwey.local', 'ada', 'Benchmark1!')
+        self.user.is_active = True
+        self.user.save()
+        self.auth = 'Bearer ' + self.user.tokens()['access']
+
+    def get(self, **headers):
+        return self.client.get(
+            '/api/user/wallet/', HTTP_HOST='localhost', HTTP_AUTHORIZATION=self.auth, **headers,
+        )
+
+    def test_matching_validators_are_not_modified(self):
+        first = self.get()
+
+        for headers in ({'HTTP_IF_NONE_MATCH': first['ETag']},
+                        {'HTTP_IF_MODIFIED_SINCE': first['Last-Modified']}):
+            response = self.get(**headers)
+            self.assertEqual(response.status_code, 304, headers)
+            self.assertEqual(response.content, b'')
+
+    def test_wallet_change_serves_a_new_body(self):
+        first = self.get()
+        later = timezone.now() + timezone.timedelta(seconds=2)
+        Wallet.objects.filter(user=self.user).update(date_updated=later)
+
+        for headers in ({'HTTP_IF_NONE_MATCH': first['ETag']},
+                        {'HTTP_IF_MODIFIED_SINCE': first['Last-Modified']}):
+            response = self.get(**headers)
+            self.assertEqual(response.status_code, 200, headers)
+            self.assertNotEqual(response['ETag'], first['ETag'])
+
+    def test_owner_change_serves_a_new_body(self):
+        first = self.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.first_name = 'Augusta'
+            self.user.save()
+
+        response = self.get(HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0]['user']['first_name'], 'Augusta')
 
-# Create your tests here.
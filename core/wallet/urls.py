@@ -5,6 +5,7 @@ from django.urls import path
 
 from core.wallet.views import (
     wallet_information_view,
+    wallet_transaction_list_view,
     wallet_deposit_view,
     verify_deposit_view,
 )
@@ -15,6 +16,7 @@ app_name = 'core.wallet'
 
 urlpatterns = [
     path('', wallet_information_view, name='wallet-info'),
+    path('transactions/', wallet_transaction_list_view, name='wallet-transactions'),
     path('deposit/', wallet_deposit_view, name='wallet-deposit'),
     path('deposit/verify/<str:reference>/', verify_deposit_view, name='verify-deposit'),
 ]
\ No newline at end of file
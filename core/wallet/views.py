@@ -1,18 +1,21 @@
-import requests
-from django.conf import settings
-
+from django.db.models.functions import Greatest
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.generics import GenericAPIView, ListAPIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 
+from api.mixins import ConditionalGetMixin
+from api.pagination import TransactionPagination
+from api.paystack import GatewayUnavailable, PaystackError, get_client
+from core.wallet import deposits
 from core.wallet.models import (
     Wallet,
     WalletTransaction,
 )
 from api.serializers.wallet_serializers import (
     WalletSerializer,
+    WalletTransactionSerializer,
     DepositSerializer,
 )
 
@@ -21,16 +24,21 @@ from api.serializers.wallet_serializers import (
 
 # WALLET INFORMATION VIEW #
 
-class WalletInformation(GenericAPIView):
+class WalletInformation(ConditionalGetMixin, GenericAPIView):
     queryset = Wallet.objects.all()
     serializer_class = WalletSerializer
     permission_classes = [IsAuthenticated]
+    # The body carries the owner's name and email too
+    last_modified_field = Greatest('date_updated', 'user__date_updated')
+
+    def get_queryset(self):
+        return self.queryset.filter(user=self.request.user)
     
     def get(self, request, *args, **kwargs):
         try:
-            user = request.user
-            wallet_data = self.get_queryset().filter(user=user)
-            serializer = WalletSerializer(wallet_data, many=True)
+            # The authenticated user comes with its wallet, see
+            # core/user/authentication.py
+            serializer = WalletSerializer([request.user.wallet], many=True)
             return Response(serializer.data, status=status.HTTP_200_OK)
         
         except Exception as e:
@@ -41,6 +49,21 @@ wallet_information_view = WalletInformation.as_view()
 
 
 
+# WALLET TRANSACTION HISTORY VIEW #
+
+class WalletTransactionList(ListAPIView):
+    serializer_class = WalletTransactionSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = TransactionPagination
+
+    def get_queryset(self):
+        return WalletTransaction.objects.filter(wallet=self.request.user.wallet)
+
+wallet_transaction_list_view = WalletTransactionList.as_view()
+
+
+
+
 # WALLET DEPOSIT VIEW #
 
 class DepositFund(GenericAPIView):
@@ -71,24 +94,38 @@ class VerifyDeposit(APIView):
         try:
             transaction = WalletTransaction.objects.get(
                 paystack_payment_reference=reference,
-                wallet__user=request.user
+                wallet=request.user.wallet
             )
-            reference = transaction.paystack_payment_reference
-
-            url = 'https://api.paystack.co/transaction/verify/{}'.format(reference)
-            headers = {"authorization": f"Bearer {settings.PAYSTACK_SECRET_KEY}"}
-            r = requests.get(url, headers=headers)
-            resp = r.json()
-
-            if resp['data']['status'] == 'success':
-                transaction_status = resp['data']['status']
-                amount = resp['data']['amount']
-                WalletTransaction.objects.filter(
-                    paystack_payment_reference=reference).update(transaction_status=transaction_status, amount=amount)
-                
-                return Response(resp['data']['status'], status=status.HTTP_200_OK)
-            
-        except Exception as e:
-            return Response(status=status.HTTP_400_BAD_REQUEST)
+        except WalletTransaction.DoesNotExist:
+            return Response(
+                {'error': 'This deposit is not available'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        reference = transaction.paystack_payment_reference
+
+        try:
+            resp = get_client().verify_transaction(reference)
+        except GatewayUnavailable as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        except PaystackError as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        payment_status = resp['data']['status']
+
+        if payment_status == 'success':
+            deposits.credit(reference, resp['data']['amount'])
+            return Response(payment_status, status=status.HTTP_200_OK)
+
+        return Response(
+            {'error': 'The payment was not successful', 'status': payment_status},
+            status=status.HTTP_400_BAD_REQUEST
+        )
 
 verify_deposit_view = VerifyDeposit.as_view()